@@ -13,6 +13,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from modules.main_window import MainWindow
+from modules.job_manager import process_pool
 
 def main():
     """主函数"""
@@ -39,6 +40,9 @@ def main():
     
     # 运行主循环
     root.mainloop()
+    
+    # 关闭工作进程
+    process_pool.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,125 @@
+"""
+区域平均降采样测试
+比较按步长取样和区域平均（k×k像素块的平均值）的吞吐量、内存流量和峰值分配
+
+用法:
+    python benchmarks/bench_area_average.py
+
+在内存中生成24MP的8位和16位RGB数组，按不同的降采样率测试。
+吞吐量按源图像的像素数计算；内存流量是从源数组读取的字节数估计：
+按步长取样只读取被取样行中包含被取样像素的64字节缓存行，区域平均读取全部像素。
+最后用周期等于降采样率的条纹图像比较两种方式的混叠。
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.area_average import area_average
+
+
+# 生成的测试图像尺寸
+WIDTH, HEIGHT = 6000, 4000
+
+# 测试的降采样率
+SAMPLE_RATES = (2, 4, 8, 16, 32)
+
+# 每项测试的重复次数（取最短耗时）
+REPEAT = 3
+
+# 缓存行字节数
+CACHE_LINE = 64
+
+
+def stride_sample(pixels, rate):
+    """按步长取样并复制为连续数组（与降采样后的处理一致）"""
+    return np.ascontiguousarray(pixels[::rate, ::rate])
+
+
+def measure(func):
+    """
+    运行函数并统计最短耗时和峰值分配
+    
+    Returns:
+        tuple: (耗时秒数, 峰值分配字节数)
+    """
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+        del result
+    
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    del result
+    tracemalloc.stop()
+    return best, peak
+
+
+def stride_traffic(pixels, rate):
+    """按步长取样读取的字节数估计（每个被取样像素所在的缓存行，相邻像素可能共用一个缓存行）"""
+    height, width = pixels.shape[:2]
+    pixel_bytes = pixels.itemsize * (pixels.shape[2] if pixels.ndim == 3 else 1)
+    rows = -(-height // rate)
+    row_bytes = width * pixel_bytes
+    lines_per_row = min(-(-row_bytes // CACHE_LINE), -(-width // rate))
+    return rows * lines_per_row * CACHE_LINE
+
+
+def report(name, pixels):
+    """输出一种数据类型各降采样率的结果"""
+    megapixels = pixels.shape[0] * pixels.shape[1] / 1e6
+    for rate in SAMPLE_RATES:
+        stride_time, stride_peak = measure(lambda: stride_sample(pixels, rate))
+        area_time, area_peak = measure(lambda: area_average(pixels, rate))
+        print(
+            f"{name:<8} {rate:>4} "
+            f"{megapixels / stride_time:>11.0f} {megapixels / area_time:>9.0f} "
+            f"{stride_traffic(pixels, rate) / 2 ** 20:>12.1f} {pixels.nbytes / 2 ** 20:>10.1f} "
+            f"{stride_peak / 2 ** 20:>12.2f} {area_peak / 2 ** 20:>10.2f}"
+        )
+
+
+def aliasing(rate):
+    """
+    周期为rate的竖条纹（每个周期只有第一列为白色）降采样后的亮度
+    
+    Returns:
+        tuple: (按步长取样的平均亮度, 区域平均的平均亮度, 真实平均亮度)
+    """
+    stripes = np.zeros((256, 256 * rate, 3), dtype=np.uint8)
+    stripes[:, ::rate] = 255
+    return (
+        float(stride_sample(stripes, rate).mean()),
+        float(area_average(stripes, rate).mean()),
+        float(stripes.mean())
+    )
+
+
+def main():
+    """入口"""
+    print(
+        f"{'dtype':<8} {'rate':>4} {'stride MP/s':>11} {'area MP/s':>9} "
+        f"{'stride MB rd':>12} {'area MB rd':>10} {'stride peak':>12} {'area peak':>10}"
+    )
+    
+    rng = np.random.default_rng(0)
+    report('uint8', rng.integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8))
+    report('uint16', rng.integers(0, 65536, (HEIGHT, WIDTH, 3), dtype=np.uint16))
+    
+    print()
+    print(f"{'rate':>4} {'stride mean':>11} {'area mean':>9} {'true mean':>9}")
+    for rate in (4, 8):
+        stride_mean, area_mean, true_mean = aliasing(rate)
+        print(f"{rate:>4} {stride_mean:>11.1f} {area_mean:>9.1f} {true_mean:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+JPEG解码缩放性能测试
+比较完整解码后按步长取样与libjpeg按1/2、1/4、1/8缩放解码后再按剩余步长取样的耗时
+
+用法:
+    python benchmarks/bench_jpeg_decode_scale.py [JPEG文件 ...]
+
+不指定文件时生成24MP和50MP的测试JPEG（保存在临时目录）。
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.image_processor import ImageProcessor
+
+
+# 测试的降采样率
+SAMPLE_RATES = (2, 4, 5, 8, 10, 20, 40)
+
+# 每项测试重复次数（取最短耗时）
+REPEATS = 3
+
+# 生成的测试图像尺寸 (名称, 宽, 高)
+SYNTHETIC_SIZES = (('24MP', 6000, 4000), ('50MP', 8660, 5774))
+
+
+def make_test_jpeg(directory, name, width, height):
+    """
+    生成带渐变和噪声的测试JPEG
+    
+    Args:
+        directory: 保存目录
+        name: 名称
+        width: 宽度
+        height: 高度
+    
+    Returns:
+        str: 文件路径
+    """
+    rng = np.random.default_rng(0)
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    x = np.linspace(0, 1, width, dtype=np.float32)[None, :]
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    for channel, (a, b) in enumerate(((200, 40), (60, 180), (120, 90))):
+        plane = a * x + b * y
+        plane += rng.normal(0, 6, size=(height, width)).astype(np.float32)
+        np.clip(plane, 0, 255, out=plane)
+        image[:, :, channel] = plane
+    
+    path = os.path.join(directory, f'bench_{name}.jpg')
+    Image.fromarray(image).save(path, quality=90)
+    return path
+
+
+def best_time(func):
+    """多次运行取最短耗时（秒）"""
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def full_decode(path, sample_rate):
+    """完整解码后按步长取样（原有方式）"""
+    with Image.open(path) as image:
+        pixels = np.asarray(image.convert('RGB'))
+    return np.ascontiguousarray(pixels[::sample_rate, ::sample_rate])
+
+
+def scaled_decode(path, sample_rate):
+    """按与降采样率兼容的最大倍数缩放解码后再按剩余步长取样"""
+    scale = ImageProcessor.decode_scale(path, sample_rate)
+    image = ImageProcessor.load_image(path, scale)
+    sampling = ImageProcessor.sampling_info(sample_rate, image.decode_scale)
+    return np.ascontiguousarray(ImageProcessor.downsample_image(image, sampling['stride']))
+
+
+def run(paths):
+    """对每个文件和降采样率输出两种方式的耗时"""
+    print(f"{'file':<20} {'size':>11} {'rate':>5} {'method':>14} {'full (s)':>9} {'scaled (s)':>10} {'speedup':>8}")
+    for path in paths:
+        with Image.open(path) as image:
+            width, height = image.size
+        for sample_rate in SAMPLE_RATES:
+            scale = ImageProcessor.decode_scale(path, sample_rate)
+            method = f'1/{scale} + 1/{sample_rate // scale}' if scale > 1 else 'stride'
+            full = best_time(lambda: full_decode(path, sample_rate))
+            scaled = best_time(lambda: scaled_decode(path, sample_rate))
+            print(
+                f"{os.path.basename(path):<20} {width:>5}x{height:<5} {sample_rate:>5} {method:>14} "
+                f"{full:>9.3f} {scaled:>10.3f} {full / scaled:>7.1f}x"
+            )
+
+
+def main():
+    """入口"""
+    paths = sys.argv[1:]
+    if paths:
+        run(paths)
+        return
+    
+    with tempfile.TemporaryDirectory() as directory:
+        paths = [make_test_jpeg(directory, name, width, height) for name, width, height in SYNTHETIC_SIZES]
+        run(paths)
+
+
+if __name__ == '__main__':
+    main()
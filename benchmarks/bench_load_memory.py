@@ -0,0 +1,123 @@
+"""
+图像加载内存测试
+比较原有加载方式（保留像素副本、完整分辨率的float64和8位显示图像，降采样前再复制一次）
+与单一像素缓冲区加预览显示图像的峰值分配和耗时
+
+用法:
+    python benchmarks/bench_load_memory.py [图像文件 ...]
+
+不指定文件时生成24MP的8位PNG测试图像，并用内存中的24MP 16位数组比较TIFF解码后的处理。
+峰值由tracemalloc统计，不含Pillow内部的解码缓冲区（两种方式相同）。
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.image_processor import ImageProcessor
+
+
+# 测试的降采样率
+SAMPLE_RATE = 4
+
+# 生成的测试图像尺寸
+WIDTH, HEIGHT = 6000, 4000
+
+
+def measure(func):
+    """
+    运行函数并统计峰值分配和耗时
+    
+    Returns:
+        tuple: (峰值分配字节数, 耗时秒数)
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    del result
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def legacy_ingest(img_array):
+    """原有的16位TIFF解码后处理：复制原始数组，完整分辨率生成float64和8位显示图像"""
+    original_array = img_array.copy()
+    if img_array.ndim == 3 and img_array.shape[2] > 3:
+        img_array = img_array[:, :, :3]
+        original_array = original_array[:, :, :3]
+    elif img_array.ndim == 2:
+        img_array = np.stack([img_array] * 3, axis=-1)
+        original_array = np.stack([original_array] * 3, axis=-1)
+    
+    max_val = img_array.max()
+    min_val = img_array.min()
+    img_array_float = (img_array.astype(np.float64) - min_val) / (max_val - min_val)
+    display = Image.fromarray((img_array_float * 255).astype(np.uint8))
+    del img_array_float
+    
+    sampled = original_array[::SAMPLE_RATE, ::SAMPLE_RATE]
+    return display, original_array, np.ascontiguousarray(sampled)
+
+
+def legacy_load(path):
+    """原有的PIL格式加载：保留完整分辨率的PIL图像，降采样前用np.array复制"""
+    img = Image.open(path)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    sampled = np.array(img)[::SAMPLE_RATE, ::SAMPLE_RATE]
+    return img, np.ascontiguousarray(sampled)
+
+
+def current_ingest(img_array):
+    """单一像素缓冲区，显示图像由预览生成"""
+    img = ImageProcessor.from_pixels(img_array)
+    return img, np.ascontiguousarray(ImageProcessor.downsample_image(img, SAMPLE_RATE))
+
+
+def current_load(path):
+    """当前的加载方式"""
+    img = ImageProcessor.load_image(path)
+    return img, np.ascontiguousarray(ImageProcessor.downsample_image(img, SAMPLE_RATE))
+
+
+def report(name, legacy, current):
+    """输出一项测试的结果"""
+    (legacy_peak, legacy_time), (current_peak, current_time) = legacy, current
+    print(
+        f"{name:<28} {legacy_peak / 2 ** 20:>10.1f} {current_peak / 2 ** 20:>11.1f} "
+        f"{legacy_time:>9.3f} {current_time:>10.3f}"
+    )
+
+
+def main():
+    """入口"""
+    print(f"{'case':<28} {'legacy MB':>10} {'current MB':>11} {'legacy s':>9} {'current s':>10}")
+    
+    paths = sys.argv[1:]
+    if paths:
+        for path in paths:
+            report(os.path.basename(path), measure(lambda: legacy_load(path)), measure(lambda: current_load(path)))
+        return
+    
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench_24MP.png')
+        Image.fromarray(rng.integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8)).save(path, compress_level=1)
+        report('24MP 8-bit PNG', measure(lambda: legacy_load(path)), measure(lambda: current_load(path)))
+    
+    # 解码后的16位数组由两种方式共享，只比较解码之后的处理
+    pixels = rng.integers(0, 65536, (HEIGHT, WIDTH, 3), dtype=np.uint16)
+    report('24MP 16-bit TIFF (decoded)', measure(lambda: legacy_ingest(pixels)), measure(lambda: current_ingest(pixels)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+共享内存结果传递测试
+比较工作进程通过pickle返回处理结果与通过共享内存返回（SharedResult）的耗时和界面进程的峰值分配
+
+用法:
+    python benchmarks/bench_shared_results.py
+
+工作进程按不同点数生成随机像素并转换为已准备好绘图点集的MultiSpaceResult（每个点数只生成一次），
+之后重复返回同一结果。耗时从提交任务开始，到界面进程得到可以使用的结果为止；
+峰值分配是界面进程在接收和还原结果期间的Python内存分配（tracemalloc）。
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.color_spaces import MultiSpaceResult
+from modules.shared_results import SharedResult, receive_result
+
+
+# 测试的点数
+POINT_COUNTS = (250000, 1000000, 4000000)
+
+# 每项测试的重复次数（取最短耗时）
+REPEAT = 3
+
+# 工作进程中已生成的结果 {点数: 结果字典}
+_results = {}
+
+
+def make_result(points, shared):
+    """
+    在工作进程中返回指定点数的处理结果
+    
+    Args:
+        points: 点数
+        shared: 是否通过共享内存返回
+    
+    Returns:
+        dict或SharedResult: 处理结果
+    """
+    result = _results.get(points)
+    if result is None:
+        rng = np.random.default_rng(points)
+        pixels = rng.integers(0, 65536, (points, 1, 3), dtype=np.uint16)
+        spaces = MultiSpaceResult.from_pixels(pixels)
+        spaces.prepare_points('rg_bg')
+        result = {'spaces': spaces}
+        _results[points] = result
+    return SharedResult.export(result) if shared else result
+
+
+def measure(executor, points, shared):
+    """
+    统计一种传递方式的最短耗时和峰值分配
+    
+    Returns:
+        tuple: (耗时秒数, 峰值分配字节数, 共享内存段中的数组字节数)
+    """
+    best = float('inf')
+    peak = 0
+    nbytes = 0
+    for _ in range(REPEAT):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = executor.submit(make_result, points, shared).result()
+        handle = result if isinstance(result, SharedResult) else None
+        image_data = receive_result(result)
+        image_data['spaces'].to_image_data('rg_bg')
+        best = min(best, time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        
+        del image_data, result
+        if handle is not None:
+            nbytes = handle.nbytes
+            handle.release()
+    return best, peak, nbytes
+
+
+def main():
+    """入口"""
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        print(f"{'points':>9} {'array MB':>8} {'pickle ms':>10} {'shared ms':>10} {'pickle peak MB':>15} {'shared peak MB':>15}")
+        for points in POINT_COUNTS:
+            # 预先生成结果，不计入耗时
+            executor.submit(make_result, points, False).result()
+            pickle_time, pickle_peak, _ = measure(executor, points, False)
+            shared_time, shared_peak, nbytes = measure(executor, points, True)
+            print(
+                f"{points:>9} {nbytes / 2 ** 20:>8.1f} {pickle_time * 1000:>10.1f} {shared_time * 1000:>10.1f} "
+                f"{pickle_peak / 2 ** 20:>15.1f} {shared_peak / 2 ** 20:>15.1f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
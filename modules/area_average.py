@@ -0,0 +1,106 @@
+"""
+区域平均降采样模块
+把图像分成 k×k 的像素块，每个块输出一个平均值：按行条带分两次累加，8位和16位图像用整数累加，
+右侧和底部不足k个像素的块按实际像素数平均；输出的点数与按步长k取样相同，但不会与周期性的纹理混叠
+"""
+
+import numpy as np
+
+
+# 每个条带读取的源像素字节数上限（限制条带内累加数组的大小）
+BAND_BYTES = 8 * 1024 * 1024
+
+
+def accumulator_dtype(dtype, factor):
+    """
+    选择累加 factor×factor 个像素时不会溢出的数据类型
+    
+    Args:
+        dtype: 像素数据类型
+        factor: 块边长
+    
+    Returns:
+        numpy.dtype: 累加使用的数据类型（无符号整数取能容纳总和的最小类型，浮点数使用float64）
+    """
+    dtype = np.dtype(dtype)
+    if dtype.kind == 'u':
+        total = int(np.iinfo(dtype).max) * factor * factor
+        for candidate in (np.uint16, np.uint32, np.uint64):
+            if np.dtype(candidate).itemsize >= dtype.itemsize and total <= np.iinfo(candidate).max:
+                return np.dtype(candidate)
+        return np.dtype(np.uint64)
+    if dtype.kind in 'ib':
+        return np.dtype(np.int64)
+    return np.dtype(np.float64)
+
+
+def area_average(pixels, factor):
+    """
+    对图像做 factor×factor 的区域平均
+    
+    按条带处理：先把每个块的factor行相加，再把相邻的factor列相加。每次相加都是对整个条带
+    按步长取出的一组行（列）做逐元素加法，不需要沿短轴归约，右侧和底部不足factor的块由较短的
+    一组自然处理；整数图像四舍五入到原数据类型。
+    
+    Args:
+        pixels: 像素数组 (H, W) 或 (H, W, C)，可以是内存映射的数组（任意字节序）
+        factor: 块边长（1表示不降采样）
+    
+    Returns:
+        numpy.ndarray: 本机字节序、与输入数据类型相同的数组，形状为 (ceil(H/factor), ceil(W/factor)[, C])
+    """
+    native = pixels.dtype.newbyteorder('=')
+    if factor <= 1:
+        return pixels.astype(native, copy=False)
+    
+    squeeze = pixels.ndim == 2
+    if squeeze:
+        pixels = pixels[:, :, None]
+    height, width, channels = pixels.shape
+    out_height = -(-height // factor)
+    out_width = -(-width // factor)
+    output = np.empty((out_height, out_width, channels), dtype=native)
+    if height == 0 or width == 0:
+        return output[:, :, 0] if squeeze else output
+    
+    acc = accumulator_dtype(native, factor)
+    integer = acc.kind in 'ui'
+    
+    # 每列的像素数（最后一列可能不足factor）
+    col_counts = np.full(out_width, factor, dtype=acc)
+    col_counts[-1] = width - (out_width - 1) * factor
+    
+    # 条带行数是factor的整数倍
+    row_bytes = width * channels * pixels.dtype.itemsize
+    band_blocks = max(1, BAND_BYTES // max(1, row_bytes * factor))
+    band_rows = band_blocks * factor
+    
+    for start in range(0, height, band_rows):
+        stop = min(start + band_rows, height)
+        band = pixels[start:stop]
+        
+        # 每个块内的factor行相加（最后一个条带可能有不足factor行的块）
+        rows = band[::factor].astype(acc)
+        row_counts = np.full(len(rows), factor, dtype=acc)
+        row_counts[-1] = len(band) - (len(rows) - 1) * factor
+        for offset in range(1, min(factor, len(band))):
+            part = band[offset::factor]
+            np.add(rows[:len(part)], part, out=rows[:len(part)])
+        
+        # 相邻的factor列相加
+        sums = rows[:, ::factor].copy()
+        for offset in range(1, min(factor, width)):
+            part = rows[:, offset::factor]
+            sums[:, :part.shape[1]] += part
+        del rows
+        
+        # 除以块内的像素数（整数四舍五入）
+        counts = np.multiply.outer(row_counts, col_counts)[:, :, None]
+        if integer:
+            sums += counts // 2
+            sums //= counts
+        else:
+            sums /= counts
+        output[start // factor:start // factor + len(sums)] = sums
+    
+    return output[:, :, 0] if squeeze else output
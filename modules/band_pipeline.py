@@ -0,0 +1,331 @@
+"""
+条带处理模块
+按水平条带读取磁盘上的图像（内存映射或按条带/分块解码的TIFF），逐条带降采样和转换颜色空间，
+结果追加到可增长的缓冲区中；每个条带的工作内存不超过设定的上限，处理过程中可以输出部分结果
+"""
+
+import math
+import os
+import time
+
+import numpy as np
+
+from modules.tiff_reader import TiffReader
+from modules.color_kernels import reduce_colors as reduce_rgb_colors, merge_colors
+from modules.color_spaces import MultiSpaceResult
+from modules.area_average import area_average
+
+
+class GrowableArray:
+    """
+    容量按倍数增长的数组
+    
+    追加数据时只在容量不足时重新分配，均摊开销为常数；已导出的视图不会被之后的追加修改。
+    """
+    
+    # 初始容量（行数）
+    INITIAL_CAPACITY = 4096
+    
+    def __init__(self, dtype, tail_shape=()):
+        """
+        初始化数组
+        
+        Args:
+            dtype: 数据类型
+            tail_shape: 每行的形状，例如颜色数组为 (3,)
+        """
+        self._data = np.empty((self.INITIAL_CAPACITY,) + tuple(tail_shape), dtype=dtype)
+        self._size = 0
+    
+    def __len__(self):
+        """已追加的行数"""
+        return self._size
+    
+    def extend(self, values):
+        """
+        在末尾追加数据
+        
+        Args:
+            values: 数组，除第一维外的形状与tail_shape相同
+        """
+        needed = self._size + len(values)
+        if needed > len(self._data):
+            capacity = max(needed, len(self._data) * 2)
+            data = np.empty((capacity,) + self._data.shape[1:], dtype=self._data.dtype)
+            data[:self._size] = self._data[:self._size]
+            self._data = data
+        self._data[self._size:needed] = values
+        self._size = needed
+    
+    def view(self):
+        """已追加数据的视图"""
+        return self._data[:self._size]
+    
+    def clear(self):
+        """清空数据（保留容量）"""
+        self._size = 0
+    
+    def finish(self):
+        """
+        取出最终结果（未使用的容量超过1/4时复制为紧凑数组）
+        
+        Returns:
+            numpy.ndarray: 已追加的数据
+        """
+        if self._size * 4 < len(self._data) * 3:
+            return self._data[:self._size].copy()
+        return self.view()
+
+
+class BandPipeline:
+    """
+    逐条带的降采样和颜色空间转换
+    
+    每个条带包含若干完整的图像行，只读取其中被取样的行；条带行数按内存上限计算，
+    按条带/分块解码的TIFF对齐到条带或分块的行数，避免同一条带被解压两次。
+    区域平均时读取条带的全部行，条带行数是块边长的整数倍，每个块不会跨越两个条带。
+    转换结果追加到可增长的缓冲区，颜色去重时每个条带分别去重后再合并。
+    """
+    
+    # 默认的条带工作内存上限（MB），可通过环境变量 EASYLOOK_BAND_MEMORY_MB 修改
+    DEFAULT_MEMORY_MB = 256
+    
+    # 两次输出部分结果的最短间隔（秒）
+    PARTIAL_INTERVAL = 1.0
+    
+    def __init__(self, source, sample_rate, memory_limit=None, area=False):
+        """
+        初始化流水线
+        
+        Args:
+            source: 内存映射的像素数组或TiffReader
+            sample_rate: 降采样率
+            memory_limit: 条带工作内存上限（字节），为None时使用环境变量或默认值
+            area: 是否区域平均（每个点是 sample_rate×sample_rate 像素块的平均值）
+        """
+        if memory_limit is None:
+            memory_mb = float(os.environ.get('EASYLOOK_BAND_MEMORY_MB', self.DEFAULT_MEMORY_MB))
+            memory_limit = int(memory_mb * 1024 * 1024)
+        
+        self.source = source
+        self.sample_rate = sample_rate
+        self.memory_limit = memory_limit
+        self.area = area and sample_rate > 1
+        
+        if isinstance(source, TiffReader):
+            self.height, self.width = source.height, source.width
+            channels = source.samples_per_pixel
+        else:
+            self.height, self.width = source.shape[:2]
+            channels = source.shape[2] if source.ndim == 3 else 1
+        
+        # 条带像素的数据类型（本机字节序）
+        self.dtype = source.dtype.newbyteorder('=')
+        
+        self.band_rows = self._compute_band_rows(max(channels, 3), self.dtype.itemsize)
+    
+    @staticmethod
+    def supports(source):
+        """
+        像素来源是否可以按条带读取（磁盘上的内存映射数组或按需解码的TIFF）
+        
+        Args:
+            source: 像素来源
+        
+        Returns:
+            bool: 是否支持
+        """
+        return isinstance(source, (np.memmap, TiffReader))
+    
+    def _compute_band_rows(self, channels, itemsize):
+        """
+        按内存上限计算每个条带的图像行数
+        
+        每个被取样的像素约占用：取样后的副本和有效像素压缩各一份通道数据，
+        以及两个float32坐标和一个掩码字节。区域平均时每个块的sample_rate行还需要
+        解码后的完整行（TiffReader）和累加数组。
+        """
+        sample_rate = self.sample_rate
+        sampled_width = -(-self.width // sample_rate)
+        bytes_per_row = max(1, sampled_width * (2 * channels * itemsize + 9))
+        if self.area:
+            bytes_per_row += self.width * channels * (itemsize + 8) * sample_rate
+        band_rows = max(1, self.memory_limit // bytes_per_row) * sample_rate
+        
+        # 对齐到TIFF条带或分块的行数（区域平均时同时保持为块边长的整数倍）
+        if isinstance(self.source, TiffReader):
+            chunk_rows = self.source.chunk_rows
+            if self.area:
+                chunk_rows = chunk_rows * sample_rate // math.gcd(chunk_rows, sample_rate)
+            if band_rows >= chunk_rows:
+                band_rows -= band_rows % chunk_rows
+        return min(band_rows, self.height)
+    
+    @property
+    def band_count(self):
+        """条带数"""
+        return -(-self.height // self.band_rows)
+    
+    def iter_bands(self):
+        """
+        逐条带读取并降采样
+        
+        Yields:
+            tuple: (已完成的行比例, 降采样后的RGB条带 (h, w, 3))
+        """
+        for start in range(0, self.height, self.band_rows):
+            stop = min(start + self.band_rows, self.height)
+            band = self._read_band(start, stop)
+            if len(band):
+                yield stop / self.height, band
+    
+    def _read_band(self, start, stop):
+        """
+        读取一个条带中被取样的行（取样行是降采样率的整数倍，与整幅降采样一致）
+        
+        Returns:
+            numpy.ndarray: 本机字节序的RGB数组，单通道扩展为3通道，多于3个通道时只取前3个
+        """
+        sample_rate = self.sample_rate
+        if self.area:
+            if isinstance(self.source, TiffReader):
+                band = self.source.read(row_range=(start, stop))
+            else:
+                band = self.source[start:stop]
+            # 多余的通道不参与平均
+            if band.ndim == 3 and band.shape[2] > 3:
+                band = band[:, :, :3]
+            band = area_average(band, sample_rate)
+        elif isinstance(self.source, TiffReader):
+            band = self.source.read(sample_rate, sample_rate, row_range=(start, stop))
+        else:
+            first = -(-start // sample_rate) * sample_rate
+            band = self.source[first:stop:sample_rate, ::sample_rate]
+            band = band.astype(band.dtype.newbyteorder('='))
+        
+        if band.ndim == 3 and band.shape[2] > 3:
+            band = band[:, :, :3]
+        if band.ndim == 2:
+            band = np.stack([band] * 3, axis=-1)
+        return band
+    
+    def run(self, reduce_colors=False, color_bits=None, progress_callback=None, partial_callback=None):
+        """
+        逐条带处理整幅图像
+        
+        Args:
+            reduce_colors: 是否对颜色去重
+            color_bits: 去重时16位图像每通道保留的位数
+            progress_callback: 进度回调 progress_callback(stage, fraction)，每个条带调用一次
+            partial_callback: 部分结果回调 partial_callback(MultiSpaceResult)，可为None
+        
+        Returns:
+            MultiSpaceResult: 转换结果
+        """
+        # 延迟导入，避免与image_processor循环引用
+        from modules.image_processor import ImageProcessor
+        
+        accumulator = create_accumulator(self.dtype, reduce_colors, color_bits)
+        last_partial = time.monotonic()
+        
+        for fraction, band in self.iter_bands():
+            accumulator.add(band)
+            del band
+            
+            ImageProcessor.report_progress(progress_callback, 'band', 0.1 + 0.7 * fraction)
+            
+            now = time.monotonic()
+            if partial_callback is not None and fraction < 1.0 and now - last_partial >= self.PARTIAL_INTERVAL:
+                partial_callback(accumulator.result())
+                last_partial = time.monotonic()
+        
+        return accumulator.result(finish=True)
+
+
+def create_accumulator(dtype, reduce_colors=False, color_bits=None):
+    """
+    创建分段转换结果的累积缓冲区
+    
+    Args:
+        dtype: 像素数据类型
+        reduce_colors: 是否对颜色去重（只支持8位和16位整数，其他数据类型退回逐像素转换）
+        color_bits: 去重时16位图像每通道保留的位数
+    
+    Returns:
+        CoordinateAccumulator 或 ColorAccumulator
+    """
+    if reduce_colors and dtype in (np.uint8, np.uint16):
+        return ColorAccumulator(dtype, color_bits)
+    return CoordinateAccumulator()
+
+
+class CoordinateAccumulator:
+    """逐像素转换结果的累积缓冲区"""
+    
+    def __init__(self):
+        """初始化各坐标数组的缓冲区"""
+        self.arrays = {name: GrowableArray(np.float32) for name in MultiSpaceResult.ARRAY_NAMES}
+    
+    def add(self, band):
+        """转换一个条带并追加结果"""
+        result = MultiSpaceResult.from_pixels(band)
+        for name, array in self.arrays.items():
+            array.extend(getattr(result, name))
+    
+    def result(self, finish=False):
+        """
+        生成当前的转换结果
+        
+        Args:
+            finish: 是否为最终结果（压缩多余容量）
+        """
+        return MultiSpaceResult.from_arrays({
+            name: array.finish() if finish else array.view()
+            for name, array in self.arrays.items()
+        })
+
+
+class ColorAccumulator:
+    """颜色去重结果的累积缓冲区"""
+    
+    def __init__(self, dtype, bits=None):
+        """
+        初始化缓冲区
+        
+        Args:
+            dtype: 颜色数据类型
+            bits: 16位图像每通道保留的位数
+        """
+        self.bits = bits
+        self.colors = GrowableArray(dtype, (3,))
+        self.counts = GrowableArray(np.int64)
+        
+        # 已合并部分的颜色数，累积的颜色数超过其两倍时再次合并
+        self.merged_size = 0
+    
+    def add(self, band):
+        """对一个条带去重并追加结果，累积的颜色数超过上次合并后的两倍时合并一次"""
+        colors, counts = reduce_rgb_colors(band, bits=self.bits)
+        self.colors.extend(colors)
+        self.counts.extend(counts)
+        if len(self.colors) > 2 * max(self.merged_size, GrowableArray.INITIAL_CAPACITY):
+            self._merge()
+    
+    def _merge(self):
+        """合并重复的颜色"""
+        colors, counts = merge_colors(self.colors.view(), self.counts.view())
+        self.colors.clear()
+        self.counts.clear()
+        self.colors.extend(colors)
+        self.counts.extend(counts)
+        self.merged_size = len(colors)
+    
+    def result(self, finish=False):
+        """
+        生成当前的转换结果
+        
+        Args:
+            finish: 是否为最终结果（合并后的数组总是复制，不需要额外处理）
+        """
+        self._merge()
+        return MultiSpaceResult.from_colors(self.colors.view().copy(), self.counts.view().copy())
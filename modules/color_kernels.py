@@ -0,0 +1,216 @@
+"""
+颜色空间转换内核
+单次遍历、预分配输出的float32转换实现，只做一次有效像素压缩
+"""
+
+import numpy as np
+
+
+# 16位图像去重时每通道默认保留的位数
+DEFAULT_16BIT_COLOR_BITS = 12
+
+
+def _gray_result(gray, x_value, y_value, dtype):
+    """
+    单通道图像的转换结果（r=g=b，有效像素的坐标为常数）
+    
+    Args:
+        gray: 单通道数组 (H, W)
+        x_value: x坐标值
+        y_value: y坐标值
+        dtype: 输出数据类型
+    
+    Returns:
+        tuple: (x数组, y数组)
+    """
+    valid = gray > 0
+    if not np.issubdtype(gray.dtype, np.integer):
+        # 浮点图像中inf的像素比值无意义，与NaN一样不计入
+        valid &= np.isfinite(gray)
+    count = int(np.count_nonzero(valid))
+    return np.full(count, x_value, dtype=dtype), np.full(count, y_value, dtype=dtype)
+
+
+def _finite(rgb_array, x_data, y_data):
+    """
+    去掉浮点图像中坐标不是有限值的点（通道含NaN或inf，或比值溢出）
+    
+    整数图像的坐标总是有限值，不做检查。
+    
+    Args:
+        rgb_array: 输入的像素数组
+        x_data: x坐标数组
+        y_data: y坐标数组
+    
+    Returns:
+        tuple: (x数组, y数组)
+    """
+    if np.issubdtype(rgb_array.dtype, np.integer):
+        return x_data, y_data
+    finite = np.isfinite(x_data)
+    finite &= np.isfinite(y_data)
+    if finite.all():
+        return x_data, y_data
+    return x_data[finite], y_data[finite]
+
+
+def rg_bg_kernel(rgb_array, dtype=np.float32):
+    """
+    计算有效像素（g > 0）的 r/g, b/g 坐标
+    
+    归一化系数在比值中相互抵消，因此直接对原始整数值做除法；
+    只对压缩后的有效像素做一次除法，按指定精度直接写入输出数组，不会生成整幅图像的浮点临时数组。
+    浮点图像中坐标不是有限值的像素（NaN、inf）不计入。
+    
+    Args:
+        rgb_array: RGB数组 (H, W, C)，C >= 3；或单通道数组 (H, W)
+        dtype: 输出数据类型
+    
+    Returns:
+        tuple: (r/g数组, b/g数组)，只包含有效像素
+    """
+    if rgb_array.ndim == 2:
+        return _gray_result(rgb_array, 1.0, 1.0, dtype)
+    
+    # 在原始数据类型上计算掩码，并只压缩一次有效像素
+    valid_mask = rgb_array[..., 1] > 0
+    pixels = rgb_array[valid_mask]
+    
+    count = len(pixels)
+    x_data = np.empty(count, dtype=dtype)
+    y_data = np.empty(count, dtype=dtype)
+    with np.errstate(invalid='ignore', over='ignore'):
+        np.divide(pixels[:, 0], pixels[:, 1], out=x_data, dtype=dtype)
+        np.divide(pixels[:, 2], pixels[:, 1], out=y_data, dtype=dtype)
+    return _finite(rgb_array, x_data, y_data)
+
+
+def chromaticity_kernel(rgb_array, dtype=np.float32):
+    """
+    计算有效像素（r + g + b > 0）的色度坐标 r/(r+g+b), g/(r+g+b)
+    
+    浮点图像中坐标不是有限值的像素（NaN、inf）不计入。
+    
+    Args:
+        rgb_array: RGB数组 (H, W, C)，C >= 3；或单通道数组 (H, W)
+        dtype: 输出数据类型
+    
+    Returns:
+        tuple: (r/(r+g+b)数组, g/(r+g+b)数组)，只包含有效像素
+    """
+    if rgb_array.ndim == 2:
+        return _gray_result(rgb_array, 1.0 / 3.0, 1.0 / 3.0, dtype)
+    
+    channels = rgb_array[..., :3]
+    if np.issubdtype(rgb_array.dtype, np.unsignedinteger):
+        # 无符号整数：总和大于0等价于任一通道大于0，无需先求和
+        valid_mask = channels.any(axis=-1)
+    else:
+        valid_mask = channels.sum(axis=-1, dtype=dtype) > 0
+    pixels = rgb_array[valid_mask]
+    
+    count = len(pixels)
+    total = np.empty(count, dtype=dtype)
+    x_data = np.empty(count, dtype=dtype)
+    with np.errstate(invalid='ignore', over='ignore'):
+        np.add(pixels[:, 0], pixels[:, 1], out=total, dtype=dtype)
+        np.add(total, pixels[:, 2], out=total, dtype=dtype)
+        np.divide(pixels[:, 0], total, out=x_data, dtype=dtype)
+        
+        # 总和数组不再需要，直接复用为y坐标的输出缓冲区
+        y_data = np.divide(pixels[:, 1], total, out=total, dtype=dtype)
+    return _finite(rgb_array, x_data, y_data)
+
+
+def reduce_colors(rgb_array, bits=None):
+    """
+    将像素归并为不同颜色及其像素计数（稀疏RGB直方图）
+    
+    8位图像把RGB打包为24位整数键后精确去重；
+    16位图像先把每个通道量化到指定位数，再以量化后的颜色去重，
+    代表值取量化区间的中心。0单独占一个区间，保证通道是否为0（像素是否有效）不因量化改变。
+    
+    Args:
+        rgb_array: RGB数组 (H, W, C)，C >= 3，数据类型为uint8或uint16
+        bits: 每通道保留的位数，为None时8位图像取8，16位图像取DEFAULT_16BIT_COLOR_BITS
+    
+    Returns:
+        tuple: (颜色数组 (K, 3)，与输入同数据类型；每种颜色的像素数 (K,))
+               不支持的数据类型返回None
+    """
+    if rgb_array.ndim != 3 or rgb_array.dtype not in (np.uint8, np.uint16):
+        return None
+    
+    depth = rgb_array.dtype.itemsize * 8
+    if bits is None:
+        bits = 8 if depth == 8 else DEFAULT_16BIT_COLOR_BITS
+    bits = max(1, min(int(bits), depth))
+    shift = depth - bits
+    
+    if shift == 0:
+        # 不量化：直接以原始值为级别
+        key_bits = bits
+    else:
+        # 量化级别 ceil(v / 2^shift)：0只映射到级别0，需要多一位
+        key_bits = bits + 1
+    
+    # 打包为整数键：r << 2*key_bits | g << key_bits | b
+    key_dtype = np.uint32 if 3 * key_bits <= 32 else np.uint64
+    keys = np.empty(rgb_array.shape[:2], dtype=key_dtype)
+    channel = np.empty(rgb_array.shape[:2], dtype=key_dtype)
+    for index in range(3):
+        np.add(rgb_array[..., index], (1 << shift) - 1, out=channel, dtype=key_dtype)
+        np.right_shift(channel, shift, out=channel)
+        if index == 0:
+            keys[...] = channel
+        else:
+            np.left_shift(keys, key_bits, out=keys)
+            np.bitwise_or(keys, channel, out=keys)
+    del channel
+    
+    unique_keys, counts = np.unique(keys.ravel(), return_counts=True)
+    del keys
+    
+    # 解包为颜色；级别L (L > 0) 对应区间 [(L-1)*2^shift + 1, L*2^shift]，取其中心作为代表值
+    mask = (1 << key_bits) - 1
+    colors = np.empty((len(unique_keys), 3), dtype=rgb_array.dtype)
+    for index in range(3):
+        levels = (unique_keys >> (key_bits * (2 - index))) & mask
+        upper = levels << shift
+        lower = np.where(levels > 0, upper - (1 << shift) + 1, 0)
+        colors[:, index] = (lower + upper) >> 1
+    
+    return colors, counts
+
+
+def merge_colors(colors, counts):
+    """
+    合并重复的颜色并累加像素数（用于合并多次reduce_colors的结果）
+    
+    reduce_colors输出的代表值再次量化时落在同一区间，因此分别去重后再合并，
+    与对全部像素一次去重的结果相同。
+    
+    Args:
+        colors: 颜色数组 (K, 3)，数据类型为uint8或uint16
+        counts: 每种颜色的像素数 (K,)
+    
+    Returns:
+        tuple: (不重复的颜色数组 (K', 3)；每种颜色的像素数 (K',))
+    """
+    depth = colors.dtype.itemsize * 8
+    key_dtype = np.uint32 if 3 * depth <= 32 else np.uint64
+    
+    keys = colors[:, 0].astype(key_dtype)
+    for index in (1, 2):
+        np.left_shift(keys, depth, out=keys)
+        np.bitwise_or(keys, colors[:, index], out=keys, casting='unsafe')
+    
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    del keys
+    merged_counts = np.bincount(inverse, weights=counts, minlength=len(unique_keys)).astype(np.int64)
+    
+    mask = (1 << depth) - 1
+    merged = np.empty((len(unique_keys), 3), dtype=colors.dtype)
+    for index in range(3):
+        merged[:, index] = (unique_keys >> (depth * (2 - index))) & mask
+    return merged, merged_counts
@@ -0,0 +1,321 @@
+"""
+多颜色空间结果模块
+基础比值只计算一次，其他颜色空间按需派生并缓存，切换颜色空间无需重新处理图片
+"""
+
+import numpy as np
+
+from modules.color_kernels import rg_bg_kernel, chromaticity_kernel
+from modules.point_sets import PointSet
+from modules.spatial_index import GridIndex
+from modules.data_summary import DataSummary
+
+
+# 支持的颜色空间及坐标轴标签
+COLOR_SPACE_LABELS = {
+    'rg_bg': ('r/g', 'b/g'),
+    'chromaticity': ('r/(r+g+b)', 'g/(r+g+b)')
+}
+
+
+class MultiSpaceResult:
+    """
+    多颜色空间转换结果
+    
+    以 g > 0 像素的 r/g, b/g 为基础数据。在r/g, b/g空间中色度坐标可以精确推导：
+    r/(r+g+b) = rg / (rg + 1 + bg)，g/(r+g+b) = 1 / (rg + 1 + bg)。
+    g <= 0 但 r+g+b > 0 的像素在r/g, b/g空间中无效，其色度坐标单独保存。
+    颜色去重后每个坐标代表多个像素，权重数组记录对应的像素数。
+    """
+    
+    # 保存到磁盘缓存时的数组名称
+    ARRAY_NAMES = ('rg', 'bg', 'residual_x', 'residual_y')
+    
+    # 可选的权重数组名称
+    WEIGHT_NAMES = ('weights', 'residual_weights')
+    
+    def __init__(self, rg, bg, residual_x, residual_y, spaces=None, weights=None, residual_weights=None):
+        """
+        初始化结果
+        
+        Args:
+            rg: g > 0 像素的 r/g 数组
+            bg: g > 0 像素的 b/g 数组
+            residual_x: g <= 0 像素的 r/(r+g+b) 数组
+            residual_y: g <= 0 像素的 g/(r+g+b) 数组
+            spaces: 已计算好的颜色空间坐标 {颜色空间: (x, y)}，可为None
+            weights: rg/bg每个坐标代表的像素数，为None表示每个坐标对应一个像素
+            residual_weights: residual坐标的像素数，weights不为None时必须提供
+        """
+        self.rg = rg
+        self.bg = bg
+        self.residual_x = residual_x
+        self.residual_y = residual_y
+        self.weights = weights
+        self.residual_weights = residual_weights
+        
+        # 已派生的颜色空间坐标缓存
+        self._spaces = {'rg_bg': (rg, bg)}
+        if spaces:
+            self._spaces.update(spaces)
+        self._weights = {'rg_bg': weights}
+        
+        # 已合并重复坐标的绘图点集及其空间索引缓存
+        self._points = {}
+        self._indexes = {}
+        
+        # 各颜色空间坐标的分位数摘要缓存
+        self._summaries = {}
+    
+    @staticmethod
+    def from_pixels(rgb_array, dtype=np.float32):
+        """
+        从RGB数组计算基础比值（单次遍历）
+        
+        Args:
+            rgb_array: RGB数组 (H, W, C) 或单通道数组 (H, W)
+            dtype: 输出数据类型
+        
+        Returns:
+            MultiSpaceResult: 转换结果
+        """
+        rg, bg = rg_bg_kernel(rgb_array, dtype=dtype)
+        
+        if rgb_array.ndim == 2:
+            # 单通道图像 r=g=b，g <= 0 时色度坐标同样无效
+            residual_x = np.empty(0, dtype=dtype)
+            residual_y = np.empty(0, dtype=dtype)
+        else:
+            # g <= 0 的像素只参与色度空间
+            residual = rgb_array[~(rgb_array[..., 1] > 0)]
+            residual_x, residual_y = chromaticity_kernel(residual[None], dtype=dtype)
+        
+        return MultiSpaceResult(rg, bg, residual_x, residual_y)
+    
+    @staticmethod
+    def from_colors(colors, counts, dtype=np.float32):
+        """
+        从去重后的颜色计算，只转换不同的颜色，并携带每种颜色的像素数
+        
+        Args:
+            colors: 颜色数组 (K, 3)
+            counts: 每种颜色的像素数 (K,)
+            dtype: 输出数据类型
+        
+        Returns:
+            MultiSpaceResult: 带权重的转换结果
+        """
+        result = MultiSpaceResult.from_pixels(colors[None], dtype=dtype)
+        
+        # 与转换内核使用相同的有效性条件，使权重与坐标一一对应
+        g_valid = colors[:, 1] > 0
+        residual = colors[~g_valid]
+        if np.issubdtype(colors.dtype, np.unsignedinteger):
+            residual_valid = residual.any(axis=-1)
+        else:
+            residual_valid = residual.sum(axis=-1, dtype=dtype) > 0
+        
+        result.weights = counts[g_valid]
+        result.residual_weights = counts[~g_valid][residual_valid]
+        result._weights['rg_bg'] = result.weights
+        return result
+    
+    @staticmethod
+    def from_reference(rgb_array):
+        """
+        使用原始实现计算所有颜色空间（结果与旧版本完全一致）
+        
+        Args:
+            rgb_array: RGB数组
+        
+        Returns:
+            MultiSpaceResult: 转换结果
+        """
+        # 延迟导入，避免与image_processor循环引用
+        from modules.image_processor import ImageProcessor
+        
+        # 与转换内核一样去掉不是有限值的坐标（原实现交给matplotlib跳过）
+        x_data, y_data, valid_mask = ImageProcessor.convert_to_normalized_rg(rgb_array)
+        valid_mask &= np.isfinite(x_data) & np.isfinite(y_data)
+        rg, bg = x_data[valid_mask], y_data[valid_mask]
+        
+        x_data, y_data, valid_mask = ImageProcessor.convert_to_chromaticity(rgb_array)
+        valid_mask &= np.isfinite(x_data) & np.isfinite(y_data)
+        chromaticity = (x_data[valid_mask], y_data[valid_mask])
+        
+        empty = np.empty(0, dtype=rg.dtype)
+        return MultiSpaceResult(rg, bg, empty, empty, spaces={'chromaticity': chromaticity})
+    
+    @staticmethod
+    def from_arrays(arrays):
+        """
+        从保存的数组恢复结果
+        
+        Args:
+            arrays: {数组名称: 数组}，名称见ARRAY_NAMES和WEIGHT_NAMES（权重可选）
+        
+        Returns:
+            MultiSpaceResult: 转换结果
+        """
+        return MultiSpaceResult(
+            *(arrays[name] for name in MultiSpaceResult.ARRAY_NAMES),
+            weights=arrays.get('weights'),
+            residual_weights=arrays.get('residual_weights')
+        )
+    
+    def to_arrays(self):
+        """
+        导出需要保存的数组
+        
+        Returns:
+            dict: {数组名称: 数组}
+        """
+        arrays = {name: getattr(self, name) for name in self.ARRAY_NAMES}
+        if self.weights is not None:
+            for name in self.WEIGHT_NAMES:
+                arrays[name] = getattr(self, name)
+        return arrays
+    
+    def get(self, color_space):
+        """
+        获取指定颜色空间的坐标（首次访问时派生并缓存）
+        
+        Args:
+            color_space: 颜色空间类型 ('rg_bg' 或 'chromaticity')
+        
+        Returns:
+            tuple: (x数组, y数组)
+        """
+        coords = self._spaces.get(color_space)
+        if coords is None:
+            if color_space != 'chromaticity':
+                raise ValueError(f"Unsupported color space: {color_space}")
+            coords = self._derive_chromaticity()
+            self._spaces[color_space] = coords
+        return coords
+    
+    def get_weights(self, color_space):
+        """
+        获取指定颜色空间坐标对应的权重
+        
+        Args:
+            color_space: 颜色空间类型
+        
+        Returns:
+            numpy.ndarray: 每个坐标代表的像素数，未去重时返回None
+        """
+        if self.weights is None:
+            return None
+        if color_space not in self._weights:
+            self._weights[color_space] = np.concatenate([self.weights, self.residual_weights])
+        return self._weights[color_space]
+    
+    def get_points(self, color_space):
+        """
+        获取指定颜色空间合并重复坐标后的绘图点集（首次访问时计算并缓存）
+        
+        Args:
+            color_space: 颜色空间类型
+        
+        Returns:
+            PointSet: 绘图点集
+        """
+        points = self._points.get(color_space)
+        if points is None:
+            x_data, y_data = self.get(color_space)
+            points = PointSet.from_coordinates(x_data, y_data, self.get_weights(color_space))
+            self._points[color_space] = points
+        return points
+    
+    def get_index(self, color_space):
+        """
+        获取指定颜色空间绘图点集的网格空间索引（首次访问时建立并缓存）
+        
+        Args:
+            color_space: 颜色空间类型
+        
+        Returns:
+            GridIndex: 空间索引
+        """
+        index = self._indexes.get(color_space)
+        if index is None:
+            index = GridIndex.from_points(self.get_points(color_space))
+            self._indexes[color_space] = index
+        return index
+    
+    def get_summary(self, color_space):
+        """
+        获取指定颜色空间坐标的分位数摘要（首次访问时计算并缓存）
+        
+        Args:
+            color_space: 颜色空间类型
+        
+        Returns:
+            DataSummary: 数据摘要
+        """
+        summary = self._summaries.get(color_space)
+        if summary is None:
+            summary = DataSummary.from_points(self.get_points(color_space))
+            self._summaries[color_space] = summary
+        return summary
+    
+    def is_prepared(self, color_space):
+        """指定颜色空间的绘图点集、空间索引和数据摘要是否都已计算"""
+        return color_space in self._indexes and color_space in self._summaries
+    
+    def prepare_points(self, color_space):
+        """
+        预先计算指定颜色空间的绘图点集、空间索引和数据摘要（在后台线程中调用，显示时无需等待）
+        
+        其他颜色空间在第一次切换时再派生，处理任务只负担当前显示的颜色空间。
+        
+        Args:
+            color_space: 颜色空间类型
+        """
+        self.get_index(color_space)
+        self.get_summary(color_space)
+    
+    def _derive_chromaticity(self):
+        """由 r/g, b/g 推导色度坐标"""
+        dtype = self.rg.dtype
+        count = len(self.rg)
+        residual_count = len(self.residual_x)
+        
+        x_data = np.empty(count + residual_count, dtype=dtype)
+        y_data = np.empty(count + residual_count, dtype=dtype)
+        
+        # y = 1 / (rg + 1 + bg)，x = rg * y
+        denominator = y_data[:count]
+        np.add(self.rg, self.bg, out=denominator)
+        denominator += 1
+        np.reciprocal(denominator, out=denominator)
+        np.multiply(self.rg, denominator, out=x_data[:count])
+        
+        x_data[count:] = self.residual_x
+        y_data[count:] = self.residual_y
+        return x_data, y_data
+    
+    def to_image_data(self, color_space):
+        """
+        生成指定颜色空间的绘图数据
+        
+        Args:
+            color_space: 颜色空间类型
+        
+        Returns:
+            dict: 包含x_data、y_data、weights、绘图点集及其空间索引、数据摘要、坐标轴标签和点数（点数为实际像素数）
+        """
+        x_data, y_data = self.get(color_space)
+        points = self.get_points(color_space)
+        x_label, y_label = COLOR_SPACE_LABELS[color_space]
+        return {
+            'x_data': x_data,
+            'y_data': y_data,
+            'weights': self.get_weights(color_space),
+            'points': points,
+            'point_index': self.get_index(color_space),
+            'summary': self.get_summary(color_space),
+            'x_label': x_label,
+            'y_label': y_label,
+            'point_count': points.total
+        }
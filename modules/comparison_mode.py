@@ -8,14 +8,23 @@ from tkinter import ttk, filedialog, messagebox
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
-import numpy as np
 from PIL import Image, ImageTk
 import os
 from datetime import datetime
 
-from modules.image_processor import ImageProcessor
+from modules.image_session import ImageSession, process_in_worker
 from modules.language_manager import language_manager
 from modules.color_picker import pick_color
+from modules.job_manager import JobRunner, process_pool
+from modules.shared_results import receive_result, release_result
+from modules.color_kernels import DEFAULT_16BIT_COLOR_BITS
+from modules.density import RENDER_MODES, DENSITY_SCALES, get_grid_shape
+from modules.sampling import SAMPLING_MODES, SAMPLING_PATTERNS, SAMPLING_VALUE_LABELS, DEFAULT_SAMPLING_VALUES
+from modules.plot_artists import DatasetArtist
+from modules.spatial_index import DEFAULT_VIEW_BUDGET
+from modules.render_scheduler import RenderScheduler
+from modules.plot_navigator import PlotNavigator
+from modules.data_summary import DataSummary
 
 
 class ComparisonMode(ttk.Frame):
@@ -51,6 +60,12 @@ class ComparisonMode(ttk.Frame):
         self.image_data_list = []
         self.current_color_index = 0
         
+        # 正在添加的图片已显示部分结果时的列表项（按任务键）
+        self.pending_entries = {}
+        
+        # 各数据集的绘图对象（原地更新，不再清空坐标轴重绘）
+        self.dataset_artists = []
+        
         # 坐标轴范围
         self.x_min = 0
         self.x_max = 5
@@ -60,6 +75,10 @@ class ComparisonMode(ttk.Frame):
         # 默认点大小
         self.point_size = 1.0
         
+        # 后台任务调度器
+        self.job_runner = JobRunner(self)
+        self.job_counter = 0
+        
         # 注册语言变化观察者
         language_manager.register_observer(self.update_language)
         
@@ -150,6 +169,85 @@ class ComparisonMode(ttk.Frame):
         )
         self.save_plot_btn.pack(side="left", padx=2)
         
+        # 第二行：处理选项
+        row2_frame = ttk.Frame(self.control_frame)
+        row2_frame.grid(row=1, column=0, sticky="ew", padx=2, pady=2)
+        
+        # 颜色去重：切换后重新处理所有图片
+        self.reduce_colors_var = tk.BooleanVar(value=False)
+        self.reduce_colors_check = ttk.Checkbutton(
+            row2_frame,
+            text=language_manager.get('reduce_colors'),
+            variable=self.reduce_colors_var,
+            command=self.reprocess_all_images
+        )
+        self.reduce_colors_check.pack(side="left", padx=2)
+        
+        # 16位图像去重时每通道保留的位数
+        self.color_bits_label = ttk.Label(row2_frame, text=language_manager.get('color_bits'))
+        self.color_bits_label.pack(side="left", padx=2)
+        self.color_bits_var = tk.StringVar(value=str(DEFAULT_16BIT_COLOR_BITS))
+        self.color_bits_entry = ttk.Entry(row2_frame, textvariable=self.color_bits_var, width=entry_width)
+        self.color_bits_entry.pack(side="left", padx=2)
+        
+        ttk.Separator(row2_frame, orient="vertical").pack(side="left", fill="y", padx=5)
+        
+        # 采样方式：固定降采样率、目标点数或时间预算；取样图案可选规则步长、分层随机或区域平均
+        self.sampling_mode_label = ttk.Label(row2_frame, text=language_manager.get('sampling_mode'))
+        self.sampling_mode_label.pack(side="left", padx=2)
+        self.sampling_mode_var = tk.StringVar(value="rate")
+        self.sampling_mode_combo = ttk.Combobox(
+            row2_frame,
+            textvariable=self.sampling_mode_var,
+            values=list(SAMPLING_MODES),
+            state="readonly",
+            width=entry_width + 2
+        )
+        self.sampling_mode_combo.pack(side="left", padx=2)
+        self.sampling_mode_combo.bind('<<ComboboxSelected>>', self.on_sampling_mode_change)
+        
+        self.sampling_pattern_label = ttk.Label(row2_frame, text=language_manager.get('sampling_pattern'))
+        self.sampling_pattern_label.pack(side="left", padx=2)
+        self.sampling_pattern_var = tk.StringVar(value="stride")
+        self.sampling_pattern_combo = ttk.Combobox(
+            row2_frame,
+            textvariable=self.sampling_pattern_var,
+            values=list(SAMPLING_PATTERNS),
+            state="readonly",
+            width=combo_width
+        )
+        self.sampling_pattern_combo.pack(side="left", padx=2)
+        
+        ttk.Separator(row2_frame, orient="vertical").pack(side="left", fill="y", padx=5)
+        
+        # 显示模式：散点图或密度图（每个数据集使用各自颜色的颜色映射）
+        self.render_mode_label = ttk.Label(row2_frame, text=language_manager.get('render_mode'))
+        self.render_mode_label.pack(side="left", padx=2)
+        self.render_mode_var = tk.StringVar(value="scatter")
+        self.render_mode_combo = ttk.Combobox(
+            row2_frame,
+            textvariable=self.render_mode_var,
+            values=list(RENDER_MODES),
+            state="readonly",
+            width=combo_width
+        )
+        self.render_mode_combo.pack(side="left", padx=2)
+        self.render_mode_combo.bind('<<ComboboxSelected>>', lambda event: self.update_plot())
+        
+        # 密度缩放方式
+        self.density_scale_label = ttk.Label(row2_frame, text=language_manager.get('density_scale'))
+        self.density_scale_label.pack(side="left", padx=2)
+        self.density_scale_var = tk.StringVar(value="log")
+        self.density_scale_combo = ttk.Combobox(
+            row2_frame,
+            textvariable=self.density_scale_var,
+            values=list(DENSITY_SCALES),
+            state="readonly",
+            width=entry_width
+        )
+        self.density_scale_combo.pack(side="left", padx=2)
+        self.density_scale_combo.bind('<<ComboboxSelected>>', lambda event: self.update_plot())
+        
     def create_main_display(self):
         """创建主显示区域"""
         main_frame = ttk.Frame(self)
@@ -171,8 +269,16 @@ class ComparisonMode(ttk.Frame):
         list_frame = ttk.LabelFrame(parent, text=language_manager.get('image_list'))
         list_frame.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
         
+        # 处理进度（仅在后台处理时显示）
+        self.progress_frame = ttk.Frame(list_frame)
+        self.progress_label = ttk.Label(self.progress_frame, text=language_manager.get('processing'))
+        self.progress_label.pack(side="top", anchor="w")
+        self.progress_bar = ttk.Progressbar(self.progress_frame, mode="determinate", maximum=100)
+        self.progress_bar.pack(side="top", fill="x")
+        
         # 创建滚动区域
         scroll_canvas = tk.Canvas(list_frame)
+        self.list_canvas = scroll_canvas
         scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=scroll_canvas.yview)
         self.scrollable_frame = ttk.Frame(scroll_canvas)
         
@@ -224,6 +330,12 @@ class ComparisonMode(ttk.Frame):
         self.canvas = FigureCanvasTkAgg(self.figure, plot_frame)
         self.canvas.get_tk_widget().pack(expand=True, fill="both")
         
+        # 绘制调度器：合并多次修改，每轮事件循环最多绘制一次
+        self.render_scheduler = RenderScheduler(self, self.canvas, self.render_plot)
+        
+        # 滚轮缩放和拖动平移（交互中只blit缓存的快照）
+        self.navigator = PlotNavigator(self, self.canvas, self.ax, self.set_axis_range)
+        
     def create_axis_control_panel(self):
         """创建坐标轴控制面板"""
         self.axis_frame = ttk.LabelFrame(self, text=language_manager.get('axis_control'))
@@ -293,18 +405,23 @@ class ComparisonMode(ttk.Frame):
         )
         self.auto_btn.pack(side="left", padx=2)
         
+        # 自动范围时两端裁剪的百分比（0表示使用最小值和最大值）
+        self.clip_percent_label = ttk.Label(row2_frame, text=language_manager.get('clip_percent'))
+        self.clip_percent_label.pack(side="left", padx=2)
+        self.clip_percent_var = tk.StringVar(value="0")
+        clip_percent_entry = ttk.Entry(row2_frame, textvariable=self.clip_percent_var, width=axis_entry_width)
+        clip_percent_entry.pack(side="left", padx=2)
+        
     def add_image(self):
         """添加新图片"""
-        # 验证降采样率
-        try:
-            sample_rate = int(self.sample_rate_var.get())
-            if sample_rate < 1 or sample_rate > 1000:
-                raise ValueError()
-        except ValueError:
-            messagebox.showerror(
-                language_manager.get('error'),
-                language_manager.get('invalid_sample_rate')
-            )
+        # 验证采样设置
+        settings = self.get_sampling_settings()
+        if settings is None:
+            return
+        sample_rate, sampling = settings
+        
+        options = self.get_processing_options()
+        if options is None:
             return
         
         # 选择图片文件
@@ -318,37 +435,191 @@ class ComparisonMode(ttk.Frame):
         )
         
         if file_path:
-            try:
-                # 处理图片
-                color_space = self.color_space_var.get()
-                image_data = ImageProcessor.process_image(file_path, color_space, sample_rate)
-                
-                # 分配颜色
-                color = self.COLORS[self.current_color_index % len(self.COLORS)]
-                self.current_color_index += 1
-                
-                # 添加到数据列表
-                image_data['color'] = color
-                image_data['path'] = file_path
-                image_data['sample_rate'] = sample_rate  # 添加降采样率信息
-                self.image_data_list.append(image_data)
-                
-                # 添加到界面列表
-                self.add_image_item(image_data)
-                
-                # 更新图表
-                self.update_plot()
-                
-                # 启用保存按钮
-                if len(self.image_data_list) > 0:
-                    self.save_plot_btn.config(state="normal")
-                    
-            except Exception as e:
-                messagebox.showerror(
-                    language_manager.get('error'),
-                    language_manager.get('process_image_error', error=str(e))
-                )
-                
+            # 在后台处理图片
+            color_space = self.color_space_var.get()
+            self.job_counter += 1
+            key = f'add:{self.job_counter}'
+            self.job_runner.submit(
+                key,
+                ImageSession.open_and_process,
+                file_path,
+                color_space,
+                sample_rate,
+                on_success=lambda image_data: self.on_add_image_done(image_data, file_path, sample_rate, key),
+                on_error=lambda e: self.on_add_image_error(key, e),
+                on_progress=self.on_job_progress,
+                on_partial=lambda image_data: self.on_add_image_partial(image_data, file_path, sample_rate, key),
+                sampling=sampling,
+                **options
+            )
+            self.update_busy_state()
+            
+    def on_sampling_mode_change(self, event=None):
+        """切换采样方式：更新数值输入框的标签并填入该方式的默认值"""
+        mode = self.sampling_mode_var.get()
+        self.sample_rate_label.config(text=language_manager.get(SAMPLING_VALUE_LABELS[mode]))
+        self.sample_rate_var.set(DEFAULT_SAMPLING_VALUES[mode])
+        
+    def get_sampling_settings(self):
+        """
+        获取采样设置
+        
+        Returns:
+            tuple: (降采样率, 采样方式)；按降采样率规则取样时采样方式为None，按点数或时间预算时降采样率为None
+                   （由处理时按图像尺寸确定）；输入无效时返回None
+        """
+        mode = self.sampling_mode_var.get()
+        pattern = self.sampling_pattern_var.get()
+        try:
+            if mode == 'rate':
+                sample_rate = int(self.sample_rate_var.get())
+                if sample_rate < 1 or sample_rate > 1000:
+                    raise ValueError()
+                if pattern == 'stride':
+                    return sample_rate, None
+                return sample_rate, {'mode': mode, 'pattern': pattern}
+            
+            value = float(self.sample_rate_var.get())
+            if value <= 0:
+                raise ValueError()
+        except ValueError:
+            messagebox.showerror(
+                language_manager.get('error'),
+                language_manager.get('invalid_sample_rate' if mode == 'rate' else 'invalid_sampling_value')
+            )
+            return None
+        
+        return None, {'mode': mode, 'value': value, 'pattern': pattern}
+        
+    def get_processing_options(self):
+        """
+        获取处理选项
+        
+        Returns:
+            dict: 传给处理函数的关键字参数，输入无效时返回None
+        """
+        try:
+            color_bits = int(self.color_bits_var.get())
+            if color_bits < 1 or color_bits > 16:
+                raise ValueError()
+        except ValueError:
+            messagebox.showerror(
+                language_manager.get('error'),
+                language_manager.get('invalid_color_bits')
+            )
+            return None
+        
+        return {
+            'reduce_colors': self.reduce_colors_var.get(),
+            'color_bits': color_bits
+        }
+        
+    def on_add_image_partial(self, image_data, file_path, sample_rate, key):
+        """
+        后台添加图片的部分结果回调（渐进细化或逐条带处理时调用）
+        
+        第一次收到部分结果时就把图片加入列表，之后原地更新该列表项和绘图对象。
+        """
+        entry = self.pending_entries.get(key)
+        if entry is None:
+            image_data['job_key'] = key
+            self.on_add_image_done(image_data, file_path, sample_rate)
+            self.pending_entries[key] = image_data
+            return
+        
+        self.update_entry(entry, image_data, sample_rate)
+        
+    def on_add_image_error(self, key, error):
+        """后台添加图片失败回调（移除已显示部分结果的列表项）"""
+        entry = self.pending_entries.pop(key, None)
+        if entry is not None:
+            self.remove_image(entry, entry['item_frame'])
+        self.on_job_error(error)
+        
+    def update_entry(self, entry, image_data, sample_rate=None):
+        """
+        用新的结果原地更新列表中的图片（保留颜色、路径和绘图对象）
+        
+        Args:
+            entry: 列表中的图片数据
+            image_data: 新的处理结果
+            sample_rate: 降采样率，为None时按结果中的取样步长
+        """
+        previous_shared = entry.pop('shared_result', None)
+        entry.update(image_data)
+        entry.update(image_data['spaces'].to_image_data(self.color_space_var.get()))
+        if sample_rate is None:
+            sample_rate = image_data['sampling']['stride'] * image_data['sampling']['decode_scale']
+        entry['sample_rate'] = sample_rate
+        if 'partial' not in image_data:
+            entry.pop('partial', None)
+        if 'info_label' in entry:
+            entry['info_label'].config(text=self.format_item_info(entry))
+        self.update_plot()
+        
+        # 新的图表绘制后释放旧结果的共享内存
+        release_result(previous_shared, entry)
+        
+    def on_add_image_done(self, image_data, file_path, sample_rate, key=None):
+        """后台添加图片完成回调"""
+        self.update_busy_state()
+        
+        # 已显示部分结果的图片原地更新为最终结果
+        entry = self.pending_entries.pop(key, None)
+        if entry is not None:
+            entry.pop('job_key', None)
+            self.update_entry(entry, image_data, sample_rate)
+            return
+        
+        # 处理期间颜色空间可能已被切换，按当前选择显示
+        image_data.update(image_data['spaces'].to_image_data(self.color_space_var.get()))
+        
+        # 分配颜色
+        color = self.COLORS[self.current_color_index % len(self.COLORS)]
+        self.current_color_index += 1
+        
+        # 添加到数据列表
+        image_data['color'] = color
+        image_data['path'] = file_path
+        # 添加降采样率信息（按点数或时间预算采样时为实际使用的步长）
+        if sample_rate is None:
+            sample_rate = image_data['sampling']['stride'] * image_data['sampling']['decode_scale']
+        image_data['sample_rate'] = sample_rate
+        self.image_data_list.append(image_data)
+        
+        # 添加到界面列表
+        self.add_image_item(image_data)
+        
+        # 更新图表
+        self.update_plot()
+        
+        # 启用保存按钮
+        if len(self.image_data_list) > 0:
+            self.save_plot_btn.config(state="normal")
+            
+    def on_job_error(self, error):
+        """后台处理失败回调"""
+        self.update_busy_state()
+        messagebox.showerror(
+            language_manager.get('error'),
+            language_manager.get('process_image_error', error=str(error))
+        )
+        
+    def on_job_progress(self, stage, fraction):
+        """后台处理进度回调"""
+        self.progress_bar['value'] = fraction * 100
+        
+    def update_busy_state(self):
+        """根据未完成的后台任务数显示或隐藏处理中状态"""
+        count = len(self.job_runner.active_jobs)
+        if count > 0:
+            self.progress_label.config(text=language_manager.get('processing_count', count=count))
+            if not self.progress_frame.winfo_ismapped():
+                self.progress_bar['value'] = 0
+                self.progress_frame.pack(side="top", fill="x", padx=5, pady=2, before=self.list_canvas)
+        else:
+            self.progress_frame.pack_forget()
+            
     def add_image_item(self, image_data):
         """添加图片项到列表"""
         item_frame = ttk.Frame(self.image_items_frame)
@@ -406,12 +677,10 @@ class ComparisonMode(ttk.Frame):
             thumbnail_label.image = photo  # 保持引用
             thumbnail_label.pack(side="left", padx=2)
         
-        # 文件信息
-        file_info = image_data['file_info']
-        sample_rate = image_data.get('sample_rate', 'N/A')  # 获取降采样率
-        info_text = f"{file_info['filename']}\n{file_info['file_size']} | {file_info['width']}x{file_info['height']}\n{language_manager.get('downsample')}: 1/{sample_rate}"
-        info_label = ttk.Label(item_frame, text=info_text)
+        # 文件信息（保存引用，部分结果细化后原地更新）
+        info_label = ttk.Label(item_frame, text=self.format_item_info(image_data))
         info_label.pack(side="left", padx=5, expand=True, fill="x")
+        image_data['info_label'] = info_label
         
         # 移除按钮
         remove_btn = ttk.Button(
@@ -424,8 +693,40 @@ class ComparisonMode(ttk.Frame):
         # 保存框架引用
         image_data['item_frame'] = item_frame
         
+    def format_item_info(self, image_data):
+        """
+        生成列表项的文件信息文本
+        
+        Args:
+            image_data: 图片数据
+        
+        Returns:
+            str: 文件名、大小、尺寸和取样方式
+        """
+        file_info = image_data['file_info']
+        sample_rate = image_data.get('sample_rate', 'N/A')  # 获取降采样率
+        info_text = f"{file_info['filename']}\n{file_info['file_size']} | {file_info['width']}x{file_info['height']}\n"
+        sampling = image_data.get('sampling')
+        if sampling and sampling['method'] == 'stratified':
+            # 分层随机取样没有固定的降采样率
+            info_text += language_manager.get('sampling_stratified', **sampling)
+        else:
+            info_text += f"{language_manager.get('downsample')}: 1/{sample_rate}"
+            if sampling:
+                info_text += f" ({language_manager.get('sampling_' + sampling['method'], **sampling)})"
+        if image_data.get('partial'):
+            info_text += f" · {language_manager.get('refining')}"
+        return info_text
+        
     def remove_image(self, image_data, item_frame):
         """移除图片"""
+        # 取消该图片未完成的添加或重新处理
+        self.job_runner.cancel(f'reprocess:{id(image_data)}')
+        if 'job_key' in image_data:
+            self.job_runner.cancel(image_data['job_key'])
+            self.pending_entries.pop(image_data['job_key'], None)
+        self.update_busy_state()
+        
         # 从列表中移除
         self.image_data_list.remove(image_data)
         
@@ -434,6 +735,7 @@ class ComparisonMode(ttk.Frame):
         
         # 更新图表
         self.update_plot()
+        release_result(image_data.get('shared_result'))
         
         # 如果没有图片了，禁用保存按钮
         if len(self.image_data_list) == 0:
@@ -450,8 +752,14 @@ class ComparisonMode(ttk.Frame):
         )
         
         if result:
+            # 取消所有未完成的后台任务
+            self.job_runner.cancel_all()
+            self.update_busy_state()
+            
             # 清空数据列表
+            shared_results = [entry.get('shared_result') for entry in self.image_data_list]
             self.image_data_list.clear()
+            self.pending_entries.clear()
             self.current_color_index = 0
             
             # 清空界面列表
@@ -459,19 +767,44 @@ class ComparisonMode(ttk.Frame):
                 widget.destroy()
             
             # 清空图表
-            self.ax.clear()
-            self.ax.set_xlabel('x')
-            self.ax.set_ylabel('y')
-            self.ax.grid(True, alpha=0.3)
-            self.canvas.draw()
+            self.update_plot()
+            for shared in shared_results:
+                release_result(shared)
             
             # 禁用保存按钮
             self.save_plot_btn.config(state="disabled")
             
     def update_plot(self):
-        """更新统计图"""
-        # 清除旧图
-        self.ax.clear()
+        """更新统计图（合并到下一次绘制中执行）"""
+        self.render_scheduler.invalidate(RenderScheduler.DATA, RenderScheduler.LABELS)
+        
+        # 应用坐标轴范围
+        self.apply_axis_range()
+        
+    def render_plot(self, flags):
+        """
+        应用本轮事件循环中标记的全部修改（由绘制调度器在空闲时调用）
+        
+        Args:
+            flags: 脏标志集合
+        """
+        if RenderScheduler.DATA in flags or RenderScheduler.STYLE in flags:
+            self.update_dataset_artists()
+        
+        if RenderScheduler.LABELS in flags:
+            self.update_labels()
+        
+        if RenderScheduler.LIMITS in flags:
+            self.ax.set_xlim(self.x_min, self.x_max)
+            self.ax.set_ylim(self.y_min, self.y_max)
+        
+        # 散点只取视图内的点、密度网格与显示范围对应，范围或数据变化后重新计算（未变化时不重复计算）
+        self.refresh_views()
+        
+    def update_dataset_artists(self):
+        """已有数据集的绘图对象原地更新，只为新数据集创建绘图对象"""
+        render_mode = self.render_mode_var.get()
+        density_scale = self.density_scale_var.get()
         
         # 获取用户设置的点大小
         try:
@@ -481,10 +814,19 @@ class ComparisonMode(ttk.Frame):
         except ValueError:
             user_point_size = 1.0
         
-        # 绘制所有数据集
+        # 移除已被删除的数据集的绘图对象
+        current_artists = [image_data.get('artist') for image_data in self.image_data_list]
+        for artist in self.dataset_artists:
+            if artist not in current_artists:
+                artist.remove()
+        
+        # 所有数据集平分每个视图的点数预算
+        budget = DEFAULT_VIEW_BUDGET // max(1, len(self.image_data_list))
+        
+        # 更新所有数据集
+        self.dataset_artists = []
         for image_data in self.image_data_list:
-            x_data = image_data['x_data']
-            y_data = image_data['y_data']
+            points = image_data['points']
             color = image_data['color']
             filename = image_data['file_info']['filename']
             point_count = image_data['point_count']
@@ -503,31 +845,36 @@ class ComparisonMode(ttk.Frame):
                 size = 2 * user_point_size
                 alpha = 0.6
             
-            # 绘制散点图（将十六进制颜色转换为matplotlib可识别的格式）
+            # 更新绘图对象（将十六进制颜色转换为matplotlib可识别的格式）
             plot_color = self.COLOR_NAMES.get(color, color)  # 如果是预定义颜色使用名称，否则使用原始值
-            self.ax.scatter(x_data, y_data, s=size, alpha=alpha, c=plot_color, label=filename)
+            artist = image_data.get('artist')
+            if artist is None:
+                artist = DatasetArtist(self.ax)
+                image_data['artist'] = artist
+            artist.update(
+                points, plot_color, size, alpha, label=filename, mode=render_mode, scale=density_scale,
+                index=image_data.get('point_index'), budget=budget
+            )
+            self.dataset_artists.append(artist)
         
-        # 设置标签和图例
+    def update_labels(self):
+        """更新坐标轴标签和图例"""
         if len(self.image_data_list) > 0:
             x_label = self.image_data_list[0]['x_label']
             y_label = self.image_data_list[0]['y_label']
             self.ax.set_xlabel(x_label)
             self.ax.set_ylabel(y_label)
-            
-            # 添加图例
-            if len(self.image_data_list) > 1:
-                self.ax.legend(loc='best', fontsize='small')
         else:
             self.ax.set_xlabel('x')
             self.ax.set_ylabel('y')
         
-        self.ax.grid(True, alpha=0.3)
-        
-        # 应用坐标轴范围
-        self.apply_axis_range()
-        
-        # 刷新画布
-        self.canvas.draw()
+        # 添加图例（合并后的点颜色带有各自的透明度，图例统一使用不透明的数据集颜色）
+        legend = self.ax.get_legend()
+        if legend is not None:
+            legend.remove()
+        if len(self.dataset_artists) > 1:
+            handles = [artist.legend_handle() for artist in self.dataset_artists]
+            self.ax.legend(handles=handles, loc='best', fontsize='small')
         
     def on_color_space_change(self, event=None):
         """颜色空间变化事件"""
@@ -538,50 +885,114 @@ class ComparisonMode(ttk.Frame):
             self.x_max_var.set("1")
             self.y_max_var.set("1")
         
-        # 如果有图片，重新处理并更新
+        # 直接从已计算的基础比值派生新颜色空间，无需重新处理图片
         if len(self.image_data_list) > 0:
-            result = messagebox.askyesno(
-                language_manager.get('confirm'),
-                "切换颜色空间将重新处理所有图片，是否继续？"
+            color_space = self.color_space_var.get()
+            spaces_list = [image_data['spaces'] for image_data in self.image_data_list]
+            if all(spaces.is_prepared(color_space) for spaces in spaces_list):
+                self.show_color_space()
+                return
+            
+            # 第一次切换到该颜色空间时在后台建立绘图点集和空间索引，全部完成后一起显示
+            def prepare(progress_callback=None):
+                for spaces in spaces_list:
+                    spaces.prepare_points(color_space)
+            
+            self.job_runner.submit(
+                'color_space',
+                prepare,
+                on_success=lambda result: self.on_color_space_prepared(),
+                on_error=self.on_color_space_error
             )
-            if result:
-                self.reprocess_all_images()
+            self.update_busy_state()
+            
+    def on_color_space_prepared(self):
+        """新颜色空间的绘图点集准备完成回调"""
+        self.update_busy_state()
+        self.show_color_space()
+        
+    def on_color_space_error(self, error):
+        """新颜色空间的绘图点集准备失败回调"""
+        self.update_busy_state()
+        messagebox.showerror(language_manager.get('error'), str(error))
+        
+    def show_color_space(self):
+        """按当前选择的颜色空间显示列表中的所有图片"""
+        color_space = self.color_space_var.get()
+        for image_data in self.image_data_list:
+            image_data.update(image_data['spaces'].to_image_data(color_space))
+        self.update_plot()
                 
     def reprocess_all_images(self):
         """重新处理所有图片"""
         color_space = self.color_space_var.get()
         
-        try:
-            sample_rate = int(self.sample_rate_var.get())
-            if sample_rate < 1 or sample_rate > 1000:
-                raise ValueError()
-        except ValueError:
-            messagebox.showerror(
-                language_manager.get('error'),
-                language_manager.get('invalid_sample_rate')
-            )
+        settings = self.get_sampling_settings()
+        if settings is None:
             return
+        sample_rate, sampling = settings
         
+        options = self.get_processing_options()
+        if options is None:
+            return
+        
+        # 在后台重新处理每张图片（同一图片未完成的旧任务会被取消）：多张图片分到工作进程中并行处理，
+        # 每张完成后单独更新；只有一张图片或不使用工作进程时在线程中用内存中的像素处理
+        use_processes = process_pool.enabled and len(self.image_data_list) > 1
         for image_data in self.image_data_list:
-            try:
-                # 重新处理图片
-                file_path = image_data['path']
-                new_data = ImageProcessor.process_image(file_path, color_space, sample_rate)
-                
-                # 更新数据，保留颜色和路径
-                image_data.update(new_data)
-                
-            except Exception as e:
-                messagebox.showerror(
-                    language_manager.get('error'),
-                    f"处理 {os.path.basename(file_path)} 时出错: {str(e)}"
+            key = f'reprocess:{id(image_data)}'
+            on_success = lambda new_data, image_data=image_data: self.on_reprocess_done(image_data, new_data)
+            on_error = lambda e, image_data=image_data: self.on_reprocess_error(image_data, e)
+            if use_processes:
+                # 已解码的像素通过共享内存交给工作进程，任务结束后释放
+                session = image_data['session']
+                pixels = session.share_pixels()
+                self.job_runner.submit_process(
+                    key,
+                    process_in_worker,
+                    image_data['path'],
+                    color_space,
+                    sample_rate,
+                    on_success=on_success,
+                    on_error=on_error,
+                    resources=[pixels] if pixels is not None else (),
+                    sampling=sampling,
+                    pixels=pixels,
+                    file_info=session.file_info,
+                    **options
+                )
+            else:
+                self.job_runner.submit(
+                    key,
+                    image_data['session'].process,
+                    color_space,
+                    sample_rate,
+                    on_success=on_success,
+                    on_error=on_error,
+                    on_progress=self.on_job_progress,
+                    on_partial=lambda new_data, image_data=image_data: self.update_entry(image_data, new_data),
+                    sampling=sampling,
+                    **options
                 )
+        self.update_busy_state()
         
-        # 更新图表
-        self.update_plot()
+    def on_reprocess_done(self, image_data, new_data):
+        """单张图片重新处理完成回调"""
+        self.update_busy_state()
+        
+        # 更新数据，保留颜色和路径
+        self.update_entry(image_data, receive_result(new_data))
+        
+    def on_reprocess_error(self, image_data, error):
+        """单张图片重新处理失败回调"""
+        self.update_busy_state()
+        messagebox.showerror(
+            language_manager.get('error'),
+            f"处理 {os.path.basename(image_data['path'])} 时出错: {str(error)}"
+        )
         
     def apply_axis_range(self):
-        """应用坐标轴范围"""
+        """应用坐标轴范围（合并到下一次绘制中执行）"""
         try:
             x_min = float(self.x_min_var.get())
             x_max = float(self.x_max_var.get())
@@ -595,9 +1006,9 @@ class ComparisonMode(ttk.Frame):
                 )
                 return
                 
-            self.ax.set_xlim(x_min, x_max)
-            self.ax.set_ylim(y_min, y_max)
-            self.canvas.draw()
+            self.x_min, self.x_max = x_min, x_max
+            self.y_min, self.y_max = y_min, y_max
+            self.render_scheduler.invalidate(RenderScheduler.LIMITS)
             
         except ValueError:
             messagebox.showerror(
@@ -605,33 +1016,62 @@ class ComparisonMode(ttk.Frame):
                 language_manager.get('please_enter_valid_number')
             )
             
+    def set_axis_range(self, xlim, ylim):
+        """
+        设置坐标轴范围并同步到输入框（滚轮缩放或拖动平移结束时调用）
+        
+        Args:
+            xlim: x范围 (最小值, 最大值)
+            ylim: y范围 (最小值, 最大值)
+        """
+        self.x_min, self.x_max = xlim
+        self.y_min, self.y_max = ylim
+        self.x_min_var.set(f"{self.x_min:.4g}")
+        self.x_max_var.set(f"{self.x_max:.4g}")
+        self.y_min_var.set(f"{self.y_min:.4g}")
+        self.y_max_var.set(f"{self.y_max:.4g}")
+        self.render_scheduler.invalidate(RenderScheduler.LIMITS)
+        
+    def refresh_views(self):
+        """按当前坐标轴范围和画布大小更新所有数据集的散点或密度图（未变化的数据集不重新计算）"""
+        # 所有数据集使用同一网格尺寸，每个数据集一幅半透明图像
+        shape = get_grid_shape(self.ax)
+        for artist in self.dataset_artists:
+            artist.refresh_view(shape=shape)
+            
     def auto_axis_range(self):
-        """自动设置坐标轴范围"""
+        """自动设置坐标轴范围（合并各数据集处理时计算的摘要，可裁剪两端的离群值）"""
         if len(self.image_data_list) == 0:
             return
         
-        # 合并所有数据
-        all_x_data = []
-        all_y_data = []
-        
-        for image_data in self.image_data_list:
-            all_x_data.extend(image_data['x_data'])
-            all_y_data.extend(image_data['y_data'])
+        clip_percent = self.get_clip_percent()
+        if clip_percent is None:
+            return
         
-        if len(all_x_data) > 0:
-            x_min, x_max = np.min(all_x_data), np.max(all_x_data)
-            y_min, y_max = np.min(all_y_data), np.max(all_y_data)
+        # 只合并各数据集的分位数摘要，范围两侧添加10%的边距
+        summaries = [image_data['summary'] for image_data in self.image_data_list]
+        limits = DataSummary.combined_range(summaries, clip_percent)
+        if limits is not None:
+            self.set_axis_range(limits[:2], limits[2:])
             
-            # 添加10%的边距
-            x_margin = (x_max - x_min) * 0.1
-            y_margin = (y_max - y_min) * 0.1
-            
-            self.x_min_var.set(f"{x_min - x_margin:.2f}")
-            self.x_max_var.set(f"{x_max + x_margin:.2f}")
-            self.y_min_var.set(f"{y_min - y_margin:.2f}")
-            self.y_max_var.set(f"{y_max + y_margin:.2f}")
-            
-            self.apply_axis_range()
+    def get_clip_percent(self):
+        """
+        获取自动范围的裁剪百分比
+        
+        Returns:
+            float: 两端各裁剪的百分比，输入无效时返回None
+        """
+        try:
+            clip_percent = float(self.clip_percent_var.get())
+            if clip_percent < 0 or clip_percent >= 50:
+                raise ValueError()
+        except ValueError:
+            messagebox.showerror(
+                language_manager.get('error'),
+                language_manager.get('invalid_clip_percent')
+            )
+            return None
+        return clip_percent
             
     def save_plot(self):
         """保存图表"""
@@ -702,11 +1142,17 @@ class ComparisonMode(ttk.Frame):
         # 更新控制面板
         self.control_frame.config(text=language_manager.get('control_panel'))
         self.color_space_label.config(text=language_manager.get('color_space'))
-        self.sample_rate_label.config(text=language_manager.get('custom_sample_rate'))
+        self.sample_rate_label.config(text=language_manager.get(SAMPLING_VALUE_LABELS[self.sampling_mode_var.get()]))
+        self.sampling_mode_label.config(text=language_manager.get('sampling_mode'))
+        self.sampling_pattern_label.config(text=language_manager.get('sampling_pattern'))
         self.point_size_label.config(text=language_manager.get('point_size'))
         self.add_image_btn.config(text=language_manager.get('add_image'))
         self.clear_all_btn.config(text=language_manager.get('clear_all'))
         self.save_plot_btn.config(text=language_manager.get('save_plot'))
+        self.reduce_colors_check.config(text=language_manager.get('reduce_colors'))
+        self.color_bits_label.config(text=language_manager.get('color_bits'))
+        self.render_mode_label.config(text=language_manager.get('render_mode'))
+        self.density_scale_label.config(text=language_manager.get('density_scale'))
         
         # 更新坐标轴控制面板
         self.axis_frame.config(text=language_manager.get('axis_control'))
@@ -717,4 +1163,5 @@ class ComparisonMode(ttk.Frame):
         self.y_min_label.config(text=language_manager.get('min_value'))
         self.y_max_label.config(text=language_manager.get('max_value'))
         self.apply_btn.config(text=language_manager.get('apply_range'))
-        self.auto_btn.config(text=language_manager.get('auto_range'))
\ No newline at end of file
+        self.auto_btn.config(text=language_manager.get('auto_range'))
+        self.clip_percent_label.config(text=language_manager.get('clip_percent'))
@@ -0,0 +1,195 @@
+"""
+数据摘要模块
+处理时为每个数据集计算一次坐标的分位数摘要，自动调整坐标轴范围时只合并各数据集的摘要，
+无需再遍历全部坐标；支持按百分位裁剪离群值
+"""
+
+import numpy as np
+
+
+class QuantileSketch:
+    """
+    单个坐标轴的分位数摘要
+    
+    保存一组固定概率处的分位数（首尾即为精确的最小值和最大值）以及总权重。
+    概率在0.1%间隔的基础上，在两端2%内加密到0.001%，裁剪离群值时精度更高。
+    多个摘要按权重混合各自的分布函数即可得到合并后的分位数，开销只与数据集数量有关。
+    """
+    
+    # 保存分位数的概率
+    PROBABILITIES = np.unique(np.concatenate([
+        np.linspace(0.0, 0.02, 2001),
+        np.linspace(0.0, 1.0, 1001),
+        np.linspace(0.98, 1.0, 2001)
+    ]))
+    
+    def __init__(self, levels, total):
+        """
+        初始化摘要（通常通过from_values创建）
+        
+        Args:
+            levels: PROBABILITIES各概率处的分位数数组
+            total: 总权重（像素数）
+        """
+        self.levels = levels
+        self.total = total
+    
+    @property
+    def min(self):
+        """最小值"""
+        return float(self.levels[0])
+    
+    @property
+    def max(self):
+        """最大值"""
+        return float(self.levels[-1])
+    
+    @staticmethod
+    def from_values(values, weights=None):
+        """
+        从坐标数组计算摘要
+        
+        Args:
+            values: 坐标数组
+            weights: 每个坐标代表的像素数，为None表示每个坐标对应一个像素
+        
+        Returns:
+            QuantileSketch: 分位数摘要，数组为空时返回None
+        """
+        if len(values) == 0:
+            return None
+        
+        probabilities = QuantileSketch.PROBABILITIES
+        if weights is None:
+            sorted_values = np.sort(values)
+            positions = probabilities * (len(values) - 1)
+            levels = np.interp(positions, np.arange(len(values)), sorted_values)
+            return QuantileSketch(levels, len(values))
+        
+        # 带权重时取累计权重首次达到该比例的坐标（一个坐标代表多个像素，不在坐标之间插值）
+        order = np.argsort(values)
+        sorted_values = values[order]
+        cumulative = np.cumsum(weights[order], dtype=np.float64)
+        del order
+        total = cumulative[-1]
+        positions = np.searchsorted(cumulative, probabilities * total, side='left')
+        np.minimum(positions, len(values) - 1, out=positions)
+        levels = sorted_values[positions].astype(np.float64)
+        levels[0] = sorted_values[0]
+        return QuantileSketch(levels, float(total))
+    
+    def quantile(self, q):
+        """
+        获取分位数
+        
+        Args:
+            q: 概率（0到1）
+        
+        Returns:
+            float: 分位数
+        """
+        return QuantileSketch.combined_quantile([self], q)
+    
+    @staticmethod
+    def combined_quantile(sketches, q):
+        """
+        计算多个摘要合并后的分位数
+        
+        Args:
+            sketches: 摘要列表（None会被忽略）
+            q: 概率（0到1）
+        
+        Returns:
+            float: 合并后的分位数，没有有效摘要时返回None
+        """
+        sketches = [sketch for sketch in sketches if sketch is not None]
+        if not sketches:
+            return None
+        if q <= 0:
+            return min(sketch.min for sketch in sketches)
+        if q >= 1:
+            return max(sketch.max for sketch in sketches)
+        
+        # 在所有分位点中二分查找首个使按权重混合的分布函数达到该概率的值
+        candidates = np.unique(np.concatenate([sketch.levels for sketch in sketches]))
+        target = q * sum(sketch.total for sketch in sketches)
+        low, high = 0, len(candidates) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if QuantileSketch._weighted_cdf(sketches, candidates[middle]) >= target:
+                high = middle
+            else:
+                low = middle + 1
+        return float(candidates[low])
+    
+    @staticmethod
+    def _weighted_cdf(sketches, value):
+        """各摘要中不大于value的权重之和"""
+        weight = 0.0
+        for sketch in sketches:
+            below = int(np.searchsorted(sketch.levels, value, side='right')) - 1
+            if below >= 0:
+                weight += sketch.total * QuantileSketch.PROBABILITIES[below]
+        return weight
+
+
+class DataSummary:
+    """
+    数据集两个坐标轴的摘要
+    """
+    
+    def __init__(self, x, y):
+        """
+        初始化摘要
+        
+        Args:
+            x: x坐标的分位数摘要（可为None）
+            y: y坐标的分位数摘要（可为None）
+        """
+        self.x = x
+        self.y = y
+    
+    @staticmethod
+    def from_points(points):
+        """
+        从绘图点集计算摘要（带计数的点集按像素数加权）
+        
+        Args:
+            points: 绘图点集（PointSet）
+        
+        Returns:
+            DataSummary: 数据摘要
+        """
+        return DataSummary(
+            QuantileSketch.from_values(points.x, points.counts),
+            QuantileSketch.from_values(points.y, points.counts)
+        )
+    
+    @staticmethod
+    def combined_range(summaries, clip_percent=0.0, margin=0.1):
+        """
+        计算多个数据集合并后的坐标轴范围
+        
+        Args:
+            summaries: 数据摘要列表
+            clip_percent: 两端各裁剪的百分比（例如0.5表示取0.5%到99.5%分位数），0表示取最小值和最大值
+            margin: 在范围两侧添加的边距（占范围的比例）
+        
+        Returns:
+            tuple: (x_min, x_max, y_min, y_max)，没有数据时返回None
+        """
+        low = clip_percent / 100.0
+        high = 1.0 - low
+        
+        limits = []
+        for sketches in ([s.x for s in summaries], [s.y for s in summaries]):
+            axis_min = QuantileSketch.combined_quantile(sketches, low)
+            axis_max = QuantileSketch.combined_quantile(sketches, high)
+            if axis_min is None:
+                return None
+            axis_margin = (axis_max - axis_min) * margin
+            if axis_margin <= 0:
+                # 所有坐标相同时按数值大小留出边距，保证最小值小于最大值
+                axis_margin = max(abs(axis_min), 1.0) * margin
+            limits.extend((axis_min - axis_margin, axis_max + axis_margin))
+        return tuple(limits)
@@ -0,0 +1,160 @@
+"""
+密度图模块
+把坐标分箱到与画布像素对应的网格上，以一幅图像代替大量散点，
+重绘开销只与画布大小有关，与数据点数量无关
+"""
+
+import numpy as np
+from matplotlib.colors import LinearSegmentedColormap, LogNorm, Normalize, to_rgb
+
+
+# 支持的显示模式和密度缩放方式
+RENDER_MODES = ('scatter', 'density')
+DENSITY_SCALES = ('linear', 'log')
+
+# 网格尺寸下限（画布尚未布局完成时使用）
+MIN_GRID_SIZE = 64
+
+
+def compute_density_grid(x, y, weights, x_range, y_range, shape):
+    """
+    使用量化索引和bincount计算二维密度网格
+    
+    Args:
+        x: x坐标数组
+        y: y坐标数组
+        weights: 每个坐标代表的像素数，为None表示每个坐标对应一个像素
+        x_range: x范围 (最小值, 最大值)
+        y_range: y范围 (最小值, 最大值)
+        shape: 网格尺寸 (列数, 行数)
+    
+    Returns:
+        numpy.ndarray: 密度网格 (行数, 列数)，第0行对应y最小值
+    """
+    nx, ny = shape
+    x_min, x_max = x_range
+    y_min, y_max = y_range
+    
+    # 量化为浮点网格坐标，在浮点上判断范围以避免负数截断到0
+    fx = np.subtract(x, x_min, dtype=np.float32)
+    fx *= np.float32(nx / (x_max - x_min))
+    fy = np.subtract(y, y_min, dtype=np.float32)
+    fy *= np.float32(ny / (y_max - y_min))
+    inside = (fx >= 0) & (fx < nx) & (fy >= 0) & (fy < ny)
+    
+    index = fy[inside].astype(np.intp)
+    index *= nx
+    index += fx[inside].astype(np.intp)
+    del fx, fy
+    
+    if weights is not None:
+        weights = weights[inside]
+    grid = np.bincount(index, weights=weights, minlength=nx * ny)
+    return grid.reshape(ny, nx)
+
+
+def get_grid_shape(ax):
+    """
+    按坐标轴在画布上的像素大小确定网格尺寸（每个网格对应一个屏幕像素）
+    
+    Args:
+        ax: matplotlib坐标轴
+    
+    Returns:
+        tuple: (列数, 行数)
+    """
+    bbox = ax.get_window_extent()
+    return max(MIN_GRID_SIZE, int(bbox.width)), max(MIN_GRID_SIZE, int(bbox.height))
+
+
+def density_colormap(color):
+    """
+    生成从透明到指定颜色的颜色映射，多个数据集叠加时互不遮挡
+    
+    Args:
+        color: matplotlib可识别的颜色
+    
+    Returns:
+        LinearSegmentedColormap: 颜色映射
+    """
+    rgb = to_rgb(color)
+    cmap = LinearSegmentedColormap.from_list(f'density_{color}', [(*rgb, 0.15), (*rgb, 1.0)])
+    cmap.set_bad(alpha=0.0)
+    return cmap
+
+
+def _density_image_data(ax, points, scale, shape):
+    """
+    计算坐标轴当前范围内的密度图数据
+    
+    Args:
+        ax: matplotlib坐标轴（需已设置显示范围）
+        points: 绘图点集（PointSet）
+        scale: 密度缩放方式 ('linear' 或 'log')
+        shape: 网格尺寸 (列数, 行数)，为None时按坐标轴像素大小确定
+    
+    Returns:
+        tuple: (屏蔽空网格的密度数组, 图像范围, 归一化对象)
+    """
+    x_range = ax.get_xlim()
+    y_range = ax.get_ylim()
+    if shape is None:
+        shape = get_grid_shape(ax)
+    
+    grid = compute_density_grid(points.x, points.y, points.counts, x_range, y_range, shape)
+    
+    # 空网格不着色
+    density = np.ma.masked_less_equal(grid, 0)
+    vmax = max(float(grid.max()), 1.0)
+    if scale == 'log':
+        norm = LogNorm(vmin=1.0, vmax=max(vmax, 10.0))
+    else:
+        norm = Normalize(vmin=0.0, vmax=vmax)
+    
+    extent = (x_range[0], x_range[1], y_range[0], y_range[1])
+    return density, extent, norm
+
+
+def draw_density(ax, points, color, scale='linear', shape=None):
+    """
+    在坐标轴当前范围内绘制点集的密度图
+    
+    Args:
+        ax: matplotlib坐标轴（需已设置显示范围）
+        points: 绘图点集（PointSet）
+        color: 数据集颜色
+        scale: 密度缩放方式 ('linear' 或 'log')
+        shape: 网格尺寸 (列数, 行数)，为None时按坐标轴像素大小确定
+    
+    Returns:
+        AxesImage: 密度图像对象
+    """
+    density, extent, norm = _density_image_data(ax, points, scale, shape)
+    return ax.imshow(
+        density,
+        extent=extent,
+        origin='lower',
+        aspect='auto',
+        interpolation='nearest',
+        cmap=density_colormap(color),
+        norm=norm
+    )
+
+
+def update_density(image, ax, points, color, scale='linear', shape=None):
+    """
+    原地更新已有的密度图（不创建新的图像对象）
+    
+    Args:
+        image: draw_density返回的图像对象
+        ax: matplotlib坐标轴（需已设置显示范围）
+        points: 绘图点集（PointSet）
+        color: 数据集颜色
+        scale: 密度缩放方式 ('linear' 或 'log')
+        shape: 网格尺寸 (列数, 行数)，为None时按坐标轴像素大小确定
+    """
+    density, extent, norm = _density_image_data(ax, points, scale, shape)
+    image.set_data(density)
+    image.set_extent(extent)
+    image.set_norm(norm)
+    image.set_cmap(density_colormap(color))
@@ -8,14 +8,22 @@ from tkinter import ttk, filedialog, messagebox
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
-import numpy as np
 from PIL import Image, ImageTk
 import os
 from datetime import datetime
 
-from modules.image_processor import ImageProcessor
+from modules.image_session import ImageSession, process_in_worker
 from modules.language_manager import language_manager
 from modules.color_picker import pick_color
+from modules.job_manager import JobRunner, process_pool
+from modules.shared_results import receive_result, release_result
+from modules.color_kernels import DEFAULT_16BIT_COLOR_BITS
+from modules.density import RENDER_MODES, DENSITY_SCALES
+from modules.sampling import SAMPLING_MODES, SAMPLING_PATTERNS, SAMPLING_VALUE_LABELS, DEFAULT_SAMPLING_VALUES
+from modules.plot_artists import DatasetArtist
+from modules.render_scheduler import RenderScheduler
+from modules.plot_navigator import PlotNavigator
+from modules.data_summary import DataSummary
 
 
 class ImageBlock(ttk.Frame):
@@ -40,12 +48,21 @@ class ImageBlock(ttk.Frame):
         # 默认点大小
         self.point_size = 1.0
         
+        # 数据集绘图对象（原地更新，不再清空坐标轴重绘）
+        self.dataset_artist = None
+        
+        # 交互缩放平移后的回调 callback(block, xlim, ylim)，用于联动坐标轴
+        self.view_change_callback = None
+        
         # 坐标轴范围
         self.x_min = 0
         self.x_max = 5
         self.y_min = 0
         self.y_max = 5
         
+        # 后台任务调度器
+        self.job_runner = JobRunner(self)
+        
         # 注册语言变化观察者
         language_manager.register_observer(self.update_language)
         
@@ -158,6 +175,85 @@ class ImageBlock(ttk.Frame):
         )
         self.refresh_btn.pack(side="left", padx=2)
         
+        # 第二行：处理选项
+        row2_frame = ttk.Frame(self.control_frame)
+        row2_frame.grid(row=1, column=0, sticky="ew", padx=2, pady=2)
+        
+        # 颜色去重：只转换不同的颜色，适合全分辨率分析
+        self.reduce_colors_var = tk.BooleanVar(value=False)
+        self.reduce_colors_check = ttk.Checkbutton(
+            row2_frame,
+            text=language_manager.get('reduce_colors'),
+            variable=self.reduce_colors_var,
+            command=self.refresh_plot
+        )
+        self.reduce_colors_check.pack(side="left", padx=2)
+        
+        # 16位图像去重时每通道保留的位数
+        self.color_bits_label = ttk.Label(row2_frame, text=language_manager.get('color_bits'))
+        self.color_bits_label.pack(side="left", padx=2)
+        self.color_bits_var = tk.StringVar(value=str(DEFAULT_16BIT_COLOR_BITS))
+        self.color_bits_entry = ttk.Entry(row2_frame, textvariable=self.color_bits_var, width=entry_width)
+        self.color_bits_entry.pack(side="left", padx=2)
+        
+        ttk.Separator(row2_frame, orient="vertical").pack(side="left", fill="y", padx=5)
+        
+        # 采样方式：固定降采样率、目标点数或时间预算；取样图案可选规则步长、分层随机或区域平均
+        self.sampling_mode_label = ttk.Label(row2_frame, text=language_manager.get('sampling_mode'))
+        self.sampling_mode_label.pack(side="left", padx=2)
+        self.sampling_mode_var = tk.StringVar(value="rate")
+        self.sampling_mode_combo = ttk.Combobox(
+            row2_frame,
+            textvariable=self.sampling_mode_var,
+            values=list(SAMPLING_MODES),
+            state="readonly",
+            width=entry_width + 2
+        )
+        self.sampling_mode_combo.pack(side="left", padx=2)
+        self.sampling_mode_combo.bind('<<ComboboxSelected>>', self.on_sampling_mode_change)
+        
+        self.sampling_pattern_label = ttk.Label(row2_frame, text=language_manager.get('sampling_pattern'))
+        self.sampling_pattern_label.pack(side="left", padx=2)
+        self.sampling_pattern_var = tk.StringVar(value="stride")
+        self.sampling_pattern_combo = ttk.Combobox(
+            row2_frame,
+            textvariable=self.sampling_pattern_var,
+            values=list(SAMPLING_PATTERNS),
+            state="readonly",
+            width=combo_width
+        )
+        self.sampling_pattern_combo.pack(side="left", padx=2)
+        
+        ttk.Separator(row2_frame, orient="vertical").pack(side="left", fill="y", padx=5)
+        
+        # 显示模式：散点图或密度图（密度图的重绘开销与点数无关）
+        self.render_mode_label = ttk.Label(row2_frame, text=language_manager.get('render_mode'))
+        self.render_mode_label.pack(side="left", padx=2)
+        self.render_mode_var = tk.StringVar(value="scatter")
+        self.render_mode_combo = ttk.Combobox(
+            row2_frame,
+            textvariable=self.render_mode_var,
+            values=list(RENDER_MODES),
+            state="readonly",
+            width=combo_width
+        )
+        self.render_mode_combo.pack(side="left", padx=2)
+        self.render_mode_combo.bind('<<ComboboxSelected>>', lambda event: self.display_plot())
+        
+        # 密度缩放方式
+        self.density_scale_label = ttk.Label(row2_frame, text=language_manager.get('density_scale'))
+        self.density_scale_label.pack(side="left", padx=2)
+        self.density_scale_var = tk.StringVar(value="log")
+        self.density_scale_combo = ttk.Combobox(
+            row2_frame,
+            textvariable=self.density_scale_var,
+            values=list(DENSITY_SCALES),
+            state="readonly",
+            width=entry_width
+        )
+        self.density_scale_combo.pack(side="left", padx=2)
+        self.density_scale_combo.bind('<<ComboboxSelected>>', lambda event: self.display_plot())
+        
     def create_display_area(self):
         """创建图片和统计图显示区域"""
         display_frame = ttk.Frame(self)
@@ -196,6 +292,25 @@ class ImageBlock(ttk.Frame):
         self.dimensions_label = ttk.Label(self.info_frame, text=language_manager.get('dimensions') + " -")
         self.dimensions_label.grid(row=2, column=0, sticky="w", padx=5, pady=2)
         
+        # 格式标签（位深度、通道数、压缩方式和分块，来自文件头）
+        self.format_label = ttk.Label(self.info_frame, text=language_manager.get('image_format') + " -")
+        self.format_label.grid(row=3, column=0, sticky="w", padx=5, pady=2)
+        
+        # 数据点数标签（实际像素数和不同坐标数）
+        self.point_count_label = ttk.Label(self.info_frame, text=language_manager.get('point_count') + " -")
+        self.point_count_label.grid(row=4, column=0, sticky="w", padx=5, pady=2)
+        
+        # 取样方式标签（按步长取样或JPEG解码缩放）
+        self.sampling_label = ttk.Label(self.info_frame, text=language_manager.get('sampling_method') + " -")
+        self.sampling_label.grid(row=5, column=0, sticky="w", padx=5, pady=2)
+        
+        # 处理进度（仅在后台处理时显示）
+        self.progress_frame = ttk.Frame(self.original_frame)
+        self.progress_label = ttk.Label(self.progress_frame, text=language_manager.get('processing'))
+        self.progress_label.pack(side="top", anchor="w")
+        self.progress_bar = ttk.Progressbar(self.progress_frame, mode="determinate", maximum=100)
+        self.progress_bar.pack(side="top", fill="x")
+        
         # 统计图显示区域
         self.plot_frame = ttk.LabelFrame(display_frame, text=language_manager.get('color_distribution'))
         self.plot_frame.grid(row=0, column=1, sticky="nsew", padx=5, pady=5)
@@ -231,6 +346,12 @@ class ImageBlock(ttk.Frame):
         self.canvas = FigureCanvasTkAgg(self.figure, self.plot_frame)
         self.canvas.get_tk_widget().pack(expand=True, fill="both")
         
+        # 绘制调度器：合并多次修改，每轮事件循环最多绘制一次
+        self.render_scheduler = RenderScheduler(self, self.canvas, self.render_plot)
+        
+        # 滚轮缩放和拖动平移（交互中只blit缓存的快照）
+        self.navigator = PlotNavigator(self, self.canvas, self.ax, self.on_navigate)
+        
     def create_axis_control_panel(self):
         """创建坐标轴控制面板"""
         self.axis_frame = ttk.LabelFrame(self, text=language_manager.get('axis_control'))
@@ -300,6 +421,13 @@ class ImageBlock(ttk.Frame):
         )
         self.reset_btn.pack(side="left", padx=2)
         
+        # 自动范围时两端裁剪的百分比（0表示使用最小值和最大值）
+        self.clip_percent_label = ttk.Label(row2_frame, text=language_manager.get('clip_percent'))
+        self.clip_percent_label.pack(side="left", padx=2)
+        self.clip_percent_var = tk.StringVar(value="0")
+        clip_percent_entry = ttk.Entry(row2_frame, textvariable=self.clip_percent_var, width=axis_entry_width)
+        clip_percent_entry.pack(side="left", padx=2)
+        
         # 保存图表按钮
         self.save_plot_btn = ttk.Button(
             row2_frame,
@@ -314,10 +442,16 @@ class ImageBlock(ttk.Frame):
         # 更新控制面板
         self.control_frame.config(text=f"{language_manager.get('image_block')} {self.block_id} {language_manager.get('control_panel')}")
         self.color_space_label.config(text=language_manager.get('color_space'))
-        self.sample_rate_label.config(text=language_manager.get('custom_sample_rate'))
+        self.sample_rate_label.config(text=language_manager.get(SAMPLING_VALUE_LABELS[self.sampling_mode_var.get()]))
+        self.sampling_mode_label.config(text=language_manager.get('sampling_mode'))
+        self.sampling_pattern_label.config(text=language_manager.get('sampling_pattern'))
         self.point_size_label.config(text=language_manager.get('point_size'))
         self.upload_btn.config(text=language_manager.get('upload_image'))
         self.refresh_btn.config(text=language_manager.get('refresh_plot'))
+        self.reduce_colors_check.config(text=language_manager.get('reduce_colors'))
+        self.color_bits_label.config(text=language_manager.get('color_bits'))
+        self.render_mode_label.config(text=language_manager.get('render_mode'))
+        self.density_scale_label.config(text=language_manager.get('density_scale'))
         
         # 更新显示区域
         self.original_frame.config(text=language_manager.get('original_image'))
@@ -326,14 +460,14 @@ class ImageBlock(ttk.Frame):
         
         # 更新图片信息标签
         if self.image_data and 'file_info' in self.image_data:
-            file_info = self.image_data['file_info']
-            self.filename_label.config(text=f"{language_manager.get('filename')} {file_info['filename']}")
-            self.filesize_label.config(text=f"{language_manager.get('file_size')} {file_info['file_size']}")
-            self.dimensions_label.config(text=f"{language_manager.get('dimensions')} {file_info['width']} x {file_info['height']} {language_manager.get('pixels')}")
+            self.display_image_info()
         else:
             self.filename_label.config(text=language_manager.get('filename') + " -")
             self.filesize_label.config(text=language_manager.get('file_size') + " -")
             self.dimensions_label.config(text=language_manager.get('dimensions') + " -")
+            self.format_label.config(text=language_manager.get('image_format') + " -")
+            self.point_count_label.config(text=language_manager.get('point_count') + " -")
+            self.sampling_label.config(text=language_manager.get('sampling_method') + " -")
         
         # 更新原图标签（如果没有图片）
         if not self.current_image_path:
@@ -349,6 +483,7 @@ class ImageBlock(ttk.Frame):
         self.y_max_label.config(text=language_manager.get('max_value'))
         self.apply_btn.config(text=language_manager.get('apply_range'))
         self.reset_btn.config(text=language_manager.get('auto_range'))
+        self.clip_percent_label.config(text=language_manager.get('clip_percent'))
         self.save_plot_btn.config(text=language_manager.get('save_plot'))
         
         # 刷新图表标题
@@ -364,10 +499,47 @@ class ImageBlock(ttk.Frame):
             self.x_max_var.set("1")
             self.y_max_var.set("1")
         
-        # 如果已有图片，刷新显示
-        if self.current_image_path:
+        # 已有处理结果时直接切换到新颜色空间，无需重新处理
+        if self.image_data and 'spaces' in self.image_data:
+            spaces = self.image_data['spaces']
+            color_space = self.color_space_var.get()
+            if spaces.is_prepared(color_space):
+                self.show_color_space(spaces)
+                return
+            
+            # 第一次切换到该颜色空间时在后台建立绘图点集和空间索引
+            def prepare(progress_callback=None):
+                spaces.prepare_points(color_space)
+                return spaces
+            
+            self.show_busy(True)
+            self.job_runner.submit(
+                'color_space',
+                prepare,
+                on_success=self.on_color_space_prepared,
+                on_error=self.on_process_error
+            )
+        elif self.current_image_path:
             self.refresh_plot()
             
+    def on_color_space_prepared(self, spaces):
+        """新颜色空间的绘图点集准备完成回调"""
+        self.show_busy(False)
+        self.show_color_space(spaces)
+        
+    def show_color_space(self, spaces):
+        """
+        按当前选择的颜色空间显示已有的处理结果
+        
+        Args:
+            spaces: 准备颜色空间时的多空间结果（处理结果已被替换时不再显示）
+        """
+        if not self.image_data or self.image_data.get('spaces') is not spaces:
+            return
+        self.image_data.update(spaces.to_image_data(self.color_space_var.get()))
+        self.display_point_count()
+        self.display_plot()
+            
     def upload_image(self):
         """上传图片"""
         file_path = filedialog.askopenfilename(
@@ -380,53 +552,210 @@ class ImageBlock(ttk.Frame):
         )
         
         if file_path:
-            try:
-                self.current_image_path = file_path
-                self.process_and_display_image()
-                self.refresh_btn.config(state="normal")
-                self.save_plot_btn.config(state="normal")
-            except Exception as e:
-                messagebox.showerror(
-                    language_manager.get('error'), 
-                    language_manager.get('process_image_error', error=str(e))
-                )
+            self.current_image_path = file_path
+            self.process_and_display_image(reload=True)
                 
-    def process_and_display_image(self):
-        """处理并显示图片"""
+    def process_and_display_image(self, reload=False, in_process=False):
+        """
+        在后台处理图片，完成后显示（未完成的旧任务会被取消）
+        
+        Args:
+            reload: 是否重新读取文件；为False时复用已解码的图像会话
+            in_process: 是否在工作进程中处理（多个图像块同时刷新时并行处理，不显示进度和部分结果）
+        """
+        # 获取参数
+        color_space = self.color_space_var.get()
+        
+        # 验证采样设置
+        settings = self.get_sampling_settings()
+        if settings is None:
+            return
+        sample_rate, sampling = settings
+        
+        options = self.get_processing_options()
+        if options is None:
+            return
+        
+        session = self.image_data.get('session') if self.image_data else None
+        if session is not None and not session.matches(self.current_image_path):
+            session = None
+        
+        # 在工作进程中处理：已解码的像素通过共享内存交给工作进程（任务结束后释放），否则工作进程打开文件
+        if in_process and process_pool.enabled:
+            pixels = session.share_pixels() if session is not None and not reload else None
+            self.show_busy(True)
+            self.job_runner.submit_process(
+                'process',
+                process_in_worker,
+                self.current_image_path,
+                color_space,
+                sample_rate,
+                on_success=self.on_process_done,
+                on_error=self.on_process_error,
+                resources=[pixels] if pixels is not None else (),
+                sampling=sampling,
+                pixels=pixels,
+                file_info=session.file_info if pixels is not None else None,
+                **options
+            )
+            return
+        
+        # 已有同一文件的会话时只重新降采样和转换，否则打开文件
+        if not reload and session is not None:
+            task = session.process
+            args = (color_space, sample_rate)
+        else:
+            task = ImageSession.open_and_process
+            args = (self.current_image_path, color_space, sample_rate)
+        
+        # 提交后台任务
+        self.show_busy(True)
+        self.job_runner.submit(
+            'process',
+            task,
+            *args,
+            on_success=self.on_process_done,
+            on_error=self.on_process_error,
+            on_progress=self.on_process_progress,
+            on_partial=self.on_process_partial,
+            sampling=sampling,
+            **options
+        )
+        
+    def on_sampling_mode_change(self, event=None):
+        """切换采样方式：更新数值输入框的标签并填入该方式的默认值"""
+        mode = self.sampling_mode_var.get()
+        self.sample_rate_label.config(text=language_manager.get(SAMPLING_VALUE_LABELS[mode]))
+        self.sample_rate_var.set(DEFAULT_SAMPLING_VALUES[mode])
+        
+    def get_sampling_settings(self):
+        """
+        获取采样设置
+        
+        Returns:
+            tuple: (降采样率, 采样方式)；按降采样率规则取样时采样方式为None，按点数或时间预算时降采样率为None
+                   （由处理时按图像尺寸确定）；输入无效时返回None
+        """
+        mode = self.sampling_mode_var.get()
+        pattern = self.sampling_pattern_var.get()
         try:
-            # 获取参数
-            color_space = self.color_space_var.get()
-            
-            # 验证降采样率
-            try:
+            if mode == 'rate':
                 sample_rate = int(self.sample_rate_var.get())
                 if sample_rate < 1 or sample_rate > 1000:
                     raise ValueError()
-            except ValueError:
-                messagebox.showerror(
-                    language_manager.get('error'),
-                    language_manager.get('invalid_sample_rate')
-                )
-                return
+                if pattern == 'stride':
+                    return sample_rate, None
+                return sample_rate, {'mode': mode, 'pattern': pattern}
             
-            # 处理图片
-            self.image_data = ImageProcessor.process_image(
-                self.current_image_path,
-                color_space,
-                sample_rate
+            value = float(self.sample_rate_var.get())
+            if value <= 0:
+                raise ValueError()
+        except ValueError:
+            messagebox.showerror(
+                language_manager.get('error'),
+                language_manager.get('invalid_sample_rate' if mode == 'rate' else 'invalid_sampling_value')
             )
+            return None
+        
+        return None, {'mode': mode, 'value': value, 'pattern': pattern}
+        
+    def get_processing_options(self):
+        """
+        获取处理选项
+        
+        Returns:
+            dict: 传给处理函数的关键字参数，输入无效时返回None
+        """
+        try:
+            color_bits = int(self.color_bits_var.get())
+            if color_bits < 1 or color_bits > 16:
+                raise ValueError()
+        except ValueError:
+            messagebox.showerror(
+                language_manager.get('error'),
+                language_manager.get('invalid_color_bits')
+            )
+            return None
+        
+        return {
+            'reduce_colors': self.reduce_colors_var.get(),
+            'color_bits': color_bits
+        }
+        
+    def on_process_done(self, image_data):
+        """后台处理完成回调"""
+        self.show_busy(False)
+        image_data = receive_result(image_data)
+        
+        # 工作进程的结果不包含原图和图像会话，沿用同一文件已有的
+        previous = self.image_data or {}
+        previous_shared = previous.get('shared_result')
+        session = previous.get('session')
+        if 'session' not in image_data and session is not None and session.matches(self.current_image_path):
+            image_data['session'] = session
+            image_data['original_image'] = previous.get('original_image', session.display_image)
+        self.image_data = image_data
+        del previous
+        
+        # 处理期间颜色空间可能已被切换，按当前选择显示
+        self.image_data.update(image_data['spaces'].to_image_data(self.color_space_var.get()))
+        
+        # 显示原图
+        self.display_original_image()
+        
+        # 显示图片信息
+        self.display_image_info()
+        
+        # 显示统计图
+        self.display_plot()
+        
+        # 新的图表绘制后释放旧结果的共享内存
+        release_result(previous_shared, self.image_data)
+        
+        self.refresh_btn.config(state="normal")
+        self.save_plot_btn.config(state="normal")
+        
+    def on_process_partial(self, image_data):
+        """后台处理的部分结果回调（逐条带处理时按固定间隔调用，处理状态保持显示）"""
+        previous_shared = self.image_data.get('shared_result') if self.image_data else None
+        self.image_data = image_data
+        self.image_data.update(image_data['spaces'].to_image_data(self.color_space_var.get()))
+        
+        self.display_original_image()
+        self.display_image_info()
+        self.display_plot()
+        release_result(previous_shared, self.image_data)
+        
+    def on_process_error(self, error):
+        """后台处理失败回调"""
+        self.show_busy(False)
+        messagebox.showerror(
+            language_manager.get('error'),
+            language_manager.get('process_image_error', error=str(error))
+        )
+        
+    def on_process_progress(self, stage, fraction):
+        """后台处理进度回调"""
+        self.progress_bar['value'] = fraction * 100
+        self.progress_label.config(text=language_manager.get(
+            'processing_stage',
+            stage=language_manager.get(f'stage_{stage}'),
+            percent=int(fraction * 100)
+        ))
+        
+    def show_busy(self, busy):
+        """显示或隐藏处理中状态"""
+        if busy:
+            self.progress_bar['value'] = 0
+            self.progress_label.config(text=language_manager.get('processing'))
+            self.progress_frame.pack(side="bottom", fill="x", padx=5, pady=2)
+        else:
+            self.progress_frame.pack_forget()
             
-            # 显示原图
-            self.display_original_image()
-            
-            # 显示图片信息
-            self.display_image_info()
-            
-            # 显示统计图
-            self.display_plot()
-            
-        except Exception as e:
-            raise Exception(language_manager.get('process_image_failed', error=str(e)))
+    def cancel_processing(self):
+        """取消该块中正在进行的后台处理"""
+        self.job_runner.cancel_all()
+        self.show_busy(False)
             
     def display_original_image(self):
         """显示原始图片"""
@@ -464,67 +793,131 @@ class ImageBlock(ttk.Frame):
             self.filename_label.config(text=f"{language_manager.get('filename')} {file_info['filename']}")
             self.filesize_label.config(text=f"{language_manager.get('file_size')} {file_info['file_size']}")
             self.dimensions_label.config(text=f"{language_manager.get('dimensions')} {file_info['width']} x {file_info['height']} {language_manager.get('pixels')}")
+            self.display_image_format(file_info.get('metadata'))
+            self.display_point_count()
             
+    def display_image_format(self, metadata):
+        """显示文件头中的格式信息（格式、位深度、通道数、压缩方式和分块）"""
+        if not metadata:
+            self.format_label.config(text=language_manager.get('image_format') + " -")
+            return
+        
+        parts = [metadata['format'] or '?']
+        if metadata['bit_depth']:
+            parts.append(language_manager.get(
+                'format_bits_channels', bit_depth=metadata['bit_depth'], channels=metadata['channels']
+            ))
+        compression = metadata['compression']
+        parts.append(language_manager.get('format_uncompressed') if compression == 'none' else compression)
+        if metadata['tiled'] and metadata['tile_size']:
+            tile_width, tile_height = metadata['tile_size']
+            parts.append(language_manager.get('format_tiled', tile_width=tile_width, tile_height=tile_height))
+        self.format_label.config(text=f"{language_manager.get('image_format')} {', '.join(parts)}")
+        
+    def display_point_count(self):
+        """显示数据点数（实际像素数，以及合并重复坐标后的点数）"""
+        points = self.image_data['points']
+        text = f"{language_manager.get('point_count')} {points.total:,}"
+        if len(points) != points.total:
+            text += f" ({language_manager.get('distinct_points', count=f'{len(points):,}')})"
+        self.point_count_label.config(text=text)
+        
+        sampling = self.image_data.get('sampling')
+        if sampling:
+            text = f"{language_manager.get('sampling_method')} {language_manager.get('sampling_' + sampling['method'], **sampling)}"
+            self.sampling_label.config(text=text)
+        
     def display_plot(self):
-        """显示统计图"""
+        """显示统计图（合并到下一次绘制中执行）"""
         if not self.image_data:
             return
+        
+        self.render_scheduler.invalidate(RenderScheduler.DATA, RenderScheduler.LABELS)
+        
+        # 应用坐标轴范围
+        self.apply_axis_range()
+        
+    def render_plot(self, flags):
+        """
+        应用本轮事件循环中标记的全部修改（由绘制调度器在空闲时调用）
+        
+        Args:
+            flags: 脏标志集合
+        """
+        if RenderScheduler.DATA in flags or RenderScheduler.STYLE in flags:
+            self.update_plot_artist()
+        
+        if RenderScheduler.LABELS in flags:
+            if self.image_data:
+                self.ax.set_xlabel(self.image_data['x_label'])
+                self.ax.set_ylabel(self.image_data['y_label'])
+            else:
+                self.ax.set_xlabel('x')
+                self.ax.set_ylabel('y')
+        
+        if RenderScheduler.LIMITS in flags:
+            self.ax.set_xlim(self.x_min, self.x_max)
+            self.ax.set_ylim(self.y_min, self.y_max)
+        
+        # 散点只取视图内的点、密度网格与显示范围对应，范围或数据变化后重新计算（未变化时不重复计算）
+        if self.dataset_artist is not None:
+            self.dataset_artist.refresh_view()
             
-        # 清除旧图
-        self.ax.clear()
-        
-        # 获取数据
-        x_data = self.image_data['x_data']
-        y_data = self.image_data['y_data']
-        x_label = self.image_data['x_label']
-        y_label = self.image_data['y_label']
+    def update_plot_artist(self):
+        """按当前数据和样式原地更新绘图对象"""
+        points = self.image_data['points'] if self.image_data else None
+        if points is None or len(points) == 0:
+            if self.dataset_artist is not None:
+                self.dataset_artist.remove()
+                self.dataset_artist = None
+            return
+        
         point_count = self.image_data['point_count']
         
-        # 绘制散点图
-        if len(x_data) > 0:
-            # 获取用户设置的点大小
-            try:
-                user_point_size = float(self.point_size_var.get())
-                if user_point_size <= 0:
-                    user_point_size = 1.0
-            except ValueError:
+        # 获取用户设置的点大小
+        try:
+            user_point_size = float(self.point_size_var.get())
+            if user_point_size <= 0:
                 user_point_size = 1.0
+        except ValueError:
+            user_point_size = 1.0
+        
+        # 根据数据点数量调整点的大小和透明度，并应用用户设置的缩放因子
+        if point_count > 10000:
+            size = 0.1 * user_point_size
+            alpha = 0.3
+        elif point_count > 5000:
+            size = 0.5 * user_point_size
+            alpha = 0.4
+        elif point_count > 1000:
+            size = 1 * user_point_size
+            alpha = 0.5
+        else:
+            size = 2 * user_point_size
+            alpha = 0.6
             
-            # 根据数据点数量调整点的大小和透明度，并应用用户设置的缩放因子
-            if point_count > 10000:
-                size = 0.1 * user_point_size
-                alpha = 0.3
-            elif point_count > 5000:
-                size = 0.5 * user_point_size
-                alpha = 0.4
-            elif point_count > 1000:
-                size = 1 * user_point_size
-                alpha = 0.5
-            else:
-                size = 2 * user_point_size
-                alpha = 0.6
-                
-            # 使用用户自定义的颜色
-            self.ax.scatter(x_data, y_data, s=size, alpha=alpha, c=self.plot_color)
-            
-        # 设置标签
-        self.ax.set_xlabel(x_label)
-        self.ax.set_ylabel(y_label)
-        self.ax.grid(True, alpha=0.3)
-        
-        # 应用坐标轴范围
-        self.apply_axis_range()
+        # 使用用户自定义的颜色，点的计数体现为叠加后的透明度；已有绘图对象时原地更新
+        if self.dataset_artist is None:
+            self.dataset_artist = DatasetArtist(self.ax)
+        self.dataset_artist.update(
+            points, self.plot_color, size, alpha,
+            mode=self.render_mode_var.get(),
+            scale=self.density_scale_var.get(),
+            index=self.image_data.get('point_index')
+        )
         
-        # 刷新画布
-        self.canvas.draw()
+    def refresh_plot(self, in_process=False):
+        """
+        刷新统计图
         
-    def refresh_plot(self):
-        """刷新统计图"""
+        Args:
+            in_process: 是否在工作进程中处理
+        """
         if self.current_image_path:
-            self.process_and_display_image()
+            self.process_and_display_image(in_process=in_process)
             
     def apply_axis_range(self):
-        """应用坐标轴范围"""
+        """应用坐标轴范围（合并到下一次绘制中执行）"""
         try:
             x_min = float(self.x_min_var.get())
             x_max = float(self.x_max_var.get())
@@ -538,9 +931,9 @@ class ImageBlock(ttk.Frame):
                 )
                 return
                 
-            self.ax.set_xlim(x_min, x_max)
-            self.ax.set_ylim(y_min, y_max)
-            self.canvas.draw()
+            self.x_min, self.x_max = x_min, x_max
+            self.y_min, self.y_max = y_min, y_max
+            self.render_scheduler.invalidate(RenderScheduler.LIMITS)
             
         except ValueError:
             messagebox.showerror(
@@ -548,26 +941,71 @@ class ImageBlock(ttk.Frame):
                 language_manager.get('please_enter_valid_number')
             )
             
+    def set_axis_range(self, xlim, ylim):
+        """
+        设置坐标轴范围并同步到输入框（合并到下一次绘制中执行）
+        
+        Args:
+            xlim: x范围 (最小值, 最大值)
+            ylim: y范围 (最小值, 最大值)
+        """
+        # 其他块联动时可能正在交互，放弃其快照以使用新范围
+        self.navigator.cancel()
+        
+        self.x_min, self.x_max = xlim
+        self.y_min, self.y_max = ylim
+        self.x_min_var.set(f"{self.x_min:.4g}")
+        self.x_max_var.set(f"{self.x_max:.4g}")
+        self.y_min_var.set(f"{self.y_min:.4g}")
+        self.y_max_var.set(f"{self.y_max:.4g}")
+        self.render_scheduler.invalidate(RenderScheduler.LIMITS)
+        
+    def on_navigate(self, xlim, ylim):
+        """
+        滚轮缩放或拖动平移结束回调
+        
+        Args:
+            xlim: 新的x范围
+            ylim: 新的y范围
+        """
+        self.set_axis_range(xlim, ylim)
+        if self.view_change_callback is not None:
+            self.view_change_callback(self, xlim, ylim)
+            
+    def clear_plot(self):
+        """清空统计图"""
+        self.render_scheduler.invalidate(RenderScheduler.DATA, RenderScheduler.LABELS)
+        
     def auto_axis_range(self):
-        """自动设置坐标轴范围"""
+        """自动设置坐标轴范围（使用处理时计算的数据摘要，可裁剪两端的离群值）"""
         if self.image_data:
-            x_data = self.image_data['x_data']
-            y_data = self.image_data['y_data']
+            clip_percent = self.get_clip_percent()
+            if clip_percent is None:
+                return
             
-            if len(x_data) > 0:
-                x_min, x_max = np.min(x_data), np.max(x_data)
-                y_min, y_max = np.min(y_data), np.max(y_data)
-                
-                # 添加10%的边距
-                x_margin = (x_max - x_min) * 0.1
-                y_margin = (y_max - y_min) * 0.1
+            # 范围两侧添加10%的边距
+            limits = DataSummary.combined_range([self.image_data['summary']], clip_percent)
+            if limits is not None:
+                self.set_axis_range(limits[:2], limits[2:])
                 
-                self.x_min_var.set(f"{x_min - x_margin:.2f}")
-                self.x_max_var.set(f"{x_max + x_margin:.2f}")
-                self.y_min_var.set(f"{y_min - y_margin:.2f}")
-                self.y_max_var.set(f"{y_max + y_margin:.2f}")
-                
-                self.apply_axis_range()
+    def get_clip_percent(self):
+        """
+        获取自动范围的裁剪百分比
+        
+        Returns:
+            float: 两端各裁剪的百分比，输入无效时返回None
+        """
+        try:
+            clip_percent = float(self.clip_percent_var.get())
+            if clip_percent < 0 or clip_percent >= 50:
+                raise ValueError()
+        except ValueError:
+            messagebox.showerror(
+                language_manager.get('error'),
+                language_manager.get('invalid_clip_percent')
+            )
+            return None
+        return clip_percent
     
     def save_plot(self):
         """保存当前图表到文件"""
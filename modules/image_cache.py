@@ -0,0 +1,188 @@
+"""
+解码图像缓存模块
+进程内共享的已解码图像缓存，按字节预算进行LRU淘汰
+"""
+
+import os
+import threading
+import multiprocessing
+from collections import OrderedDict
+
+import numpy as np
+
+from modules.image_processor import ImageProcessor
+
+
+class DecodedImageCache:
+    """
+    已解码图像的LRU缓存
+    
+    以(路径, 修改时间, 文件大小, 解码缩放倍数)为键，所有图片块和对比模式共享同一份只读像素数组。
+    """
+    
+    # 默认内存预算（MB），可通过环境变量 EASYLOOK_IMAGE_CACHE_MB 修改
+    DEFAULT_BUDGET_MB = 1024
+    
+    # 工作进程中的默认内存预算（MB），可通过环境变量 EASYLOOK_WORKER_IMAGE_CACHE_MB 修改；
+    # 工作进程通常直接使用界面进程共享的像素，默认不缓存解码结果
+    DEFAULT_WORKER_BUDGET_MB = 0
+    
+    def __init__(self, budget_bytes=None):
+        """
+        初始化缓存
+        
+        Args:
+            budget_bytes: 内存预算（字节），为None时使用环境变量或默认值
+        """
+        if budget_bytes is None:
+            if multiprocessing.parent_process() is None:
+                budget_mb = float(os.environ.get('EASYLOOK_IMAGE_CACHE_MB', self.DEFAULT_BUDGET_MB))
+            else:
+                budget_mb = float(os.environ.get('EASYLOOK_WORKER_IMAGE_CACHE_MB', self.DEFAULT_WORKER_BUDGET_MB))
+            budget_bytes = int(budget_mb * 1024 * 1024)
+        
+        self.budget_bytes = budget_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(image_path, decode_scale=1):
+        """
+        生成缓存键
+        
+        Args:
+            image_path: 图像文件路径
+            decode_scale: 解码缩放倍数
+        
+        Returns:
+            tuple: (绝对路径, 修改时间, 文件大小, 解码缩放倍数)
+        """
+        abs_path = os.path.abspath(image_path)
+        stat = os.stat(abs_path)
+        return (abs_path, stat.st_mtime_ns, stat.st_size, decode_scale)
+    
+    @staticmethod
+    def estimate_nbytes(image, pixels):
+        """
+        估算一条缓存项占用的内存
+        
+        Args:
+            image: 用于显示的PIL.Image对象
+            pixels: 像素数组
+        
+        Returns:
+            int: 字节数
+        """
+        # 显示图像和像素数组是两份独立的数据
+        display_bytes = image.width * image.height * len(image.getbands())
+        
+        # 内存映射的像素由操作系统按需读入和回收，按需解码的TIFF不保存像素，均不计入预算
+        if isinstance(pixels, np.memmap) or not isinstance(pixels, np.ndarray):
+            return display_bytes
+        return display_bytes + pixels.nbytes
+    
+    def get_or_load(self, image_path, loader=ImageProcessor.load_image, decode_scale=1, metadata=None):
+        """
+        获取已解码的图像，不在缓存中时调用loader解码
+        
+        同一文件正在被其他线程解码时会等待其完成，而不是重复解码。
+        
+        Args:
+            image_path: 图像文件路径
+            loader: 解码函数 loader(image_path, decode_scale, metadata) -> PIL.Image
+            decode_scale: JPEG解码缩放倍数，不同倍数的解码结果分别缓存
+            metadata: 文件头探测结果，传给解码函数（不参与缓存键）
+        
+        Returns:
+            tuple: (PIL.Image, 只读像素数组)
+        """
+        key = self.make_key(image_path, decode_scale)
+        
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0], entry[1]
+                
+                pending = self._loading.get(key)
+                if pending is None:
+                    # 由当前线程负责解码
+                    self.misses += 1
+                    pending = threading.Event()
+                    self._loading[key] = pending
+                    break
+            
+            # 等待其他线程解码完成后重新查找
+            pending.wait()
+        
+        try:
+            image = loader(image_path, decode_scale, metadata)
+            pixels = ImageProcessor.get_pixel_array(image)
+            # 共享数组设为只读，防止某个使用者修改其他块的数据（按需解码的TIFF没有数组）
+            if isinstance(pixels, np.ndarray):
+                pixels.flags.writeable = False
+            nbytes = self.estimate_nbytes(image, pixels)
+            
+            with self._lock:
+                if nbytes <= self.budget_bytes:
+                    self._entries[key] = (image, pixels, nbytes)
+                    self.current_bytes += nbytes
+                    self._evict_locked()
+            return image, pixels
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+            pending.set()
+    
+    def _evict_locked(self):
+        """淘汰最久未使用的项直到不超过预算（调用方需持有锁）"""
+        while self.current_bytes > self.budget_bytes and self._entries:
+            _, (_, _, nbytes) = self._entries.popitem(last=False)
+            self.current_bytes -= nbytes
+            self.evictions += 1
+    
+    def set_budget(self, budget_bytes):
+        """
+        设置内存预算，超出部分立即淘汰
+        
+        Args:
+            budget_bytes: 内存预算（字节）
+        """
+        with self._lock:
+            self.budget_bytes = budget_bytes
+            self._evict_locked()
+    
+    def clear(self):
+        """清空缓存（统计计数保留）"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+    
+    def get_stats(self):
+        """
+        获取缓存统计
+        
+        Returns:
+            dict: 命中、未命中、淘汰次数以及内存占用
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'current_bytes': self.current_bytes,
+                'budget_bytes': self.budget_bytes
+            }
+
+
+# 全局解码图像缓存实例
+decoded_image_cache = DecodedImageCache()
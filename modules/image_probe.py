@@ -0,0 +1,136 @@
+"""
+图像元数据探测模块
+只读取文件头，获取尺寸、数据类型、通道数、压缩方式和分块信息，不解码像素；
+加载和处理图像时复用同一份探测结果规划读取方式
+"""
+
+from PIL import Image
+
+from modules.tiff_reader import TiffReader
+
+
+# TIFF压缩方式的名称
+TIFF_COMPRESSION_NAMES = {
+    1: 'none',
+    2: 'ccitt',
+    5: 'lzw',
+    6: 'jpeg',
+    7: 'jpeg',
+    8: 'deflate',
+    32773: 'packbits',
+    32946: 'deflate',
+    34925: 'lzma',
+    50000: 'zstd',
+    50001: 'webp'
+}
+
+# PIL图像模式对应的 (数据类型, 每通道位数, 通道数)
+PIL_MODES = {
+    '1': ('bool', 1, 1),
+    'L': ('uint8', 8, 1),
+    'LA': ('uint8', 8, 2),
+    'P': ('uint8', 8, 1),
+    'PA': ('uint8', 8, 2),
+    'RGB': ('uint8', 8, 3),
+    'RGBA': ('uint8', 8, 4),
+    'RGBX': ('uint8', 8, 4),
+    'CMYK': ('uint8', 8, 4),
+    'YCbCr': ('uint8', 8, 3),
+    'LAB': ('uint8', 8, 3),
+    'HSV': ('uint8', 8, 3),
+    'I': ('int32', 32, 1),
+    'F': ('float32', 32, 1),
+    'I;16': ('uint16', 16, 1),
+    'I;16L': ('uint16', 16, 1),
+    'I;16B': ('uint16', 16, 1),
+    'I;16N': ('uint16', 16, 1)
+}
+
+# 各格式的固定压缩方式
+FORMAT_COMPRESSIONS = {
+    'JPEG': 'jpeg',
+    'PNG': 'deflate',
+    'WEBP': 'webp',
+    'GIF': 'lzw',
+    'BMP': 'none',
+    'PPM': 'none'
+}
+
+# 像素的读取方式
+ACCESS_MAPPED = 'mapped'     # 未压缩的TIFF，直接内存映射
+ACCESS_CHUNKED = 'chunked'   # 压缩或分块的TIFF，按条带/分块按需解码
+ACCESS_FULL = 'full'         # 需要完整解码（imageio或PIL）
+
+
+def probe_image(image_path):
+    """
+    只读取文件头，探测图像的元数据
+    
+    TIFF由TiffReader解析第一个IFD（超大图像不会触发Pillow的像素数上限），
+    其他格式由PIL读取文件头（Image.open不解码像素）。
+    
+    Args:
+        image_path: 图像文件路径
+    
+    Returns:
+        dict: 'format'（如 'TIFF', 'JPEG', 'PNG'）、'width'、'height'、'channels'、
+              'dtype'（numpy数据类型名称，未知时为None）、'bit_depth'（每通道位数）、
+              'compression'（压缩方式名称）、'tiled'、'tile_size'（分块的 (宽, 高)，不分块时为None）、
+              'access'（像素的读取方式：'mapped'、'chunked' 或 'full'）
+    
+    Raises:
+        OSError: 文件无法识别
+    """
+    try:
+        reader = TiffReader(image_path)
+    except (ValueError, OSError):
+        reader = None
+    if reader is not None:
+        return probe_tiff(reader)
+    
+    with Image.open(image_path) as image:
+        dtype, bit_depth, channels = PIL_MODES.get(image.mode, (None, None, len(image.getbands())))
+        return {
+            'format': image.format,
+            'width': image.width,
+            'height': image.height,
+            'channels': channels,
+            'dtype': dtype,
+            'bit_depth': bit_depth,
+            'compression': FORMAT_COMPRESSIONS.get(image.format, (image.format or 'unknown').lower()),
+            'tiled': False,
+            'tile_size': None,
+            'access': ACCESS_FULL
+        }
+
+
+def probe_tiff(reader):
+    """
+    由已解析的TIFF文件头生成元数据
+    
+    Args:
+        reader: TiffReader
+    
+    Returns:
+        dict: 元数据（见probe_image）
+    """
+    dtype = reader.dtype
+    if reader.is_mappable():
+        access = ACCESS_MAPPED
+    elif reader.is_decodable():
+        access = ACCESS_CHUNKED
+    else:
+        access = ACCESS_FULL
+    
+    return {
+        'format': 'TIFF',
+        'width': reader.width,
+        'height': reader.height,
+        'channels': reader.samples_per_pixel,
+        'dtype': dtype.newbyteorder('=').name if dtype is not None else None,
+        'bit_depth': reader.bits_per_sample,
+        'compression': TIFF_COMPRESSION_NAMES.get(reader.compression, f'tiff-{reader.compression}'),
+        'tiled': reader.tiled,
+        'tile_size': (reader.tile_width, reader.tile_length) if reader.tiled else None,
+        'access': access
+    }
@@ -7,116 +7,379 @@ import numpy as np
 from PIL import Image
 import warnings
 import os
+import threading
+import time
+import tracemalloc
 import imageio.v3 as iio
 
+from modules.color_kernels import rg_bg_kernel, chromaticity_kernel, reduce_colors as reduce_rgb_colors
+from modules.color_spaces import MultiSpaceResult, COLOR_SPACE_LABELS
+from modules.tiff_reader import TiffReader
+from modules.band_pipeline import BandPipeline
+from modules.progressive import ProgressiveRefiner
+from modules.area_average import area_average
+from modules.image_probe import probe_image, ACCESS_FULL
+from modules.sampling import plan_sampling, stratified_positions, stride_for_points, processing_cost_model
+
 class ImageProcessor:
     """图像处理器类"""
     
+    # 内存映射的TIFF只用不超过该边长的预览生成显示图像
+    PREVIEW_SIZE = 1024
+    
+    # 可以在解码时缩放的JPEG扩展名，以及libjpeg支持的缩放倍数（从大到小）
+    JPEG_EXTENSIONS = ('.jpg', '.jpeg', '.jpe', '.jfif')
+    JPEG_DECODE_SCALES = (8, 4, 2)
+    
+    # PIL图像按条带复制到数组时每个条带的行数
+    COPY_BAND_ROWS = 256
+    
     @staticmethod
-    def load_image(image_path):
+    def load_image(image_path, decode_scale=1, metadata=None):
         """
         加载图像并转换为RGB格式
         支持常见格式（JPEG, PNG等）以及TIFF格式（包括16位TIFF）
         
+        每张图像只保留一份完整分辨率的像素（original_array属性，多通道图像取前3个通道的视图），
+        用于显示的图像由按步长取样的预览生成，不为完整分辨率生成显示图像。
+        
         Args:
             image_path: 图像文件路径
+            decode_scale: JPEG解码缩放倍数（1, 2, 4或8），其他格式忽略
+            metadata: probe_image的探测结果，给出时按文件头中的格式和读取方式选择加载路径，
+                      为None时按扩展名判断
             
         Returns:
-            PIL.Image: RGB格式的图像对象
+            PIL.Image: 用于显示的RGB图像，original_array属性为像素数组，decode_scale属性为实际的解码缩放倍数
         """
+        baseline = load_memory_stats.begin()
         try:
-            # 获取文件扩展名
-            file_ext = os.path.splitext(image_path)[1].lower()
+            if metadata is not None:
+                is_tiff = metadata['format'] == 'TIFF'
+            else:
+                is_tiff = os.path.splitext(image_path)[1].lower() in ['.tif', '.tiff']
             
-            # 对于TIFF格式，使用imageio读取以获得更好的兼容性
-            if file_ext in ['.tif', '.tiff']:
-                # 使用imageio读取TIFF图像
-                img_array = iio.imread(image_path)
-                
-                # 保存原始数组的副本
-                original_array = img_array.copy()
-                
-                # 先处理通道问题
-                # 如果是多通道TIFF（如4通道RGBA），只取前3个通道
-                if img_array.ndim == 3 and img_array.shape[2] > 3:
-                    img_array = img_array[:, :, :3]
-                    original_array = original_array[:, :, :3]
-                # 如果是单通道灰度图，转换为3通道
-                elif img_array.ndim == 2:
-                    img_array = np.stack([img_array] * 3, axis=-1)
-                    original_array = np.stack([original_array] * 3, axis=-1)
-                
-                # 检查数据类型和位深度，并归一化到0-255范围用于显示
-                if img_array.dtype == np.uint16:
-                    # 16位图像，归一化到0-255范围用于显示
-                    # 对于显示：使用实际的最小最大值进行归一化，确保图像可见
-                    max_val = img_array.max()
-                    min_val = img_array.min()
-                    
-                    if max_val > min_val:
-                        # 使用实际范围进行归一化以获得更好的显示效果
-                        img_array_float = (img_array.astype(np.float64) - min_val) / (max_val - min_val)
-                        img_array_display = (img_array_float * 255).astype(np.uint8)
-                    else:
-                        # 如果所有像素值相同，设置为中等灰度
-                        img_array_display = np.full_like(img_array, 128, dtype=np.uint8)
-                elif img_array.dtype == np.float32 or img_array.dtype == np.float64:
-                    # 浮点图像，假设范围是0-1，转换到0-255
-                    img_array_display = (np.clip(img_array, 0, 1) * 255).astype(np.uint8)
-                elif img_array.dtype == np.uint8:
-                    img_array_display = img_array
-                else:
-                    # 其他数据类型，尝试转换
-                    # 先归一化到0-1范围，然后转换到0-255
-                    min_val = img_array.min()
-                    max_val = img_array.max()
-                    if max_val > min_val:
-                        img_array_display = ((img_array - min_val) / (max_val - min_val) * 255).astype(np.uint8)
-                    else:
-                        img_array_display = np.zeros_like(img_array, dtype=np.uint8)
+            if is_tiff:
+                # 未压缩且连续存放的TIFF直接内存映射，压缩的TIFF按条带或分块按需解码；
+                # 文件头已表明需要完整解码时直接使用imageio
+                img = None
+                if metadata is None or metadata['access'] != ACCESS_FULL:
+                    img = ImageProcessor.load_tiff(image_path)
+                if img is None:
+                    # 其他TIFF使用imageio读取以获得更好的兼容性，直接使用解码得到的数组
+                    img = ImageProcessor.from_pixels(iio.imread(image_path))
+            else:
+                img = ImageProcessor.load_pil(image_path, decode_scale)
+        except Exception as e:
+            raise Exception(f"无法加载图像: {str(e)}")
+        
+        load_memory_stats.record(image_path, img, baseline)
+        return img
+    
+    @staticmethod
+    def load_pil(image_path, decode_scale=1):
+        """
+        使用PIL加载图像
+        
+        解码结果转换为像素数组后PIL图像即被释放，像素数组是唯一的完整分辨率缓冲区。
+        
+        Args:
+            image_path: 图像文件路径
+            decode_scale: JPEG解码缩放倍数
+            
+        Returns:
+            PIL.Image: 用于显示的RGB图像（见from_pixels）
+        """
+        with Image.open(image_path) as img:
+            # JPEG由libjpeg直接按1/2、1/4或1/8解码（DCT缩放，近似块平均），不解码完整分辨率
+            scale = 1
+            if decode_scale > 1 and img.format == 'JPEG':
+                width, height = img.size
+                # draft按 原尺寸 // 请求尺寸 选择倍数，因此请求向下取整的尺寸（libjpeg输出向上取整的尺寸）
+                if width >= decode_scale and height >= decode_scale:
+                    img.draft('RGB', (width // decode_scale, height // decode_scale))
                 
-                # 将numpy数组转换为PIL Image用于显示
-                img = Image.fromarray(img_array_display)
+                # 按实际输出尺寸确定缩放倍数（可能小于请求的倍数，仍能整除降采样率）
+                if img.size != (width, height):
+                    for candidate in ImageProcessor.JPEG_DECODE_SCALES:
+                        if img.size == (-(-width // candidate), -(-height // candidate)):
+                            scale = candidate
+                            break
+            
+            # 确保是RGB格式
+            rgb = img.convert('RGB') if img.mode != 'RGB' else img
+            pixels = ImageProcessor.pil_to_array(rgb)
+        
+        return ImageProcessor.from_pixels(pixels, scale)
+    
+    @staticmethod
+    def pil_to_array(img):
+        """
+        把PIL图像按条带复制到预先分配的数组
+        
+        np.asarray(img)经由tobytes()先生成分段的字节串再拼接，峰值约为图像大小的两倍；
+        按条带复制时除结果数组外只需要一个条带的内存。
+        
+        Args:
+            img: PIL.Image对象
+            
+        Returns:
+            numpy.ndarray: 像素数组
+        """
+        width, height = img.size
+        rows = ImageProcessor.COPY_BAND_ROWS
+        pixels = None
+        for top in range(0, height, rows):
+            band = np.asarray(img.crop((0, top, width, min(top + rows, height))))
+            if pixels is None:
+                pixels = np.empty((height,) + band.shape[1:], dtype=band.dtype)
+            pixels[top:top + len(band)] = band
+        if pixels is None:
+            pixels = np.asarray(img)
+        return pixels
+    
+    @staticmethod
+    def from_pixels(pixels, decode_scale=1):
+        """
+        由完整分辨率的像素数组生成用于显示的图像
+        
+        数组不复制：多通道图像（如4通道RGBA）只取前3个通道的视图，单通道图像保持二维，
+        降采样后再扩展为3通道。
+        
+        Args:
+            pixels: 像素数组
+            decode_scale: 解码缩放倍数
+            
+        Returns:
+            PIL.Image: 用于显示的RGB图像，original_array属性为像素数组
+        """
+        if pixels.ndim == 3 and pixels.shape[2] > 3:
+            pixels = pixels[:, :, :3]
+        
+        height, width = pixels.shape[:2]
+        step = ImageProcessor.preview_step(width, height)
+        img = ImageProcessor.display_image(pixels[::step, ::step])
+        
+        img.original_array = pixels
+        img.is_16bit = (pixels.dtype == np.uint16)
+        img.decode_scale = decode_scale
+        return img
+    
+    @staticmethod
+    def preview_step(width, height):
+        """
+        计算预览的取样步长（预览的最长边不超过PREVIEW_SIZE）
+        
+        Args:
+            width: 图像宽度
+            height: 图像高度
+            
+        Returns:
+            int: 步长
+        """
+        return max(1, -(-max(width, height) // ImageProcessor.PREVIEW_SIZE))
+    
+    @staticmethod
+    def display_image(preview):
+        """
+        由预览数组生成用于显示的RGB图像
+        
+        Args:
+            preview: 按步长取样的像素数组
+            
+        Returns:
+            PIL.Image: RGB图像
+        """
+        img = Image.fromarray(ImageProcessor.to_display_array(preview))
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        return img
+    
+    @staticmethod
+    def decode_scale(image_path, sample_rate, metadata=None):
+        """
+        选择与降采样率兼容的最大解码缩放倍数
+        
+        只有JPEG支持解码时缩放。缩放倍数必须整除降采样率，缩放后的图像再按剩余的步长取样，
+        取样位置和点数与直接按降采样率取样相同。
+        
+        Args:
+            image_path: 图像文件路径
+            sample_rate: 降采样率
+            metadata: probe_image的探测结果，为None时按扩展名判断格式
+            
+        Returns:
+            int: 解码缩放倍数（1表示完整解码）
+        """
+        if metadata is not None:
+            is_jpeg = metadata['format'] == 'JPEG'
+        else:
+            is_jpeg = os.path.splitext(image_path)[1].lower() in ImageProcessor.JPEG_EXTENSIONS
+        if not is_jpeg:
+            return 1
+        for scale in ImageProcessor.JPEG_DECODE_SCALES:
+            if sample_rate % scale == 0:
+                return scale
+        return 1
+    
+    @staticmethod
+    def sampling_info(sample_rate, decode_scale=1, area=False):
+        """
+        描述降采样方式
+        
+        Args:
+            sample_rate: 降采样率
+            decode_scale: 解码缩放倍数
+            area: 是否区域平均
+            
+        Returns:
+            dict: 'method'为'stride'（按步长取样）、'decoder'（JPEG解码缩放，每个点是
+                  decode_scale×decode_scale像素块的近似平均，再按步长取样）或'area'（区域平均，
+                  每个点是sample_rate×sample_rate像素块的平均值，'block'为块边长），
+                  'decode_scale'为解码缩放倍数，'stride'为解码后的取样步长或平均的块边长
+        """
+        if area:
+            return {
+                'method': 'area',
+                'decode_scale': decode_scale,
+                'stride': sample_rate // decode_scale,
+                'block': sample_rate
+            }
+        return {
+            'method': 'decoder' if decode_scale > 1 else 'stride',
+            'decode_scale': decode_scale,
+            'stride': sample_rate // decode_scale
+        }
+    
+    @staticmethod
+    def to_display_array(img_array):
+        """
+        把像素数组归一化为用于显示的8位数组
+        
+        Args:
+            img_array: 像素数组
+            
+        Returns:
+            numpy.ndarray: uint8数组
+        """
+        if img_array.dtype == np.uint16:
+            # 16位图像，归一化到0-255范围用于显示
+            # 对于显示：使用实际的最小最大值进行归一化，确保图像可见
+            max_val = img_array.max()
+            min_val = img_array.min()
+            
+            if max_val > min_val:
+                # 使用实际范围进行归一化以获得更好的显示效果（单个float32缓冲区原地缩放）
+                scaled = np.subtract(img_array, min_val, dtype=np.float32)
+                scaled *= 255.0 / (max_val - min_val)
+                return scaled.astype(np.uint8)
+            # 如果所有像素值相同，设置为中等灰度
+            return np.full_like(img_array, 128, dtype=np.uint8)
+        if img_array.dtype == np.float32 or img_array.dtype == np.float64:
+            # 浮点图像，假设范围是0-1，转换到0-255
+            return (np.clip(img_array, 0, 1) * 255).astype(np.uint8)
+        if img_array.dtype == np.uint8:
+            return img_array
+        
+        # 其他数据类型，尝试转换
+        # 先归一化到0-1范围，然后转换到0-255
+        min_val = img_array.min()
+        max_val = img_array.max()
+        if max_val > min_val:
+            return ((img_array - min_val) / (max_val - min_val) * 255).astype(np.uint8)
+        return np.zeros_like(img_array, dtype=np.uint8)
+    
+    @staticmethod
+    def load_tiff(image_path):
+        """
+        不完整解码地加载TIFF
+        
+        未压缩且连续存放的TIFF内存映射为只读数组，降采样时只有被取样的行会从磁盘读入；
+        压缩的TIFF保存TiffReader，降采样时只并行解压包含被取样行的条带或分块。
+        显示图像由按步长取样的预览生成。
+        
+        Args:
+            image_path: TIFF文件路径
+            
+        Returns:
+            PIL.Image: 用于显示的RGB图像，original_array属性为内存映射的像素数组或TiffReader；
+                       不支持的TIFF（如JPEG压缩、按平面存放、调色板图像）返回None
+        """
+        try:
+            reader = TiffReader(image_path)
+            step = ImageProcessor.preview_step(reader.width, reader.height)
+            if reader.is_mappable():
+                pixels = reader.memmap()
                 
-                # 确保是RGB格式
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
+                # 多通道TIFF（如4通道RGBA）只取前3个通道
+                if pixels.ndim == 3 and pixels.shape[2] > 3:
+                    pixels = pixels[:, :, :3]
                 
-                # 保存原始数据作为属性
-                img.original_array = original_array
-                img.is_16bit = (original_array.dtype == np.uint16)
+                # 预览按步长取样并转换为本机字节序
+                preview = pixels[::step, ::step].astype(pixels.dtype.newbyteorder('='))
+            elif reader.is_decodable():
+                pixels = reader
+                preview = reader.read(step, step)
+                if preview.ndim == 3 and preview.shape[2] > 3:
+                    preview = preview[:, :, :3]
             else:
-                # 对于其他格式，使用PIL直接读取
-                img = Image.open(image_path)
-                # 确保是RGB格式
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
+                return None
+        except (ValueError, OSError):
+            return None
+        
+        img = ImageProcessor.display_image(preview)
+        img.original_array = pixels
+        img.is_16bit = (preview.dtype == np.uint16)
+        return img
+    
+    @staticmethod
+    def get_pixel_array(image):
+        """
+        获取图像用于颜色空间计算的像素数组
+        
+        Args:
+            image: PIL.Image对象、已解码的像素数组或按需解码的TiffReader
             
-            return img
-        except Exception as e:
-            raise Exception(f"无法加载图像: {str(e)}")
+        Returns:
+            numpy.ndarray: 像素数组（16位TIFF返回原始高精度数据，压缩的TIFF返回TiffReader）
+        """
+        if isinstance(image, (np.ndarray, TiffReader)):
+            return image
+        
+        # 检查是否有原始高精度数据
+        if hasattr(image, 'original_array'):
+            return image.original_array
+        
+        # 转换为numpy数组（按条带复制，不生成完整的中间字节串）
+        return ImageProcessor.pil_to_array(image)
     
     @staticmethod
-    def downsample_image(image, sample_rate):
+    def downsample_image(image, sample_rate, area=False):
         """
         对图像进行降采样
         
         Args:
-            image: PIL.Image对象
+            image: PIL.Image对象或已解码的像素数组
             sample_rate: 降采样率 (1表示不降采样, 2表示每2个像素取1个, 等等)
+            area: 是否区域平均（每个点是sample_rate×sample_rate像素块的平均值，点数与按步长取样相同）
             
         Returns:
             numpy.ndarray: 降采样后的RGB数组
         """
-        # 检查是否有原始高精度数据
-        if hasattr(image, 'original_array'):
-            img_array = image.original_array
-        else:
-            # 转换为numpy数组
-            img_array = np.array(image)
+        img_array = ImageProcessor.get_pixel_array(image)
+        
+        if isinstance(img_array, np.memmap):
+            return ImageProcessor.downsample_mapped(img_array, sample_rate, area)
+        if isinstance(img_array, TiffReader):
+            return ImageProcessor.downsample_tiff(img_array, sample_rate, area)
         
         # 降采样
-        if sample_rate > 1:
+        if area:
+            # 多余的通道不参与平均
+            if img_array.ndim == 3 and img_array.shape[2] > 3:
+                img_array = img_array[:, :, :3]
+            sampled = area_average(img_array, sample_rate)
+        elif sample_rate > 1:
             # 使用步长进行降采样
             if img_array.ndim == 3:
                 sampled = img_array[::sample_rate, ::sample_rate, :]
@@ -124,7 +387,91 @@ class ImageProcessor:
                 sampled = img_array[::sample_rate, ::sample_rate]
         else:
             sampled = img_array
+        
+        # 多通道图像只取前3个通道，单通道图像在取样后才扩展为3通道
+        if sampled.ndim == 3 and sampled.shape[2] > 3:
+            sampled = sampled[:, :, :3]
+        if sampled.ndim == 2:
+            sampled = np.stack([sampled] * 3, axis=-1)
+        return sampled
+    
+    @staticmethod
+    def stratified_sample(pixels, target_points, seed):
+        """
+        分层随机采样：把图像分成约target_points个网格，每个网格取一个随机像素
+        
+        Args:
+            pixels: 像素数组（可以是内存映射的数组）
+            target_points: 目标点数
+            seed: 随机种子
+            
+        Returns:
+            numpy.ndarray: 本机字节序的RGB数组，形状为 (网格行数, 网格列数, 3)
+        """
+        rows, cols = stratified_positions(pixels.shape[0], pixels.shape[1], target_points, seed)
+        sampled = pixels[rows, cols]
+        sampled = sampled.astype(sampled.dtype.newbyteorder('='), copy=False)
+        
+        if sampled.ndim == 3 and sampled.shape[2] > 3:
+            sampled = sampled[:, :, :3]
+        if sampled.ndim == 2:
+            sampled = np.stack([sampled] * 3, axis=-1)
+        return sampled
+    
+    @staticmethod
+    def downsample_mapped(pixels, sample_rate, area=False):
+        """
+        对内存映射的像素数组降采样，只读取被取样的行
+        
+        结果与普通数组的降采样一致：本机字节序，单通道图像扩展为3通道。
+        区域平均需要读取全部像素，按条带顺序读取。
+        
+        Args:
+            pixels: 内存映射的像素数组
+            sample_rate: 降采样率
+            area: 是否区域平均
+            
+        Returns:
+            numpy.ndarray: 降采样后的RGB数组（降采样率为1且无需转换时直接返回映射）
+        """
+        native = pixels.dtype.newbyteorder('=')
+        if area and sample_rate > 1:
+            sampled = area_average(pixels, sample_rate)
+        else:
+            sampled = pixels[::sample_rate, ::sample_rate] if sample_rate > 1 else pixels
+        
+        # 复制取样后的像素（只有这些行所在的页会被读入），降采样率为1时直接使用映射
+        if sampled.dtype != native or (sample_rate > 1 and isinstance(sampled, np.memmap)):
+            sampled = sampled.astype(native)
+        
+        if sampled.ndim == 2:
+            sampled = np.stack([sampled] * 3, axis=-1)
+        return sampled
+    
+    @staticmethod
+    def downsample_tiff(reader, sample_rate, area=False):
+        """
+        对压缩的TIFF降采样，只解压包含被取样行的条带或分块
+        
+        Args:
+            reader: TiffReader
+            sample_rate: 降采样率
+            area: 是否区域平均（需要解压全部条带，按条带逐段解压和平均，不生成完整分辨率的数组）
             
+        Returns:
+            numpy.ndarray: 降采样后的RGB数组
+        """
+        if area and sample_rate > 1:
+            pipeline = BandPipeline(reader, sample_rate, area=True)
+            return np.concatenate([band for _, band in pipeline.iter_bands()])
+        
+        sampled = reader.read(sample_rate, sample_rate)
+        
+        # 多通道TIFF只取前3个通道，单通道扩展为3通道
+        if sampled.ndim == 3 and sampled.shape[2] > 3:
+            sampled = sampled[:, :, :3]
+        if sampled.ndim == 2:
+            sampled = np.stack([sampled] * 3, axis=-1)
         return sampled
     
     @staticmethod
@@ -231,15 +578,48 @@ class ImageProcessor:
         return r_chrom.flatten(), g_chrom.flatten(), valid_mask.flatten()
     
     @staticmethod
-    def get_file_info(image_path):
+    def convert_color_space(rgb_array, color_space='rg_bg', precision='float32'):
+        """
+        将RGB数组转换到指定颜色空间，只返回有效像素的坐标
+        
+        Args:
+            rgb_array: RGB数组 (H, W, 3)
+            color_space: 颜色空间类型 ('rg_bg' 或 'chromaticity')
+            precision: 计算精度
+                'float32': 单次遍历的float32内核（默认），峰值内存接近输出大小
+                'reference': 原始实现（16位图像使用float64），结果与旧版本完全一致
+            
+        Returns:
+            tuple: (x数组, y数组, x轴标签, y轴标签)
+        """
+        x_label, y_label = COLOR_SPACE_LABELS[color_space]
+        
+        if precision == 'reference':
+            if color_space == 'rg_bg':
+                x_data, y_data, valid_mask = ImageProcessor.convert_to_normalized_rg(rgb_array)
+            else:
+                x_data, y_data, valid_mask = ImageProcessor.convert_to_chromaticity(rgb_array)
+            
+            # 只保留有效数据点
+            return x_data[valid_mask], y_data[valid_mask], x_label, y_label
+        
+        if color_space == 'rg_bg':
+            x_data, y_data = rg_bg_kernel(rgb_array)
+        else:
+            x_data, y_data = chromaticity_kernel(rgb_array)
+        return x_data, y_data, x_label, y_label
+    
+    @staticmethod
+    def get_file_info(image_path, metadata=None):
         """
-        获取图片文件信息
+        获取图片文件信息（只读取文件头，不解码像素）
         
         Args:
             image_path: 图像文件路径
+            metadata: 已有的probe_image探测结果，为None时探测
             
         Returns:
-            dict: 包含文件名、大小、尺寸等信息
+            dict: 包含文件名、大小、尺寸等信息，'metadata'键保存探测结果
         """
         # 获取文件名
         filename = os.path.basename(image_path)
@@ -255,19 +635,37 @@ class ImageProcessor:
         else:
             size_str = f"{file_size / (1024 * 1024):.1f} MB"
         
-        # 获取图片尺寸
-        image = Image.open(image_path)
-        width, height = image.size
+        # 获取图片尺寸、数据类型和压缩方式
+        if metadata is None:
+            metadata = probe_image(image_path)
         
         return {
             'filename': filename,
             'file_size': size_str,
-            'width': width,
-            'height': height
+            'width': metadata['width'],
+            'height': metadata['height'],
+            'metadata': metadata
         }
     
     @staticmethod
-    def process_image(image_path, color_space='rg_bg', sample_rate=10):
+    def report_progress(progress_callback, stage, fraction):
+        """
+        报告处理进度
+        
+        进度回调同时也是取消检查点，回调可以抛出异常来中断处理
+        
+        Args:
+            progress_callback: 进度回调 progress_callback(stage, fraction)，可为None
+            stage: 阶段名称
+            fraction: 完成比例 0-1
+        """
+        if progress_callback is not None:
+            progress_callback(stage, fraction)
+    
+    @staticmethod
+    def process_image(image_path, color_space='rg_bg', sample_rate=10, progress_callback=None,
+                      precision='float32', reduce_colors=False, color_bits=None, partial_callback=None,
+                      sampling=None):
         """
         处理图像：加载、降采样并转换颜色空间
         
@@ -275,39 +673,258 @@ class ImageProcessor:
             image_path: 图像文件路径
             color_space: 颜色空间类型 ('rg_bg' 或 'chromaticity')
             sample_rate: 降采样率
+            progress_callback: 进度回调 progress_callback(stage, fraction)，可为None
+            precision: 计算精度 ('float32' 或 'reference')
+            reduce_colors: 是否先对颜色去重，只转换不同的颜色
+            color_bits: 去重时16位图像每通道保留的位数，为None时使用默认值
+            partial_callback: 部分结果回调 partial_callback(image_data)，可为None
+            sampling: 采样方式和取样图案（见plan_sampling），为None时按降采样率规则取样
             
         Returns:
             dict: 包含原图、处理后的坐标数据等信息
         """
-        # 加载图像
-        image = ImageProcessor.load_image(image_path)
-        
-        # 获取文件信息
+        # 只读取文件头获取文件信息，加载时按探测结果选择读取方式
+        ImageProcessor.report_progress(progress_callback, 'file_info', 0.0)
         file_info = ImageProcessor.get_file_info(image_path)
+        metadata = file_info['metadata']
         
-        # 降采样
-        sampled_array = ImageProcessor.downsample_image(image, sample_rate)
+        # 按点数或时间预算采样时由图像尺寸确定步长
+        plan = plan_sampling(metadata['width'], metadata['height'], sampling, sample_rate)
+        sample_rate = plan['sample_rate']
         
-        # 根据选择的颜色空间进行转换
-        if color_space == 'rg_bg':
-            x_data, y_data, valid_mask = ImageProcessor.convert_to_normalized_rg(sampled_array)
-            x_label = 'r/g'
-            y_label = 'b/g'
-        else:  # chromaticity
-            x_data, y_data, valid_mask = ImageProcessor.convert_to_chromaticity(sampled_array)
-            x_label = 'r/(r+g+b)'
-            y_label = 'g/(r+g+b)'
-        
-        # 只保留有效数据点
-        x_data = x_data[valid_mask]
-        y_data = y_data[valid_mask]
+        # 加载图像（JPEG按与降采样率兼容的最大倍数缩放解码）
+        ImageProcessor.report_progress(progress_callback, 'load', 0.1)
+        image = ImageProcessor.load_image(
+            image_path,
+            ImageProcessor.decode_scale(image_path, sample_rate, metadata),
+            metadata
+        )
         
-        return {
+        return ImageProcessor.process_loaded_image(
+            image, file_info, color_space, sample_rate,
+            progress_callback=progress_callback,
+            precision=precision,
+            reduce_colors=reduce_colors,
+            color_bits=color_bits,
+            partial_callback=partial_callback,
+            target_points=plan['target_points'],
+            seed=plan['seed'],
+            area=plan['area']
+        )
+    
+    @staticmethod
+    def process_loaded_image(image, file_info, color_space='rg_bg', sample_rate=10,
+                             progress_callback=None, pixels=None, precision='float32',
+                             reduce_colors=False, color_bits=None, partial_callback=None,
+                             target_points=None, seed=None, area=False):
+        """
+        处理已加载的图像：只执行降采样和颜色空间转换，不进行文件读取
+        
+        内存映射或按需解码的TIFF逐条带处理，工作内存不超过BandPipeline的上限，
+        处理过程中按固定间隔通过partial_callback输出部分结果；已解码的大图在指定partial_callback时
+        由ProgressiveRefiner先按粗步长处理，每细化一轮输出一次部分结果。
+        
+        Args:
+            image: 已加载的PIL.Image对象（用于显示）
+            file_info: 文件信息字典
+            color_space: 颜色空间类型 ('rg_bg' 或 'chromaticity')
+            sample_rate: 降采样率
+            progress_callback: 进度回调 progress_callback(stage, fraction)，可为None
+            pixels: 已解码的像素数组，为None时从image中获取
+            precision: 计算精度 ('float32' 或 'reference')
+            reduce_colors: 是否先对颜色去重，只转换不同的颜色（结果带像素数权重）
+            color_bits: 去重时16位图像每通道保留的位数，为None时使用默认值
+            partial_callback: 部分结果回调 partial_callback(image_data)，逐条带处理或渐进细化时调用，可为None
+            target_points: 分层随机采样的点数，为None时按步长取样
+            seed: 分层随机采样的随机种子
+            area: 是否区域平均（每个点是 sample_rate×sample_rate 像素块的平均值）
+            
+        Returns:
+            dict: 包含原图、处理后的坐标数据等信息，'spaces'键保存可切换颜色空间的多空间结果
+        """
+        if pixels is None:
+            pixels = image
+        start_time = time.perf_counter()
+        
+        # 解码时已缩放的图像只需按剩余的步长取样
+        sampling = ImageProcessor.sampling_info(sample_rate, getattr(image, 'decode_scale', 1), area)
+        source = ImageProcessor.get_pixel_array(pixels)
+        
+        # 分层随机采样需要随机访问像素，按需解码的TIFF改为点数最接近的步长
+        if target_points is not None and isinstance(source, TiffReader):
+            sampling['stride'] = stride_for_points(source.width, source.height, target_points)
+            target_points = None
+        
+        if target_points is not None:
+            sampling['method'] = 'stratified'
+            sampling['seed'] = seed
+        
+        def on_partial(partial_spaces, stride=None):
+            # 渐进细化的部分结果注明当前轮次的步长
+            partial_data = {
+                'original_image': image,
+                'file_info': file_info,
+                'sampling': sampling if stride is None else dict(sampling, stride=stride),
+                'spaces': partial_spaces,
+                'partial': True
+            }
+            partial_data.update(partial_spaces.to_image_data(color_space))
+            partial_callback(partial_data)
+        
+        if target_points is None and precision != 'reference' and BandPipeline.supports(source):
+            # 磁盘上的图像逐条带降采样和转换，不生成整幅降采样数组
+            pipeline = BandPipeline(source, sampling['stride'], area=area)
+            spaces = pipeline.run(
+                reduce_colors=reduce_colors,
+                color_bits=color_bits,
+                progress_callback=progress_callback,
+                partial_callback=on_partial if partial_callback is not None else None
+            )
+        elif (partial_callback is not None and target_points is None and not area and precision != 'reference'
+              and ProgressiveRefiner.supports(source, sampling['stride'])):
+            # 已解码的大图先按粗步长输出结果，再逐轮细化到目标步长
+            refiner = ProgressiveRefiner(source, sampling['stride'])
+            spaces = refiner.run(
+                reduce_colors=reduce_colors,
+                color_bits=color_bits,
+                progress_callback=progress_callback,
+                partial_callback=on_partial
+            )
+        else:
+            # 降采样
+            ImageProcessor.report_progress(progress_callback, 'downsample', 0.6)
+            if target_points is not None:
+                sampled_array = ImageProcessor.stratified_sample(source, target_points, seed)
+            else:
+                sampled_array = ImageProcessor.downsample_image(source, sampling['stride'], area)
+            
+            reduced = None
+            if reduce_colors and precision != 'reference':
+                # 颜色去重：只转换不同的颜色，不支持的数据类型退回逐像素转换
+                ImageProcessor.report_progress(progress_callback, 'reduce', 0.65)
+                reduced = reduce_rgb_colors(sampled_array, bits=color_bits)
+            
+            # 一次计算基础比值，其他颜色空间按需派生
+            ImageProcessor.report_progress(progress_callback, 'convert', 0.7)
+            if reduced is not None:
+                spaces = MultiSpaceResult.from_colors(*reduced)
+            elif precision == 'reference':
+                spaces = MultiSpaceResult.from_reference(sampled_array)
+            else:
+                spaces = MultiSpaceResult.from_pixels(sampled_array)
+        
+        # 合并重复坐标，绘图开销只与不同坐标的数量有关
+        ImageProcessor.report_progress(progress_callback, 'points', 0.85)
+        spaces.prepare_points(color_space)
+        ImageProcessor.report_progress(progress_callback, 'done', 1.0)
+        
+        image_data = {
             'original_image': image,
-            'x_data': x_data,
-            'y_data': y_data,
-            'x_label': x_label,
-            'y_label': y_label,
-            'point_count': len(x_data),
-            'file_info': file_info
+            'file_info': file_info,
+            'sampling': sampling,
+            'spaces': spaces
         }
+        image_data.update(spaces.to_image_data(color_space))
+        
+        # 记录每个取样点的处理耗时，用于按时间预算采样
+        sampling['points'] = image_data['point_count']
+        processing_cost_model.record(sampling['points'], time.perf_counter() - start_time)
+        return image_data
+
+
+class LoadMemoryStats:
+    """
+    图像加载的内存统计（进程内共享）
+    
+    记录每次加载后保留的完整分辨率像素和显示图像的字节数。设置环境变量
+    EASYLOOK_TRACE_LOAD_MEMORY=1（或调用方已启动tracemalloc）时同时记录加载过程中的峰值分配；
+    tracemalloc只统计Python和numpy的分配，不含Pillow内部的解码缓冲区，多个线程同时加载时峰值会叠加。
+    Python 3.8没有tracemalloc.reset_peak()：由本统计启动的跟踪通过重新启动来重置峰值，
+    调用方已启动的跟踪不能重启（会丢弃调用方的记录），此时不记录峰值。
+    """
+    
+    def __init__(self):
+        """初始化统计"""
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.last = None
+        self.max_peak_bytes = 0
+        
+        # 跟踪是否由本统计启动
+        self._owns_tracing = False
+    
+    @staticmethod
+    def tracing_enabled():
+        """是否需要跟踪峰值分配"""
+        return tracemalloc.is_tracing() or os.environ.get('EASYLOOK_TRACE_LOAD_MEMORY') == '1'
+    
+    def begin(self):
+        """
+        开始一次加载（需要时启动tracemalloc并重置峰值）
+        
+        Returns:
+            int: 开始时已跟踪的分配字节数，不跟踪时返回None
+        """
+        if not self.tracing_enabled():
+            return None
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        elif self._owns_tracing:
+            tracemalloc.stop()
+            tracemalloc.start()
+        else:
+            return None
+        return tracemalloc.get_traced_memory()[0]
+    
+    def record(self, image_path, image, baseline):
+        """
+        记录一次加载
+        
+        Args:
+            image_path: 图像文件路径
+            image: load_image返回的显示图像
+            baseline: begin()的返回值
+        """
+        pixels = ImageProcessor.get_pixel_array(image)
+        
+        # 内存映射和按需解码的像素不常驻内存
+        if isinstance(pixels, np.ndarray) and not isinstance(pixels, np.memmap):
+            pixel_bytes = pixels.nbytes
+        else:
+            pixel_bytes = 0
+        
+        peak_bytes = None
+        if baseline is not None and tracemalloc.is_tracing():
+            peak_bytes = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+        
+        with self._lock:
+            self.loads += 1
+            self.last = {
+                'filename': os.path.basename(image_path),
+                'pixel_bytes': pixel_bytes,
+                'display_bytes': image.width * image.height * len(image.getbands()),
+                'peak_bytes': peak_bytes
+            }
+            if peak_bytes is not None:
+                self.max_peak_bytes = max(self.max_peak_bytes, peak_bytes)
+    
+    def get_stats(self):
+        """
+        获取加载统计
+        
+        Returns:
+            dict: 加载次数、最近一次加载的统计（尚未加载时为None）和最大峰值分配
+        """
+        with self._lock:
+            return {
+                'loads': self.loads,
+                'last': dict(self.last) if self.last is not None else None,
+                'max_peak_bytes': self.max_peak_bytes
+            }
+
+
+# 全局图像加载内存统计实例
+load_memory_stats = LoadMemoryStats()
@@ -0,0 +1,271 @@
+"""
+图像会话模块
+每张加载的图像只解码一次，之后切换参数只重新执行降采样和颜色空间转换
+"""
+
+import os
+
+import numpy as np
+
+from modules.image_processor import ImageProcessor
+from modules.image_cache import decoded_image_cache
+from modules.result_cache import coordinate_cache
+from modules.color_spaces import MultiSpaceResult
+from modules.sampling import plan_sampling
+from modules.shared_results import SharedResult, SharedArray
+
+
+class ImageSession:
+    """单张已加载图像的会话，保存解码后的像素和文件信息"""
+    
+    def __init__(self, image_path, file_info, image=None, pixels=None):
+        """
+        初始化图像会话
+        
+        Args:
+            image_path: 图像文件路径
+            file_info: 文件信息字典
+            image: 已加载的PIL.Image对象，为None时在需要时再解码
+            pixels: 已解码的像素数组，为None时从image中获取
+        """
+        self.image_path = image_path
+        self.file_info = file_info
+        self.image = image
+        
+        # 解码后的像素数组，多次处理之间复用
+        if pixels is None and image is not None:
+            pixels = ImageProcessor.get_pixel_array(image)
+        self.pixels = pixels
+        
+        # 像素的解码缩放倍数（JPEG可按降采样率缩放解码）
+        self.decode_scale = getattr(image, 'decode_scale', 1)
+        
+        # 磁盘缓存命中时使用的缩略图（尚未解码完整图像时用于显示）
+        self.thumbnail = None
+    
+    @staticmethod
+    def open(image_path, progress_callback=None):
+        """
+        打开图像文件，创建会话
+        
+        像素的解码推迟到第一次需要时进行，磁盘缓存命中时完全不解码。
+        
+        Args:
+            image_path: 图像文件路径
+            progress_callback: 进度回调，可为None
+        
+        Returns:
+            ImageSession: 新的图像会话
+        """
+        ImageProcessor.report_progress(progress_callback, 'file_info', 0.0)
+        file_info = ImageProcessor.get_file_info(image_path)
+        
+        return ImageSession(image_path, file_info)
+    
+    @staticmethod
+    def open_and_process(image_path, color_space='rg_bg', sample_rate=10, progress_callback=None,
+                         precision='float32', reduce_colors=False, color_bits=None, partial_callback=None,
+                         sampling=None):
+        """
+        打开图像并按指定参数处理
+        
+        Args:
+            image_path: 图像文件路径
+            color_space: 颜色空间类型
+            sample_rate: 降采样率
+            progress_callback: 进度回调，可为None
+            precision: 计算精度 ('float32' 或 'reference')
+            reduce_colors: 是否先对颜色去重
+            color_bits: 去重时16位图像每通道保留的位数
+            partial_callback: 部分结果回调 partial_callback(image_data)，可为None
+            sampling: 采样方式和取样图案（见plan_sampling），为None时按降采样率规则取样
+        
+        Returns:
+            dict: 处理结果，'session'键保存新建的会话
+        """
+        session = ImageSession.open(image_path, progress_callback=progress_callback)
+        return session.process(color_space, sample_rate, progress_callback=progress_callback,
+                               precision=precision, reduce_colors=reduce_colors,
+                               color_bits=color_bits, partial_callback=partial_callback,
+                               sampling=sampling)
+    
+    def ensure_loaded(self, progress_callback=None, decode_scale=1):
+        """
+        确保图像已按指定缩放倍数解码（同一文件在各块之间共享一份解码结果）
+        
+        Args:
+            progress_callback: 进度回调，可为None
+            decode_scale: 解码缩放倍数，与已解码的倍数不同时重新获取
+        """
+        if self.pixels is None or self.decode_scale != decode_scale:
+            ImageProcessor.report_progress(progress_callback, 'load', 0.1)
+            self.image, self.pixels = decoded_image_cache.get_or_load(
+                self.image_path, decode_scale=decode_scale, metadata=self.file_info.get('metadata')
+            )
+            self.decode_scale = decode_scale
+    
+    @property
+    def display_image(self):
+        """用于显示的图像（未解码时使用缓存的缩略图）"""
+        return self.image if self.image is not None else self.thumbnail
+    
+    def process(self, color_space='rg_bg', sample_rate=10, progress_callback=None, precision='float32',
+                reduce_colors=False, color_bits=None, partial_callback=None, sampling=None):
+        """
+        按指定参数处理：优先读取磁盘缓存，否则用内存中的像素计算（不重复读取文件）
+        
+        Args:
+            color_space: 颜色空间类型
+            sample_rate: 降采样率
+            progress_callback: 进度回调，可为None
+            precision: 计算精度 ('float32' 或 'reference')
+            reduce_colors: 是否先对颜色去重
+            color_bits: 去重时16位图像每通道保留的位数
+            partial_callback: 部分结果回调 partial_callback(image_data)，逐条带处理时调用，可为None
+            sampling: 采样方式和取样图案（见plan_sampling），为None时按降采样率规则取样
+        
+        Returns:
+            dict: 处理结果，'session'键指向本会话
+        """
+        # 按点数或时间预算采样时由文件头中的尺寸确定步长，不需要先解码
+        plan = plan_sampling(self.file_info['width'], self.file_info['height'], sampling, sample_rate)
+        sample_rate = plan['sample_rate']
+        
+        # JPEG按与降采样率兼容的最大倍数缩放解码（结果与按步长取样不同，参与缓存键）
+        decode_scale = ImageProcessor.decode_scale(self.image_path, sample_rate, self.file_info.get('metadata'))
+        
+        # 缓存的是与颜色空间无关的基础比值，颜色空间不参与缓存键
+        params = {'sample_rate': sample_rate, 'precision': precision}
+        if decode_scale > 1:
+            params['decode_scale'] = decode_scale
+        if plan['target_points'] is not None:
+            params['stratified_points'] = plan['target_points']
+            params['seed'] = plan['seed']
+        if plan['area']:
+            params['area'] = True
+        if reduce_colors:
+            params['reduce_colors'] = True
+            params['color_bits'] = color_bits
+        
+        # 参考精度的色度结果无法由基础比值还原，不使用磁盘缓存
+        use_disk_cache = precision != 'reference'
+        
+        # 磁盘缓存命中时只需内存映射读取坐标
+        ImageProcessor.report_progress(progress_callback, 'cache', 0.05)
+        cached = coordinate_cache.load(self.image_path, params) if use_disk_cache else None
+        if cached is not None:
+            if self.thumbnail is None:
+                self.thumbnail = cached['thumbnail']
+            spaces = MultiSpaceResult.from_arrays(cached['arrays'])
+            ImageProcessor.report_progress(progress_callback, 'points', 0.5)
+            spaces.prepare_points(color_space)
+            image_data = {
+                'original_image': self.display_image,
+                'file_info': self.file_info,
+                'sampling': cached.get('sampling', ImageProcessor.sampling_info(sample_rate, decode_scale, plan['area'])),
+                'spaces': spaces
+            }
+            image_data.update(spaces.to_image_data(color_space))
+            ImageProcessor.report_progress(progress_callback, 'done', 1.0)
+        else:
+            self.ensure_loaded(progress_callback, decode_scale)
+            
+            on_partial = None
+            if partial_callback is not None:
+                def on_partial(partial_data):
+                    partial_data['session'] = self
+                    partial_callback(partial_data)
+            
+            image_data = ImageProcessor.process_loaded_image(
+                self.image,
+                self.file_info,
+                color_space,
+                sample_rate,
+                progress_callback=progress_callback,
+                pixels=self.pixels,
+                precision=precision,
+                reduce_colors=reduce_colors,
+                color_bits=color_bits,
+                partial_callback=on_partial,
+                target_points=plan['target_points'],
+                seed=plan['seed'],
+                area=plan['area']
+            )
+            if use_disk_cache:
+                coordinate_cache.store(
+                    self.image_path,
+                    params,
+                    image_data['spaces'].to_arrays(),
+                    {'sampling': image_data['sampling']},
+                    self.image
+                )
+        
+        image_data['session'] = self
+        return image_data
+    
+    def share_pixels(self):
+        """
+        把已解码在内存中的像素复制到共享内存，供工作进程处理时使用
+        
+        内存映射的TIFF和按需解码的TIFF在工作进程中重新打开的开销很小，尚未解码时（磁盘缓存命中）
+        工作进程同样会命中磁盘缓存，这些情况都不复制，返回None。
+        
+        Returns:
+            SharedArray: 共享内存中的像素（任务结束后由调用方释放），或None
+        """
+        pixels = self.pixels
+        if not isinstance(pixels, np.ndarray) or isinstance(pixels, np.memmap):
+            return None
+        return SharedArray.export(pixels, self.decode_scale)
+    
+    def matches(self, image_path):
+        """会话是否对应指定的文件路径"""
+        return image_path is not None and os.path.abspath(image_path) == os.path.abspath(self.image_path)
+
+
+def process_in_worker(image_path, color_space='rg_bg', sample_rate=10, precision='float32',
+                      reduce_colors=False, color_bits=None, sampling=None, pixels=None, file_info=None):
+    """
+    在工作进程中处理图像（供JobRunner.submit_process使用）
+    
+    界面进程通过共享内存传入已解码的像素时直接使用，不读取和解码文件（解码缩放倍数不符时才重新解码）；
+    否则打开文件处理。结果写入各进程共享的磁盘缓存。返回值只包含可以在进程间传递的部分，
+    不含显示图像和会话，其中的数组通过共享内存传回界面进程（见receive_result）。
+    
+    Args:
+        image_path: 图像文件路径
+        color_space: 颜色空间类型
+        sample_rate: 降采样率
+        precision: 计算精度 ('float32' 或 'reference')
+        reduce_colors: 是否先对颜色去重
+        color_bits: 去重时16位图像每通道保留的位数
+        sampling: 采样方式和取样图案（见plan_sampling），为None时按降采样率规则取样
+        pixels: 界面进程共享的已解码像素（SharedArray），为None时打开文件
+        file_info: 界面进程已有的文件信息，为None时读取文件头
+    
+    Returns:
+        SharedResult: 包含'file_info'、'sampling'和已准备好绘图点集的'spaces'的结果字典
+    """
+    if file_info is None:
+        file_info = ImageProcessor.get_file_info(image_path)
+    try:
+        image = ImageProcessor.from_pixels(pixels.attach(), pixels.decode_scale) if pixels is not None else None
+        image_data = ImageSession(image_path, file_info, image=image).process(
+            color_space, sample_rate,
+            precision=precision,
+            reduce_colors=reduce_colors,
+            color_bits=color_bits,
+            sampling=sampling
+        )
+        
+        # 只保留新计算的数组，会话和原图引用共享的像素
+        result = {
+            'file_info': image_data['file_info'],
+            'sampling': image_data['sampling'],
+            'spaces': image_data['spaces']
+        }
+        del image, image_data
+    finally:
+        if pixels is not None:
+            pixels.close()
+    return SharedResult.export(result)
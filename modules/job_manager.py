@@ -0,0 +1,432 @@
+"""
+后台任务模块
+在工作线程或工作进程中执行耗时的图像处理，并通过after()轮询把结果送回Tk主线程
+"""
+
+import os
+import threading
+import queue
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from modules.shared_results import SharedResult
+
+
+class JobCancelled(Exception):
+    """任务已被取消"""
+    pass
+
+
+class BackgroundJob:
+    """单个后台任务"""
+    
+    def __init__(self, key, func, args, kwargs, result_queue,
+                 on_success=None, on_error=None, on_progress=None, on_partial=None):
+        """
+        初始化后台任务
+        
+        Args:
+            key: 任务键，同一键下只保留最新的任务
+            func: 在工作线程中执行的函数，需接受progress_callback参数
+            args: 位置参数
+            kwargs: 关键字参数
+            result_queue: 结果队列（由JobRunner在主线程轮询）
+            on_success: 成功回调 on_success(result)，在主线程调用
+            on_error: 失败回调 on_error(exception)，在主线程调用
+            on_progress: 进度回调 on_progress(stage, fraction)，在主线程调用
+            on_partial: 部分结果回调 on_partial(result)，在主线程调用
+        """
+        self.key = key
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_partial = on_partial
+        self._queue = result_queue
+        self._cancel_event = threading.Event()
+        
+        # 在工作进程中执行时的Future
+        self.future = None
+        
+        # 任务结束后需要释放的资源（如传给工作进程的共享内存），需提供release()
+        self.resources = []
+    
+    @property
+    def cancelled(self):
+        """任务是否已被取消"""
+        return self._cancel_event.is_set()
+    
+    def cancel(self):
+        """请求取消任务（工作线程在下一个检查点退出；工作进程中尚未开始的任务不再执行）"""
+        self._cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+    
+    def report_progress(self, stage, fraction):
+        """
+        报告进度（在工作线程中调用）
+        
+        同时作为取消检查点：任务已取消时抛出JobCancelled
+        
+        Args:
+            stage: 阶段名称（如 'load', 'downsample', 'convert'）
+            fraction: 完成比例 0-1
+        """
+        if self.cancelled:
+            raise JobCancelled()
+        self._queue.put(('progress', self, (stage, fraction)))
+    
+    def report_partial(self, result):
+        """
+        报告部分结果（在工作线程中调用）
+        
+        Args:
+            result: 部分结果，任务结束前可能报告多次
+        """
+        if self.cancelled:
+            raise JobCancelled()
+        self._queue.put(('partial', self, result))
+    
+    def run(self):
+        """在工作线程中执行任务"""
+        if self.cancelled:
+            return
+        try:
+            result = self.func(*self.args, progress_callback=self.report_progress, **self.kwargs)
+        except JobCancelled:
+            self._queue.put(('cancelled', self, None))
+        except Exception as e:
+            self._queue.put(('error', self, e))
+        else:
+            self._queue.put(('done', self, result))
+    
+    def release_resources(self):
+        """释放任务占用的资源（任务结束后在主线程调用）"""
+        resources, self.resources = self.resources, []
+        for resource in resources:
+            resource.release()
+    
+    def on_future_done(self, future):
+        """工作进程中的任务结束（在进程池的管理线程中调用）"""
+        if future.cancelled():
+            self._queue.put(('cancelled', self, None))
+            return
+        error = future.exception()
+        if error is not None:
+            if isinstance(error, BrokenProcessPool):
+                process_pool.reset()
+            self._queue.put(('error', self, error))
+            return
+        
+        result = future.result()
+        if isinstance(result, SharedResult) and (self.cancelled or process_pool.closed):
+            # 结果不会再被取出（任务已取消或界面已关闭），不等主线程轮询，直接删除共享内存段
+            result.discard()
+        self._queue.put(('done', self, result))
+
+
+class ProcessPool:
+    """
+    工作进程池（进程内共享，惰性创建）
+    
+    使用spawn方式启动工作进程，不复制Tk主进程的状态和线程。任务函数必须是模块级函数，
+    参数和返回值需要可以pickle。某个工作进程异常退出时进程池失效，只有受影响的任务报告错误，
+    之后提交的任务使用新建的进程池。所有任务结束后空闲超过IDLE_SECONDS时关闭工作进程，释放其内存。
+    """
+    
+    # 默认工作进程数的上限（每个工作进程处理时需要一份降采样和转换的临时内存）
+    MAX_DEFAULT_WORKERS = 4
+    
+    # 空闲多久后关闭工作进程（秒）
+    IDLE_SECONDS = 30
+    
+    def __init__(self):
+        """初始化（工作进程数默认为CPU核数的一半且不超过MAX_DEFAULT_WORKERS，可通过环境变量 EASYLOOK_PROCESS_WORKERS 修改）"""
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = 0
+        self._idle_timer = None
+        # 界面关闭后不再接收结果
+        self.closed = False
+        default_workers = min(self.MAX_DEFAULT_WORKERS, max(1, (os.cpu_count() or 1) // 2))
+        self.workers = int(os.environ.get('EASYLOOK_PROCESS_WORKERS', default_workers))
+    
+    @property
+    def enabled(self):
+        """是否使用工作进程（工作进程数为0时在主进程的线程中处理）"""
+        return self.workers > 0
+    
+    def set_workers(self, workers):
+        """
+        修改工作进程数（正在执行的任务在旧进程池中完成）
+        
+        Args:
+            workers: 工作进程数，0表示不使用工作进程
+        """
+        with self._lock:
+            self.workers = max(0, int(workers))
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+    
+    def submit(self, func, *args, **kwargs):
+        """
+        在工作进程中执行函数
+        
+        Returns:
+            concurrent.futures.Future: 任务的Future
+        """
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=max(1, self.workers),
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            executor = self._executor
+        try:
+            future = executor.submit(func, *args, **kwargs)
+        except BrokenProcessPool:
+            self.reset()
+            return self.submit(func, *args, **kwargs)
+        with self._lock:
+            self._pending += 1
+        future.add_done_callback(self._on_task_done)
+        return future
+    
+    def _on_task_done(self, future):
+        """任务结束：所有任务都结束后开始空闲计时"""
+        with self._lock:
+            self._pending -= 1
+            if self._pending > 0 or self._executor is None:
+                return
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+            self._idle_timer = threading.Timer(self.IDLE_SECONDS, self._close_if_idle)
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+    
+    def _close_if_idle(self):
+        """空闲计时结束时仍没有任务则关闭工作进程，下次提交时重新创建"""
+        with self._lock:
+            if self._pending > 0:
+                return
+            executor, self._executor = self._executor, None
+            self._idle_timer = None
+        if executor is not None:
+            executor.shutdown(wait=False)
+    
+    def reset(self):
+        """丢弃已失效的进程池，下次提交时重新创建"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            self._shutdown(executor, wait=False)
+    
+    def shutdown(self):
+        """关闭进程池（取消尚未开始的任务，之后完成的任务的共享内存结果直接删除）"""
+        with self._lock:
+            self.closed = True
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            self._shutdown(executor, wait=True)
+    
+    @staticmethod
+    def _shutdown(executor, wait):
+        """关闭进程池并取消尚未开始的任务（Python 3.8没有cancel_futures参数，不取消）"""
+        try:
+            executor.shutdown(wait=wait, cancel_futures=True)
+        except TypeError:
+            executor.shutdown(wait=wait)
+
+
+class JobRunner:
+    """
+    绑定到Tk控件的后台任务调度器
+    
+    工作线程只负责计算，所有回调都在主线程中通过after()轮询触发。
+    同一个键提交新任务时，旧任务会被取消，其结果即使已算完也会被丢弃。
+    """
+    
+    # 所有JobRunner共享的工作线程池
+    _executor = None
+    _executor_lock = threading.Lock()
+    MAX_WORKERS = 4
+    
+    def __init__(self, widget, poll_interval=50):
+        """
+        初始化任务调度器
+        
+        Args:
+            widget: 用于after()轮询的Tk控件
+            poll_interval: 轮询间隔（毫秒）
+        """
+        self.widget = widget
+        self.poll_interval = poll_interval
+        self.active_jobs = {}
+        self._queue = queue.Queue()
+        self._polling = False
+        
+        # 已取消但工作进程可能仍在使用其资源的任务，结束后才能释放
+        self._releasing = set()
+    
+    @classmethod
+    def get_executor(cls):
+        """获取共享线程池（惰性创建）"""
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=cls.MAX_WORKERS,
+                    thread_name_prefix="easylook-job"
+                )
+            return cls._executor
+    
+    def submit(self, key, func, *args, on_success=None, on_error=None, on_progress=None,
+               on_partial=None, **kwargs):
+        """
+        提交后台任务，同键的旧任务会被取消
+        
+        Args:
+            key: 任务键
+            func: 任务函数，需接受progress_callback关键字参数；
+                  指定on_partial时还需接受partial_callback关键字参数
+            *args, **kwargs: 传给任务函数的参数
+            on_success, on_error, on_progress, on_partial: 主线程回调
+        
+        Returns:
+            BackgroundJob: 新任务
+        """
+        self.cancel(key)
+        
+        job = BackgroundJob(key, func, args, kwargs, self._queue,
+                            on_success=on_success, on_error=on_error, on_progress=on_progress,
+                            on_partial=on_partial)
+        if on_partial is not None:
+            job.kwargs['partial_callback'] = job.report_partial
+        self.active_jobs[key] = job
+        self.get_executor().submit(job.run)
+        self._ensure_polling()
+        return job
+    
+    def submit_process(self, key, func, *args, on_success=None, on_error=None, resources=(), **kwargs):
+        """
+        提交在工作进程中执行的任务，同键的旧任务会被取消
+        
+        多个任务分到进程池的各个工作进程中并行执行，每个任务完成后单独回调，
+        一个任务失败只影响该任务。工作进程中不报告进度和部分结果。
+        
+        Args:
+            key: 任务键
+            func: 模块级的任务函数（参数和返回值需要可以pickle）
+            *args, **kwargs: 传给任务函数的参数
+            on_success, on_error: 主线程回调
+            resources: 任务结束（完成、失败或被取消）后释放的资源，需提供release()
+        
+        Returns:
+            BackgroundJob: 新任务
+        """
+        self.cancel(key)
+        
+        job = BackgroundJob(key, func, args, kwargs, self._queue, on_success=on_success, on_error=on_error)
+        job.resources = list(resources)
+        try:
+            job.future = process_pool.submit(func, *args, **kwargs)
+        except BaseException:
+            job.release_resources()
+            raise
+        self.active_jobs[key] = job
+        job.future.add_done_callback(job.on_future_done)
+        self._ensure_polling()
+        return job
+    
+    def cancel(self, key):
+        """取消指定键的任务"""
+        job = self.active_jobs.pop(key, None)
+        if job is not None:
+            job.cancel()
+            # 工作进程中的任务在结束消息取出前继续轮询，以释放其资源和已写入共享内存的结果
+            if job.future is not None or job.resources:
+                self._releasing.add(job)
+                self._ensure_polling()
+    
+    def cancel_all(self):
+        """取消所有任务"""
+        for key in list(self.active_jobs.keys()):
+            self.cancel(key)
+    
+    def is_busy(self, key=None):
+        """是否有正在执行的任务"""
+        if key is None:
+            return len(self.active_jobs) > 0
+        return key in self.active_jobs
+    
+    def _ensure_polling(self):
+        """启动轮询（如果尚未启动）"""
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_interval, self._poll)
+    
+    def _poll(self):
+        """在主线程中处理工作线程送回的消息"""
+        try:
+            self._drain_queue()
+        finally:
+            # 还有任务未完成或资源未释放时继续轮询
+            if self.active_jobs or self._releasing:
+                try:
+                    self.widget.after(self.poll_interval, self._poll)
+                except Exception:
+                    # 控件已被销毁
+                    self._polling = False
+            else:
+                self._polling = False
+    
+    def _drain_queue(self):
+        """取出并分发队列中的所有消息"""
+        while True:
+            try:
+                kind, job, payload = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            
+            # 任务结束后工作进程不再使用其资源
+            if kind in ('done', 'error', 'cancelled'):
+                job.release_resources()
+                self._releasing.discard(job)
+            
+            # 过期或已取消的任务，丢弃其消息（工作进程已写入共享内存的结果随之释放）
+            if job.cancelled or self.active_jobs.get(job.key) is not job:
+                if kind == 'done' and isinstance(payload, SharedResult):
+                    payload.release()
+                continue
+            
+            if kind == 'progress':
+                if job.on_progress:
+                    job.on_progress(*payload)
+                continue
+            
+            if kind == 'partial':
+                if job.on_partial:
+                    job.on_partial(payload)
+                continue
+            
+            # 任务结束
+            del self.active_jobs[job.key]
+            if kind == 'done':
+                if job.on_success:
+                    job.on_success(payload)
+            elif kind == 'error':
+                if job.on_error:
+                    job.on_error(payload)
+
+
+# 全局工作进程池实例
+process_pool = ProcessPool()
@@ -49,6 +49,8 @@ class LanguageManager:
             'max_value': '最大值:',
             'apply_range': '应用范围',
             'auto_range': '自动范围',
+            'clip_percent': '裁剪(%):',
+            'invalid_clip_percent': '裁剪百分比必须是0到50之间的数字（不含50）',
             'save_plot': '保存图表',
             'please_upload': '请上传图片',
             'add_image': '添加图片',
@@ -59,6 +61,47 @@ class LanguageManager:
             'downsample': '降采样',
             'point_size': '点大小:',
             
+            # 后台处理
+            'processing': '处理中...',
+            'processing_stage': '处理中: {stage} {percent}%',
+            'processing_count': '正在处理 {count} 张图片...',
+            'stage_load': '加载图像',
+            'stage_file_info': '读取文件信息',
+            'stage_cache': '读取缓存',
+            'stage_downsample': '降采样',
+            'stage_reduce': '颜色去重',
+            'stage_convert': '颜色空间转换',
+            'stage_band': '逐条带处理',
+            'stage_refine': '逐步细化',
+            'refining': '细化中…',
+            'stage_points': '合并重复点',
+            'stage_done': '完成',
+            
+            # 处理选项
+            'reduce_colors': '颜色去重',
+            'color_bits': '16位量化位数:',
+            'invalid_color_bits': '无效的量化位数，请输入1-16之间的整数',
+            'render_mode': '显示模式:',
+            'density_scale': '密度缩放:',
+            
+            # 缓存
+            'link_axes': '联动坐标轴',
+            'cache_stats': '缓存统计',
+            'render_stats': '绘制统计',
+            'process_workers': '工作进程数...',
+            'process_workers_prompt': '同时刷新多张图片时使用的工作进程数（0表示不使用工作进程）：',
+            'process_workers_set': '工作进程数已设为 {workers}',
+            'render_stats_line': '{name}: 绘制 {draws} 次 / 操作 {actions} 次，最近一次操作绘制 {last_action_draws} 次，单次操作最多 {max_action_draws} 次',
+            'clear_disk_cache': '清除磁盘缓存',
+            'confirm_clear_disk_cache': '确定要清除磁盘缓存吗？（当前占用 {size} MB）',
+            'status_disk_cache_cleared': '磁盘缓存已清除',
+            'cache_stats_text': '解码图像缓存\n\n命中: {hits}\n未命中: {misses}\n淘汰: {evictions}\n缓存图像数: {entries}\n内存占用: {current_mb:.1f} MB / {budget_mb:.0f} MB',
+            'tiff_decode_stats_text': 'TIFF条带/分块解码\n\n已解压: {chunks_decoded}\n已跳过: {chunks_skipped}\n读取的压缩数据: {compressed_mb:.1f} MB\n解压后的数据: {decompressed_mb:.1f} MB',
+            'load_memory_stats_text': '图像加载内存\n\n加载次数: {loads}\n最近一次: {filename}\n完整分辨率像素: {pixel_mb:.1f} MB\n显示图像: {display_mb:.1f} MB\n峰值分配: {peak}',
+            'load_memory_stats_empty': '图像加载内存\n\n尚未加载图像',
+            'load_memory_peak': '{peak_mb:.1f} MB（最大 {max_peak_mb:.1f} MB）',
+            'load_memory_untraced': '未跟踪（设置环境变量 EASYLOOK_TRACE_LOAD_MEMORY=1 后启用）',
+            
             # 颜色选择器
             'select_color': '选择颜色',
             'current_color': '当前颜色',
@@ -78,6 +121,21 @@ class LanguageManager:
             'file_size': '文件大小:',
             'dimensions': '尺寸:',
             'pixels': '像素',
+            'image_format': '格式:',
+            'format_bits_channels': '{bit_depth}位 × {channels}通道',
+            'format_uncompressed': '未压缩',
+            'format_tiled': '分块 {tile_width}×{tile_height}',
+            'point_count': '数据点:',
+            'distinct_points': '不同坐标 {count}',
+            'sampling_method': '取样方式:',
+            'sampling_stride': '步长 1/{stride}',
+            'sampling_decoder': 'JPEG解码缩放 1/{decode_scale}（块平均）+ 步长 1/{stride}',
+            'sampling_stratified': '分层随机取样 {points:,}点（种子 {seed}）',
+            'sampling_area': '区域平均 {block}×{block}',
+            'sampling_mode': '采样方式:',
+            'sampling_pattern': '取样图案:',
+            'target_points': '目标点数:',
+            'latency_budget': '时间预算(ms):',
             
             # 颜色空间选项
             'rg_bg_space': '(r/g, b/g空间)',
@@ -109,6 +167,7 @@ class LanguageManager:
             'save_plot_error': '保存图表时出错: {error}',
             'enter_sample_rate': '请输入降采样率 (1-1000):',
             'invalid_sample_rate': '无效的降采样率，请输入1-1000之间的整数',
+            'invalid_sampling_value': '无效的目标点数或时间预算，请输入大于0的数',
             'comparison_mode_title': '图像颜色空间对比分析',
             
             # 帮助文本
@@ -198,6 +257,8 @@ class LanguageManager:
             'max_value': 'Max:',
             'apply_range': 'Apply Range',
             'auto_range': 'Auto Range',
+            'clip_percent': 'Clip (%):',
+            'invalid_clip_percent': 'Clip percentage must be a number from 0 up to (but not including) 50',
             'save_plot': 'Save Plot',
             'please_upload': 'Please upload an image',
             'add_image': 'Add Image',
@@ -208,6 +269,47 @@ class LanguageManager:
             'downsample': 'Downsample',
             'point_size': 'Point Size:',
             
+            # Background processing
+            'processing': 'Processing...',
+            'processing_stage': 'Processing: {stage} {percent}%',
+            'processing_count': 'Processing {count} image(s)...',
+            'stage_load': 'Loading image',
+            'stage_file_info': 'Reading file info',
+            'stage_cache': 'Reading cache',
+            'stage_downsample': 'Downsampling',
+            'stage_reduce': 'Color reduction',
+            'stage_convert': 'Color space conversion',
+            'stage_band': 'Processing bands',
+            'stage_refine': 'Refining',
+            'refining': 'refining…',
+            'stage_points': 'Merging duplicate points',
+            'stage_done': 'Done',
+            
+            # Processing options
+            'reduce_colors': 'Unique colors',
+            'color_bits': '16-bit bits/channel:',
+            'invalid_color_bits': 'Invalid bits per channel, please enter an integer between 1-16',
+            'render_mode': 'Display mode:',
+            'density_scale': 'Density scale:',
+            
+            # Cache
+            'link_axes': 'Link Axes',
+            'cache_stats': 'Cache Statistics',
+            'render_stats': 'Render Statistics',
+            'process_workers': 'Worker Processes...',
+            'process_workers_prompt': 'Worker processes used when refreshing several images (0 disables worker processes):',
+            'process_workers_set': 'Worker processes set to {workers}',
+            'render_stats_line': '{name}: {draws} draws / {actions} actions, last action {last_action_draws} draw(s), max {max_action_draws} per action',
+            'clear_disk_cache': 'Clear Disk Cache',
+            'confirm_clear_disk_cache': 'Are you sure you want to clear the disk cache? ({size} MB in use)',
+            'status_disk_cache_cleared': 'Disk cache cleared',
+            'cache_stats_text': 'Decoded image cache\n\nHits: {hits}\nMisses: {misses}\nEvictions: {evictions}\nCached images: {entries}\nMemory: {current_mb:.1f} MB / {budget_mb:.0f} MB',
+            'tiff_decode_stats_text': 'TIFF strip/tile decoding\n\nDecompressed: {chunks_decoded}\nSkipped: {chunks_skipped}\nCompressed data read: {compressed_mb:.1f} MB\nDecompressed data: {decompressed_mb:.1f} MB',
+            'load_memory_stats_text': 'Image loading memory\n\nLoads: {loads}\nLast: {filename}\nFull-resolution pixels: {pixel_mb:.1f} MB\nDisplay image: {display_mb:.1f} MB\nPeak allocation: {peak}',
+            'load_memory_stats_empty': 'Image loading memory\n\nNo image loaded yet',
+            'load_memory_peak': '{peak_mb:.1f} MB (max {max_peak_mb:.1f} MB)',
+            'load_memory_untraced': 'not traced (set EASYLOOK_TRACE_LOAD_MEMORY=1 to enable)',
+            
             # Color picker
             'select_color': 'Select Color',
             'current_color': 'Current Color',
@@ -227,6 +329,21 @@ class LanguageManager:
             'file_size': 'File Size:',
             'dimensions': 'Dimensions:',
             'pixels': 'pixels',
+            'image_format': 'Format:',
+            'format_bits_channels': '{bit_depth}-bit × {channels} channels',
+            'format_uncompressed': 'uncompressed',
+            'format_tiled': 'tiles {tile_width}×{tile_height}',
+            'point_count': 'Data points:',
+            'distinct_points': '{count} distinct',
+            'sampling_method': 'Sampling:',
+            'sampling_stride': 'stride 1/{stride}',
+            'sampling_decoder': 'JPEG decode at 1/{decode_scale} (block average) + stride 1/{stride}',
+            'sampling_stratified': 'stratified random, {points:,} points (seed {seed})',
+            'sampling_area': 'area average {block}×{block}',
+            'sampling_mode': 'Sampling mode:',
+            'sampling_pattern': 'Pattern:',
+            'target_points': 'Target points:',
+            'latency_budget': 'Time budget (ms):',
             
             # Color space options
             'rg_bg_space': '(r/g, b/g space)',
@@ -258,6 +375,7 @@ class LanguageManager:
             'save_plot_error': 'Error saving plot: {error}',
             'enter_sample_rate': 'Enter sample rate (1-1000):',
             'invalid_sample_rate': 'Invalid sample rate, please enter an integer between 1-1000',
+            'invalid_sampling_value': 'Invalid target point count or time budget, please enter a positive number',
             'comparison_mode_title': 'Image Color Space Comparison Analysis',
             
             # Help text
@@ -4,10 +4,15 @@
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, simpledialog
 from modules.image_block import ImageBlock
 from modules.comparison_mode import ComparisonMode
 from modules.language_manager import language_manager
+from modules.image_cache import decoded_image_cache
+from modules.tiff_reader import tiff_decode_stats
+from modules.image_processor import load_memory_stats
+from modules.result_cache import coordinate_cache
+from modules.job_manager import process_pool
 
 
 class MainWindow:
@@ -26,6 +31,9 @@ class MainWindow:
         self.multi_block_frame = None
         self.comparison_frame = None
         
+        # 联动坐标轴：缩放或平移一个块时其他块使用相同的范围
+        self.link_axes_var = tk.BooleanVar(value=False)
+        
         # 注册语言变化观察者
         language_manager.register_observer(self.update_language)
         
@@ -106,6 +114,7 @@ class MainWindow:
                     # 创建图片块
                     image_block = ImageBlock(separator_frame, block_id)
                     image_block.grid(row=0, column=0, sticky="nsew")
+                    image_block.view_change_callback = self.on_block_view_change
                     
                     self.image_blocks.append(image_block)
                     block_id += 1
@@ -124,6 +133,9 @@ class MainWindow:
     
     def _on_mousewheel(self, event):
         """处理鼠标滚轮事件"""
+        # 统计图上的滚轮用于缩放，不滚动页面
+        if any(event.widget is block.canvas.get_tk_widget() for block in self.image_blocks):
+            return
         if hasattr(self, 'canvas'):
             self.canvas.yview_scroll(int(-1*(event.delta/120)), "units")
         
@@ -229,6 +241,10 @@ class MainWindow:
             label=language_manager.get('clear_all_blocks'), 
             command=self.clear_all_blocks
         )
+        self.file_menu.add_command(
+            label=language_manager.get('clear_disk_cache'), 
+            command=self.clear_disk_cache
+        )
         self.file_menu.add_separator()
         self.file_menu.add_command(
             label=language_manager.get('exit'), 
@@ -265,6 +281,23 @@ class MainWindow:
             label=language_manager.get('auto_adjust_all_axes'), 
             command=self.auto_adjust_all_axes
         )
+        self.view_menu.add_checkbutton(
+            label=language_manager.get('link_axes'),
+            variable=self.link_axes_var
+        )
+        self.view_menu.add_separator()
+        self.view_menu.add_command(
+            label=language_manager.get('cache_stats'), 
+            command=self.show_cache_stats
+        )
+        self.view_menu.add_command(
+            label=language_manager.get('render_stats'), 
+            command=self.show_render_stats
+        )
+        self.view_menu.add_command(
+            label=language_manager.get('process_workers'), 
+            command=self.set_process_workers
+        )
         
         # 语言菜单
         self.language_menu = tk.Menu(self.menubar, tearoff=0)
@@ -320,7 +353,8 @@ class MainWindow:
         
         # 更新文件菜单项
         self.file_menu.entryconfig(0, label=language_manager.get('clear_all_blocks'))
-        self.file_menu.entryconfig(2, label=language_manager.get('exit'))
+        self.file_menu.entryconfig(1, label=language_manager.get('clear_disk_cache'))
+        self.file_menu.entryconfig(3, label=language_manager.get('exit'))
         
         # 更新模式菜单项
         self.mode_menu.entryconfig(0, label=language_manager.get('multi_block_mode'))
@@ -329,6 +363,10 @@ class MainWindow:
         # 更新视图菜单项
         self.view_menu.entryconfig(0, label=language_manager.get('refresh_all_plots'))
         self.view_menu.entryconfig(1, label=language_manager.get('auto_adjust_all_axes'))
+        self.view_menu.entryconfig(2, label=language_manager.get('link_axes'))
+        self.view_menu.entryconfig(4, label=language_manager.get('cache_stats'))
+        self.view_menu.entryconfig(5, label=language_manager.get('render_stats'))
+        self.view_menu.entryconfig(6, label=language_manager.get('process_workers'))
         
         # 更新语言菜单项
         self.language_menu.entryconfig(0, label=language_manager.get('chinese'))
@@ -372,14 +410,11 @@ class MainWindow:
         if result:
             for block in self.image_blocks:
                 # 重置每个块
+                block.cancel_processing()
                 block.current_image_path = None
                 block.image_data = None
                 block.original_label.config(image="", text=language_manager.get('please_upload'))
-                block.ax.clear()
-                block.ax.set_xlabel('x')
-                block.ax.set_ylabel('y')
-                block.ax.grid(True, alpha=0.3)
-                block.canvas.draw()
+                block.clear_plot()
                 block.refresh_btn.config(state="disabled")
                 block.save_plot_btn.config(state="disabled")
                 
@@ -390,6 +425,17 @@ class MainWindow:
             
             self.status_label.config(text=language_manager.get('status_all_cleared'))
             
+    def clear_disk_cache(self):
+        """清除颜色空间坐标磁盘缓存"""
+        size_mb = coordinate_cache.get_size() / (1024 * 1024)
+        result = messagebox.askyesno(
+            language_manager.get('confirm'),
+            language_manager.get('confirm_clear_disk_cache', size=f"{size_mb:.1f}")
+        )
+        if result:
+            coordinate_cache.clear()
+            self.status_label.config(text=language_manager.get('status_disk_cache_cleared'))
+            
     def refresh_all_plots(self):
         """刷新所有统计图（仅在多块模式下有效）"""
         if self.current_mode != "multi_block":
@@ -399,11 +445,13 @@ class MainWindow:
             )
             return
             
+        # 多个图像块同时刷新时分到工作进程中并行处理
+        blocks = [block for block in self.image_blocks if block.current_image_path]
+        in_process = len(blocks) > 1
         refreshed_count = 0
-        for block in self.image_blocks:
-            if block.current_image_path:
-                block.refresh_plot()
-                refreshed_count += 1
+        for block in blocks:
+            block.refresh_plot(in_process=in_process)
+            refreshed_count += 1
         
         if refreshed_count > 0:
             self.status_label.config(text=language_manager.get('status_refreshed', count=refreshed_count))
@@ -436,6 +484,109 @@ class MainWindow:
                 language_manager.get('no_plots_to_adjust')
             )
             
+    def on_block_view_change(self, source, xlim, ylim):
+        """
+        图片块交互缩放平移后的回调，联动模式下把新范围应用到其他块
+        
+        各块只标记坐标轴范围已修改，在同一轮空闲时各自绘制一次。
+        
+        Args:
+            source: 发生交互的图片块
+            xlim: 新的x范围
+            ylim: 新的y范围
+        """
+        if not self.link_axes_var.get():
+            return
+        
+        for block in self.image_blocks:
+            if block is not source:
+                block.set_axis_range(xlim, ylim)
+                
+    def show_cache_stats(self):
+        """显示解码图像缓存统计、TIFF解码统计和图像加载内存统计"""
+        stats = decoded_image_cache.get_stats()
+        decode_stats = tiff_decode_stats.get_stats()
+        load_stats = load_memory_stats.get_stats()
+        messagebox.showinfo(
+            language_manager.get('cache_stats'),
+            language_manager.get(
+                'cache_stats_text',
+                hits=stats['hits'],
+                misses=stats['misses'],
+                evictions=stats['evictions'],
+                entries=stats['entries'],
+                current_mb=stats['current_bytes'] / (1024 * 1024),
+                budget_mb=stats['budget_bytes'] / (1024 * 1024)
+            ) + "\n\n" + language_manager.get(
+                'tiff_decode_stats_text',
+                chunks_decoded=decode_stats['chunks_decoded'],
+                chunks_skipped=decode_stats['chunks_skipped'],
+                compressed_mb=decode_stats['compressed_bytes'] / (1024 * 1024),
+                decompressed_mb=decode_stats['decompressed_bytes'] / (1024 * 1024)
+            ) + "\n\n" + self.format_load_memory_stats(load_stats)
+        )
+        
+    def format_load_memory_stats(self, stats):
+        """
+        格式化图像加载内存统计
+        
+        Args:
+            stats: load_memory_stats.get_stats()的结果
+        
+        Returns:
+            str: 显示文本
+        """
+        last = stats['last']
+        if last is None:
+            return language_manager.get('load_memory_stats_empty')
+        
+        if last['peak_bytes'] is None:
+            peak = language_manager.get('load_memory_untraced')
+        else:
+            peak = language_manager.get(
+                'load_memory_peak',
+                peak_mb=last['peak_bytes'] / (1024 * 1024),
+                max_peak_mb=stats['max_peak_bytes'] / (1024 * 1024)
+            )
+        return language_manager.get(
+            'load_memory_stats_text',
+            loads=stats['loads'],
+            filename=last['filename'],
+            pixel_mb=last['pixel_bytes'] / (1024 * 1024),
+            display_mb=last['display_bytes'] / (1024 * 1024),
+            peak=peak
+        )
+        
+    def show_render_stats(self):
+        """显示各画布的绘制统计（每次操作应只绘制一次）"""
+        canvases = [
+            (f"{language_manager.get('image_block')} {block.block_id}", block.render_scheduler)
+            for block in self.image_blocks
+        ]
+        if self.comparison_frame:
+            canvases.append((language_manager.get('comparison_mode'), self.comparison_frame.render_scheduler))
+        
+        lines = []
+        for name, scheduler in canvases:
+            stats = scheduler.get_stats()
+            lines.append(language_manager.get('render_stats_line', name=name, **stats))
+        
+        messagebox.showinfo(language_manager.get('render_stats'), "\n".join(lines))
+        
+    def set_process_workers(self):
+        """设置批量处理使用的工作进程数（0表示在主进程的线程中处理）"""
+        workers = simpledialog.askinteger(
+            language_manager.get('process_workers'),
+            language_manager.get('process_workers_prompt'),
+            initialvalue=process_pool.workers,
+            minvalue=0,
+            parent=self.root
+        )
+        if workers is None:
+            return
+        process_pool.set_workers(workers)
+        self.status_label.config(text=language_manager.get('process_workers_set', workers=workers))
+        
     def show_help(self):
         """显示使用说明"""
         help_text = language_manager.get('help_text')
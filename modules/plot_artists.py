@@ -0,0 +1,199 @@
+"""
+数据集绘图对象模块
+每个数据集保留自己的matplotlib绘图对象，数据或样式变化时原地更新，不再清空坐标轴重新绘制；
+散点图只绘制视图范围内的点，并限制每个视图的点数
+"""
+
+import numpy as np
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
+
+from modules.density import draw_density, update_density, get_grid_shape
+from modules.spatial_index import DEFAULT_VIEW_BUDGET
+
+
+class DatasetArtist:
+    """
+    单个数据集的绘图对象
+    
+    散点图按不透明度分组，每组一个统一颜色的PathCollection，通过set_offsets、set_sizes、set_alpha等原地更新；
+    密度图使用一个AxesImage，通过set_data原地更新。两者按显示模式切换可见性。
+    有空间索引时散点图只包含当前视图内的点，超过点数预算时按网格分层抽稀（细节层次）。
+    """
+    
+    def __init__(self, ax):
+        """
+        初始化绘图对象（首次update时才真正创建matplotlib对象）
+        
+        Args:
+            ax: matplotlib坐标轴
+        """
+        self.ax = ax
+        self.scatters = []
+        self.density = None
+        
+        self.points = None
+        self.index = None
+        self.budget = DEFAULT_VIEW_BUDGET
+        self.color = None
+        self.label = None
+        self.size = 1.0
+        self.alpha = 1.0
+        self.mode = 'scatter'
+        self.scale = 'linear'
+        
+        # 散点当前使用的点集和样式，未变化时跳过更新
+        self._scatter_points = None
+        self._scatter_style = None
+        
+        # 当前视图查询对应的 (索引, 范围, 预算) 及查询结果
+        self._view_key = None
+        self._view_points = None
+        
+        # 密度图当前对应的 (点集, 范围, 网格尺寸, 缩放, 颜色)
+        self._density_key = None
+    
+    def update(self, points, color, size, alpha, label=None, mode='scatter', scale='linear',
+               index=None, budget=DEFAULT_VIEW_BUDGET):
+        """
+        更新数据和样式
+        
+        只记录状态，散点和密度网格在refresh_view中按最终的坐标轴范围更新。
+        
+        Args:
+            points: 绘图点集（PointSet）
+            color: 数据集颜色
+            size: 散点大小
+            alpha: 单个像素的透明度
+            label: 图例标签
+            mode: 显示模式 ('scatter' 或 'density')
+            scale: 密度缩放方式 ('linear' 或 'log')
+            index: 点集的空间索引（GridIndex），为None时绘制全部点
+            budget: 散点模式下每个视图最多绘制的点数（有空间索引时有效）
+        """
+        self.points = points
+        self.index = index
+        self.budget = budget
+        self.color = color
+        self.label = label
+        self.size = size
+        self.alpha = alpha
+        self.mode = mode
+        self.scale = scale
+        
+        if mode == 'scatter':
+            if self.density is not None:
+                self.density.set_visible(False)
+        else:
+            for scatter in self.scatters:
+                scatter.set_visible(False)
+            if self.density is not None:
+                self.density.set_visible(True)
+    
+    def refresh_view(self, shape=None):
+        """
+        按坐标轴当前范围更新散点或密度图（在设置好坐标轴范围后调用）
+        
+        Args:
+            shape: 密度网格尺寸 (列数, 行数)，为None时按坐标轴像素大小确定
+        """
+        if self.points is None:
+            return
+        if self.mode == 'scatter':
+            self._update_scatter(self._visible_points())
+        else:
+            self.refresh_density(shape)
+    
+    def _visible_points(self):
+        """
+        获取当前视图需要绘制的点（范围和预算未变化时复用上次的查询结果）
+        
+        Returns:
+            PointSet: 需要绘制的点集
+        """
+        if self.index is None or self.index.points is not self.points:
+            return self.points
+        
+        key = (self.index, self.ax.get_xlim(), self.ax.get_ylim(), self.budget)
+        if key != self._view_key:
+            self._view_points = self.index.query(key[1], key[2], self.budget)
+            self._view_key = key
+        return self._view_points
+    
+    def _update_scatter(self, points):
+        """
+        创建或原地更新散点图
+        
+        Args:
+            points: 需要绘制的点集
+        """
+        # 点集或样式变化时重新分组，已有的分组对象原地更新，多余的移除
+        style = (self.color, self.alpha)
+        if points is not self._scatter_points or style != self._scatter_style:
+            groups = points.alpha_groups(self.alpha)
+            for i, (x, y, group_alpha) in enumerate(groups):
+                if i < len(self.scatters):
+                    scatter = self.scatters[i]
+                    scatter.set_offsets(np.column_stack((x, y)))
+                    scatter.set_facecolor(self.color)
+                else:
+                    scatter = self.ax.scatter(x, y, s=self.size, c=self.color)
+                    self.scatters.append(scatter)
+                scatter.set_alpha(group_alpha)
+            
+            for scatter in self.scatters[len(groups):]:
+                scatter.remove()
+            del self.scatters[len(groups):]
+            
+            self._scatter_points = points
+            self._scatter_style = style
+        
+        for scatter in self.scatters:
+            scatter.set_sizes([self.size])
+            scatter.set_visible(True)
+    
+    def refresh_density(self, shape=None):
+        """
+        按坐标轴当前范围更新密度图（范围、网格尺寸和数据都未变化时不重新分箱）
+        
+        Args:
+            shape: 网格尺寸 (列数, 行数)，为None时按坐标轴像素大小确定
+        """
+        if self.mode != 'density' or self.points is None or len(self.points) == 0:
+            return
+        
+        if shape is None:
+            shape = get_grid_shape(self.ax)
+        key = (self.points, self.ax.get_xlim(), self.ax.get_ylim(), shape, self.scale, self.color)
+        if key == self._density_key:
+            return
+        
+        if self.density is None:
+            self.density = draw_density(self.ax, self.points, self.color, self.scale, shape=shape)
+        else:
+            update_density(self.density, self.ax, self.points, self.color, self.scale, shape=shape)
+        self._density_key = key
+    
+    def legend_handle(self):
+        """
+        生成图例项（使用不透明的数据集颜色）
+        
+        Returns:
+            Artist: 图例代理对象
+        """
+        if self.mode == 'density':
+            return Patch(color=self.color, label=self.label)
+        return Line2D([], [], marker='o', linestyle='', color=self.color, label=self.label)
+    
+    def remove(self):
+        """从坐标轴上移除绘图对象"""
+        for scatter in self.scatters:
+            scatter.remove()
+        self.scatters = []
+        if self.density is not None:
+            self.density.remove()
+            self.density = None
+        self._scatter_points = None
+        self._density_key = None
+        self._view_key = None
+        self._view_points = None
@@ -0,0 +1,192 @@
+"""
+交互缩放平移模块
+鼠标滚轮缩放、左键拖动平移。交互过程中只把缓存的绘图快照按新范围贴到坐标轴区域（blit），
+不重新绘制数据点，交互帧率与数据点数量无关；交互结束后才按新范围完整绘制一次
+"""
+
+import numpy as np
+
+
+class PlotNavigator:
+    """
+    单个坐标轴的缩放平移控制器
+    
+    交互开始时把坐标轴区域已绘制好的像素复制为快照，作为一个动画图像放在旧的显示范围上。
+    每一帧只修改坐标轴范围，重画背景、快照图像和边框，再blit坐标轴区域。
+    交互结束（松开鼠标或滚轮停止一段时间）后移除快照，通过回调提交新的范围。
+    """
+    
+    # 每格滚轮的缩放倍数
+    ZOOM_STEP = 1.2
+    
+    # 滚轮停止多久后提交新范围（毫秒）
+    COMMIT_DELAY = 250
+    
+    def __init__(self, widget, canvas, ax, on_view_change):
+        """
+        初始化控制器并绑定鼠标事件
+        
+        Args:
+            widget: 用于after调度的Tk组件
+            canvas: FigureCanvasTkAgg画布
+            ax: matplotlib坐标轴
+            on_view_change: 交互结束回调 on_view_change(xlim, ylim)
+        """
+        self.widget = widget
+        self.canvas = canvas
+        self.ax = ax
+        self.on_view_change = on_view_change
+        
+        # 交互期间的快照图像
+        self.preview = None
+        
+        # 拖动起点 (像素x, 像素y, xlim, ylim)
+        self._drag_start = None
+        # 按下后鼠标是否移动过
+        self._moved = False
+        # 按下时是否有尚未提交的滚轮缩放
+        self._press_pending = False
+        self._commit_pending = None
+        
+        # 交互帧数统计
+        self.frame_count = 0
+        
+        canvas.mpl_connect('scroll_event', self._on_scroll)
+        canvas.mpl_connect('button_press_event', self._on_press)
+        canvas.mpl_connect('motion_notify_event', self._on_motion)
+        canvas.mpl_connect('button_release_event', self._on_release)
+    
+    @property
+    def active(self):
+        """是否正在交互"""
+        return self.preview is not None
+    
+    def _begin(self):
+        """
+        开始交互：把坐标轴区域当前的像素缓存为快照
+        
+        Returns:
+            bool: 是否可以开始（画布尚未绘制时无法取得快照）
+        """
+        if self.preview is not None:
+            return True
+        
+        try:
+            region = self.canvas.copy_from_bbox(self.ax.bbox)
+        except (AttributeError, RuntimeError):
+            return False
+        snapshot = np.array(region, copy=True)
+        
+        x0, x1 = self.ax.get_xlim()
+        y0, y1 = self.ax.get_ylim()
+        self.preview = self.ax.imshow(
+            snapshot,
+            extent=(x0, x1, y0, y1),
+            origin='upper',
+            aspect='auto',
+            interpolation='nearest',
+            animated=True,
+            zorder=10
+        )
+        
+        # imshow可能修改显示范围，恢复为快照对应的范围
+        self.ax.set_xlim(x0, x1)
+        self.ax.set_ylim(y0, y1)
+        return True
+    
+    def _blit(self):
+        """按当前范围重画快照并只刷新坐标轴区域"""
+        self.ax.draw_artist(self.ax.patch)
+        self.ax.draw_artist(self.preview)
+        for spine in self.ax.spines.values():
+            self.ax.draw_artist(spine)
+        self.canvas.blit(self.ax.bbox)
+        self.frame_count += 1
+    
+    def _end(self):
+        """结束交互：移除快照并提交新范围"""
+        self._commit_pending = None
+        if self.preview is None:
+            return
+        
+        self.preview.remove()
+        self.preview = None
+        self.on_view_change(self.ax.get_xlim(), self.ax.get_ylim())
+    
+    def cancel(self):
+        """放弃正在进行的交互（恢复由调用方负责）"""
+        if self._commit_pending is not None:
+            self.widget.after_cancel(self._commit_pending)
+            self._commit_pending = None
+        self._drag_start = None
+        if self.preview is not None:
+            self.preview.remove()
+            self.preview = None
+    
+    def _on_scroll(self, event):
+        """滚轮缩放（以鼠标位置为中心）"""
+        if event.inaxes is not self.ax or self._drag_start is not None:
+            return
+        if not self._begin():
+            return
+        
+        # 向上滚动放大，step为滚动格数（向上为正）
+        factor = self.ZOOM_STEP ** -event.step
+        
+        x0, x1 = self.ax.get_xlim()
+        y0, y1 = self.ax.get_ylim()
+        cx, cy = event.xdata, event.ydata
+        self.ax.set_xlim(cx - (cx - x0) * factor, cx + (x1 - cx) * factor)
+        self.ax.set_ylim(cy - (cy - y0) * factor, cy + (y1 - cy) * factor)
+        self._blit()
+        
+        # 连续滚动时推迟提交，停止后只完整绘制一次
+        if self._commit_pending is not None:
+            self.widget.after_cancel(self._commit_pending)
+        self._commit_pending = self.widget.after(self.COMMIT_DELAY, self._end)
+    
+    def _on_press(self, event):
+        """左键按下开始拖动"""
+        if event.button != 1 or event.inaxes is not self.ax:
+            return
+        self._press_pending = self.preview is not None
+        if not self._begin():
+            return
+        
+        if self._commit_pending is not None:
+            self.widget.after_cancel(self._commit_pending)
+            self._commit_pending = None
+        self._moved = False
+        self._drag_start = (event.x, event.y, self.ax.get_xlim(), self.ax.get_ylim())
+    
+    def _on_motion(self, event):
+        """拖动平移"""
+        if self._drag_start is None:
+            return
+        
+        start_x, start_y, (x0, x1), (y0, y1) = self._drag_start
+        if event.x == start_x and event.y == start_y:
+            return
+        self._moved = True
+        bbox = self.ax.bbox
+        dx = (event.x - start_x) * (x1 - x0) / bbox.width
+        dy = (event.y - start_y) * (y1 - y0) / bbox.height
+        self.ax.set_xlim(x0 - dx, x1 - dx)
+        self.ax.set_ylim(y0 - dy, y1 - dy)
+        self._blit()
+    
+    def _on_release(self, event):
+        """松开鼠标结束拖动"""
+        if self._drag_start is None:
+            return
+        _, _, xlim, ylim = self._drag_start
+        self._drag_start = None
+        
+        # 单击没有移动：之前有未提交的滚轮缩放时照常提交，否则移除快照、恢复范围，不触发重绘
+        if not self._moved and not self._press_pending:
+            self.preview.remove()
+            self.preview = None
+            self.ax.set_xlim(*xlim)
+            self.ax.set_ylim(*ylim)
+            return
+        self._end()
@@ -0,0 +1,160 @@
+"""
+绘图点集模块
+把坐标合并为不重复的点及其像素计数，绘图开销只与不同坐标的数量有关
+"""
+
+import numpy as np
+
+
+class PointSet:
+    """
+    带计数的不重复坐标点集
+    
+    平坦区域会产生大量完全相同的坐标，合并后每个点只绘制一次，
+    计数通过透明度体现：计数为n的点使用 1 - (1 - alpha)^n 的不透明度，
+    与把n个相同的点逐个叠加绘制的效果一致。
+    """
+    
+    # 合并后点数仍超过原点数的该比例时不保留合并结果，直接使用原数组以节省内存
+    MIN_REDUCTION = 0.9
+    
+    # 带计数的点集绘制时按不透明度分成的组数
+    ALPHA_LEVELS = 16
+    
+    def __init__(self, x, y, counts=None, total=None):
+        """
+        初始化点集
+        
+        Args:
+            x: x坐标数组
+            y: y坐标数组
+            counts: 每个点代表的像素数，为None表示每个点对应一个像素
+            total: 实际像素总数，为None时由counts计算
+        """
+        self.x = x
+        self.y = y
+        self.counts = counts
+        if total is None:
+            total = len(x) if counts is None else int(counts.sum())
+        self.total = total
+    
+    def __len__(self):
+        """不同坐标的数量（实际绘制的点数）"""
+        return len(self.x)
+    
+    @staticmethod
+    def from_coordinates(x, y, weights=None):
+        """
+        合并完全相同的坐标
+        
+        Args:
+            x: x坐标数组
+            y: y坐标数组
+            weights: 每个坐标代表的像素数，为None表示每个坐标对应一个像素
+        
+        Returns:
+            PointSet: 合并后的点集
+        """
+        count = len(x)
+        total = count if weights is None else int(weights.sum())
+        if count < 2:
+            return PointSet(x, y, weights, total)
+        
+        if x.dtype == np.float32 and y.dtype == np.float32:
+            # float32坐标对按位打包为一个64位整数键，只需一次排序
+            keys = x.view(np.uint32).astype(np.uint64)
+            keys <<= np.uint64(32)
+            keys |= y.view(np.uint32)
+            order = np.argsort(keys)
+            sorted_keys = keys[order]
+            del keys
+            changed = sorted_keys[1:] != sorted_keys[:-1]
+            del sorted_keys
+        else:
+            order = np.lexsort((y, x))
+            sorted_x = x[order]
+            sorted_y = y[order]
+            changed = (sorted_x[1:] != sorted_x[:-1]) | (sorted_y[1:] != sorted_y[:-1])
+            del sorted_x, sorted_y
+        
+        starts = np.concatenate(([0], np.flatnonzero(changed) + 1))
+        del changed
+        
+        # 合并效果不明显时保留原数组
+        if len(starts) > count * PointSet.MIN_REDUCTION:
+            return PointSet(x, y, weights, total)
+        
+        if weights is None:
+            counts = np.diff(np.append(starts, count))
+        else:
+            counts = np.add.reduceat(weights[order], starts)
+        
+        first = order[starts]
+        return PointSet(x[first], y[first], counts, total)
+    
+    def uniform_alpha(self, alpha):
+        """
+        没有逐点计数时的统一透明度（抽稀后的点集每个点平均代表 total/len 个像素）
+        
+        Args:
+            alpha: 单个像素的透明度
+        
+        Returns:
+            float: 每个点的透明度
+        """
+        if len(self) == 0 or self.total <= len(self):
+            return alpha
+        return 1.0 - (1.0 - alpha) ** (self.total / len(self))
+    
+    def opacities(self, alpha):
+        """
+        计算每个点叠加后的不透明度
+        
+        Args:
+            alpha: 单个像素的透明度
+        
+        Returns:
+            numpy.ndarray: 每个点的不透明度 (K,)
+        """
+        # 叠加n个透明度为alpha的点：1 - (1 - alpha)^n
+        opacity = np.power(np.float32(1.0 - alpha), self.counts, dtype=np.float32)
+        np.subtract(1.0, opacity, out=opacity)
+        return opacity
+    
+    def alpha_groups(self, alpha, levels=None):
+        """
+        按不透明度把点分组，每组使用统一的透明度绘制
+        
+        逐点颜色的散点图无法使用Agg的标记快速路径，绘制速度慢一个数量级；
+        分组后每组是一个统一颜色的散点图，不透明度误差不超过 1/levels。
+        
+        Args:
+            alpha: 单个像素的透明度
+            levels: 分组数，为None时使用ALPHA_LEVELS
+        
+        Returns:
+            list: [(x数组, y数组, 透明度)]，按透明度从低到高排列
+        """
+        if self.counts is None:
+            return [(self.x, self.y, self.uniform_alpha(alpha))]
+        if levels is None:
+            levels = self.ALPHA_LEVELS
+        
+        opacity = self.opacities(alpha)
+        level = (opacity * levels).astype(np.intp)
+        np.minimum(level, levels - 1, out=level)
+        
+        # 每组使用组内不透明度的平均值
+        level_counts = np.bincount(level, minlength=levels)
+        level_sums = np.bincount(level, weights=opacity, minlength=levels)
+        order = np.argsort(level, kind='stable')
+        del level, opacity
+        
+        groups = []
+        start = 0
+        for count, total in zip(level_counts, level_sums):
+            if count:
+                selected = order[start:start + count]
+                groups.append((self.x[selected], self.y[selected], float(total / count)))
+                start += count
+        return groups
@@ -0,0 +1,133 @@
+"""
+渐进细化模块
+先按粗步长（如32）处理得到可以立即显示的结果，再依次按减半的步长细化直到目标步长；
+每一轮只处理上一轮网格没有覆盖的取样点，所有轮次的总开销与一次完整处理相同
+"""
+
+import numpy as np
+
+from modules.band_pipeline import create_accumulator
+from modules.sampling import stride_points, processing_cost_model
+
+
+class ProgressiveRefiner:
+    """
+    已解码图像的渐进细化处理
+    
+    步长为s的网格点中，行号和列号都是2s倍数的点已由步长2s的上一轮处理过，
+    本轮只取奇数倍行的全部网格点和偶数倍行的奇数倍列网格点（约为网格点的3/4）。
+    每轮的转换结果追加到累积缓冲区，最后一轮之前的每一轮都输出一次部分结果。
+    """
+    
+    # 第一轮的最小步长
+    COARSE_STRIDE = 32
+    
+    # 第一轮的处理时间预算（秒），按处理开销模型估计，超出时继续加倍步长
+    COARSE_SECONDS = 0.1
+    
+    def __init__(self, pixels, sample_rate):
+        """
+        初始化
+        
+        Args:
+            pixels: 已解码的像素数组 (H, W) 或 (H, W, C)
+            sample_rate: 目标步长
+        """
+        self.pixels = pixels
+        self.sample_rate = sample_rate
+        self.height, self.width = pixels.shape[:2]
+        self.strides = self._plan_strides()
+    
+    @staticmethod
+    def supports(source, sample_rate):
+        """
+        是否值得渐进处理：已解码在内存中的数组，且按处理开销模型估计一次完整处理超过第一轮的时间预算
+        
+        内存映射或按需解码的TIFF由BandPipeline逐条带处理，不在此处理。
+        
+        Args:
+            source: 像素来源
+            sample_rate: 目标步长
+        
+        Returns:
+            bool: 是否渐进处理
+        """
+        if not isinstance(source, np.ndarray) or isinstance(source, np.memmap):
+            return False
+        points = stride_points(source.shape[1], source.shape[0], sample_rate)
+        return points * processing_cost_model.seconds_per_point > ProgressiveRefiner.COARSE_SECONDS
+    
+    def _plan_strides(self):
+        """
+        各轮的步长：目标步长不断加倍，直到不小于COARSE_STRIDE且第一轮的估计耗时不超过预算
+        
+        Returns:
+            list: 从粗到细的步长
+        """
+        strides = [self.sample_rate]
+        limit = max(self.width, self.height)
+        while strides[0] < limit:
+            points = stride_points(self.width, self.height, strides[0])
+            if strides[0] >= self.COARSE_STRIDE and \
+                    points * processing_cost_model.seconds_per_point <= self.COARSE_SECONDS:
+                break
+            strides.insert(0, strides[0] * 2)
+        return strides
+    
+    def pass_views(self, index):
+        """
+        第index轮需要处理的像素（上一轮网格没有覆盖的网格点）
+        
+        Args:
+            index: 轮次（0为第一轮）
+        
+        Returns:
+            list: 像素数组的视图
+        """
+        stride = self.strides[index]
+        pixels = self.pixels
+        if index == 0:
+            return [pixels[::stride, ::stride]]
+        double = stride * 2
+        return [pixels[stride::double, ::stride], pixels[::double, stride::double]]
+    
+    def run(self, reduce_colors=False, color_bits=None, progress_callback=None, partial_callback=None):
+        """
+        逐轮处理
+        
+        Args:
+            reduce_colors: 是否对颜色去重
+            color_bits: 去重时16位图像每通道保留的位数
+            progress_callback: 进度回调 progress_callback(stage, fraction)，每轮调用一次
+            partial_callback: 部分结果回调 partial_callback(MultiSpaceResult, 步长)，
+                              最后一轮之前的每一轮调用一次，可为None
+        
+        Returns:
+            MultiSpaceResult: 与按目标步长一次处理相同的点（顺序按轮次排列）
+        """
+        # 延迟导入，避免与image_processor循环引用
+        from modules.image_processor import ImageProcessor
+        
+        native = self.pixels.dtype.newbyteorder('=')
+        accumulator = create_accumulator(native, reduce_colors, color_bits)
+        total = stride_points(self.width, self.height, self.sample_rate)
+        done = 0
+        
+        for index, stride in enumerate(self.strides):
+            for view in self.pass_views(index):
+                if view.size == 0:
+                    continue
+                if view.ndim == 3 and view.shape[2] > 3:
+                    view = view[:, :, :3]
+                view = view.astype(native)
+                if view.ndim == 2:
+                    view = np.stack([view] * 3, axis=-1)
+                accumulator.add(view)
+                done += view.shape[0] * view.shape[1]
+                del view
+            
+            ImageProcessor.report_progress(progress_callback, 'refine', 0.1 + 0.7 * done / total)
+            if partial_callback is not None and index < len(self.strides) - 1:
+                partial_callback(accumulator.result(), stride)
+        
+        return accumulator.result(finish=True)
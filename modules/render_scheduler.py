@@ -0,0 +1,95 @@
+"""
+绘制调度模块
+合并同一次事件循环中的多次状态修改，每个画布每轮事件循环最多绘制一次
+"""
+
+
+class RenderScheduler:
+    """
+    单个画布的绘制调度器
+    
+    修改数据、坐标轴范围、样式或标签时只标记对应的脏标志，
+    在Tk空闲时统一调用一次渲染回调应用全部修改，然后用draw_idle绘制一次。
+    同时统计每次用户操作实际触发的绘制次数，便于发现多余的绘制。
+    """
+    
+    # 脏标志
+    DATA = 'data'
+    LIMITS = 'limits'
+    STYLE = 'style'
+    LABELS = 'labels'
+    
+    def __init__(self, widget, canvas, render_callback):
+        """
+        初始化调度器
+        
+        Args:
+            widget: 用于after_idle调度的Tk组件
+            canvas: FigureCanvasTkAgg画布
+            render_callback: 渲染回调 render_callback(flags)，flags为本轮的脏标志集合
+        """
+        self.widget = widget
+        self.canvas = canvas
+        self.render_callback = render_callback
+        
+        self.dirty = set()
+        self._pending = None
+        
+        # 绘制统计：一次刷新（合并后的用户操作）到下一次刷新之间的实际绘制次数
+        self.draw_count = 0
+        self.action_count = 0
+        self.max_action_draws = 0
+        self._action_draws = 0
+        
+        canvas.mpl_connect('draw_event', self._on_draw)
+    
+    def invalidate(self, *flags):
+        """
+        标记需要更新的内容，并在空闲时刷新（同一轮事件循环内的多次调用只刷新一次）
+        
+        Args:
+            *flags: 脏标志（DATA、LIMITS、STYLE、LABELS），不传时只重新绘制
+        """
+        self.dirty.update(flags)
+        if self._pending is None:
+            self._pending = self.widget.after_idle(self._flush)
+    
+    def cancel(self):
+        """取消尚未执行的刷新"""
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._pending = None
+        self.dirty.clear()
+    
+    def _flush(self):
+        """应用本轮全部修改并请求一次绘制"""
+        self._pending = None
+        flags = self.dirty
+        self.dirty = set()
+        
+        # 新的用户操作开始，结算上一个操作的绘制次数
+        self.max_action_draws = max(self.max_action_draws, self._action_draws)
+        self._action_draws = 0
+        self.action_count += 1
+        
+        self.render_callback(flags)
+        self.canvas.draw_idle()
+    
+    def _on_draw(self, event):
+        """画布完成一次绘制"""
+        self.draw_count += 1
+        self._action_draws += 1
+    
+    def get_stats(self):
+        """
+        获取绘制统计
+        
+        Returns:
+            dict: 总绘制次数、操作次数、最近一次操作和单次操作最多的绘制次数
+        """
+        return {
+            'draws': self.draw_count,
+            'actions': self.action_count,
+            'last_action_draws': self._action_draws,
+            'max_action_draws': max(self.max_action_draws, self._action_draws)
+        }
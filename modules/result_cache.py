@@ -0,0 +1,328 @@
+"""
+颜色空间坐标磁盘缓存模块
+按文件内容指纹和处理参数缓存计算好的坐标，重复打开同一图片时直接内存映射读取
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+
+import numpy as np
+from PIL import Image
+
+
+class CoordinateDiskCache:
+    """
+    内容寻址的坐标磁盘缓存
+    
+    每个缓存项是一个目录，包含若干 .npy 坐标数组（有效数据点）、
+    meta.json（数组长度等）和 thumb.png（显示用缩略图）。
+    缓存键由文件内容指纹、文件大小和修改时间、缓存格式版本和全部处理参数共同决定，
+    文件内容或参数变化时自然得到新的键，旧项按LRU被淘汰。
+    抽样指纹覆盖不到的原地修改也会更新修改时间，不会读到过期的坐标。
+    """
+    
+    # 缓存格式版本，处理算法变化时递增使旧缓存失效
+    # （3：文件指纹改为抽样读取；转换时去掉不是有限值的坐标）
+    CACHE_VERSION = 3
+    
+    # 文件指纹读取的文件头字节数（包含TIFF、PNG等格式的元数据）
+    FINGERPRINT_HEAD_BYTES = 256 * 1024
+    
+    # 文件指纹在文件头之后均匀抽样的块数和每块的字节数（最后一块位于文件末尾）
+    FINGERPRINT_BLOCKS = 16
+    FINGERPRINT_BLOCK_BYTES = 64 * 1024
+    
+    # 默认容量上限（MB），可通过环境变量 EASYLOOK_DISK_CACHE_MB 修改
+    DEFAULT_MAX_MB = 2048
+    
+    # 缩略图最大尺寸
+    THUMBNAIL_SIZE = (512, 512)
+    
+    def __init__(self, cache_dir=None, max_bytes=None):
+        """
+        初始化磁盘缓存
+        
+        Args:
+            cache_dir: 缓存目录，为None时使用环境变量 EASYLOOK_CACHE_DIR 或 ~/.easylook/coord_cache
+            max_bytes: 容量上限（字节），为None时使用环境变量或默认值
+        """
+        if cache_dir is None:
+            cache_dir = os.environ.get(
+                'EASYLOOK_CACHE_DIR',
+                os.path.join(os.path.expanduser('~'), '.easylook', 'coord_cache')
+            )
+        if max_bytes is None:
+            max_mb = float(os.environ.get('EASYLOOK_DISK_CACHE_MB', self.DEFAULT_MAX_MB))
+            max_bytes = int(max_mb * 1024 * 1024)
+        
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = True
+        
+        # 文件哈希的内存缓存：(绝对路径, 修改时间, 大小) -> 哈希
+        self._hash_memo = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def compute_file_hash(image_path):
+        """
+        计算文件内容指纹
+        
+        对文件大小、文件头和固定位置的若干抽样块做哈希，不读取整个文件：
+        打开大图时只读取约1.3MB，与按步长或条带读取只读取一部分文件的加载方式一致。
+        不超过抽样总量的小文件读取全部内容。
+        
+        Args:
+            image_path: 文件路径
+        
+        Returns:
+            str: 十六进制哈希值
+        """
+        head = CoordinateDiskCache.FINGERPRINT_HEAD_BYTES
+        blocks = CoordinateDiskCache.FINGERPRINT_BLOCKS
+        block = CoordinateDiskCache.FINGERPRINT_BLOCK_BYTES
+        
+        digest = hashlib.blake2b(digest_size=20)
+        with open(image_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            digest.update(size.to_bytes(8, 'little'))
+            if size <= head + blocks * block:
+                digest.update(f.read())
+                return digest.hexdigest()
+            
+            digest.update(f.read(head))
+            span = size - head - block
+            for index in range(1, blocks + 1):
+                f.seek(head + span * index // blocks)
+                digest.update(f.read(block))
+        return digest.hexdigest()
+    
+    def get_file_identity(self, image_path):
+        """
+        获取文件内容指纹和文件状态（路径、大小和修改时间未变化时复用已计算的指纹）
+        
+        Args:
+            image_path: 文件路径
+        
+        Returns:
+            tuple: (十六进制哈希值, 修改时间（纳秒）, 文件大小)
+        """
+        abs_path = os.path.abspath(image_path)
+        stat = os.stat(abs_path)
+        memo_key = (abs_path, stat.st_mtime_ns, stat.st_size)
+        
+        with self._lock:
+            file_hash = self._hash_memo.get(memo_key)
+        if file_hash is None:
+            file_hash = self.compute_file_hash(abs_path)
+            with self._lock:
+                self._hash_memo[memo_key] = file_hash
+        return file_hash, stat.st_mtime_ns, stat.st_size
+    
+    def get_file_hash(self, image_path):
+        """
+        获取文件内容指纹（路径、大小和修改时间未变化时复用已计算的结果）
+        
+        Args:
+            image_path: 文件路径
+        
+        Returns:
+            str: 十六进制哈希值
+        """
+        return self.get_file_identity(image_path)[0]
+    
+    def make_key(self, image_path, params):
+        """
+        生成缓存键
+        
+        Args:
+            image_path: 图像文件路径
+            params: 处理参数字典（颜色空间、降采样率等）
+        
+        Returns:
+            str: 缓存键
+        """
+        file_hash, mtime_ns, size = self.get_file_identity(image_path)
+        key_source = {
+            'file_hash': file_hash,
+            'mtime_ns': mtime_ns,
+            'size': size,
+            'version': self.CACHE_VERSION,
+            'params': params
+        }
+        key_text = json.dumps(key_source, sort_keys=True)
+        return hashlib.blake2b(key_text.encode('utf-8'), digest_size=20).hexdigest()
+    
+    def _entry_dir(self, key):
+        """缓存项目录"""
+        return os.path.join(self.cache_dir, key[:2], key)
+    
+    def load(self, image_path, params):
+        """
+        读取缓存的坐标
+        
+        Args:
+            image_path: 图像文件路径
+            params: 处理参数字典
+        
+        Returns:
+            dict: 'arrays'为内存映射的坐标数组字典，'thumbnail'为缩略图，
+                  其余为写入时附带的数据；未命中时返回None
+        """
+        if not self.enabled:
+            return None
+        
+        try:
+            key = self.make_key(image_path, params)
+        except OSError:
+            return None
+        
+        entry_dir = self._entry_dir(key)
+        meta_path = os.path.join(entry_dir, 'meta.json')
+        if not os.path.exists(meta_path):
+            return None
+        
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            
+            if meta.get('key') != key:
+                raise ValueError("corrupted cache entry")
+            
+            arrays = {}
+            for name, length in meta['arrays'].items():
+                array = np.load(os.path.join(entry_dir, f'{name}.npy'), mmap_mode='r')
+                # 校验缓存项完整性
+                if len(array) != length:
+                    raise ValueError("corrupted cache entry")
+                arrays[name] = array
+            
+            with Image.open(os.path.join(entry_dir, 'thumb.png')) as thumb:
+                thumbnail = thumb.convert('RGB')
+            
+            # 更新访问时间，用于LRU淘汰
+            os.utime(meta_path)
+        except Exception:
+            # 损坏的缓存项直接删除
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+        
+        result = dict(meta['data'])
+        result['arrays'] = arrays
+        result['thumbnail'] = thumbnail
+        return result
+    
+    def store(self, image_path, params, arrays, data, thumbnail_source):
+        """
+        写入缓存项
+        
+        先写入临时目录再整体重命名，保证其他线程或进程不会读到不完整的缓存项。
+        
+        Args:
+            image_path: 图像文件路径
+            params: 处理参数字典
+            arrays: {名称: 一维坐标数组}
+            data: 其他需要缓存的可JSON序列化数据
+            thumbnail_source: 用于生成缩略图的PIL.Image
+        """
+        if not self.enabled:
+            return
+        
+        try:
+            key = self.make_key(image_path, params)
+            entry_dir = self._entry_dir(key)
+            if os.path.exists(entry_dir):
+                return
+            
+            parent_dir = os.path.dirname(entry_dir)
+            os.makedirs(parent_dir, exist_ok=True)
+            tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=parent_dir)
+        except OSError:
+            return
+        
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_dir, f'{name}.npy'), np.ascontiguousarray(array))
+            
+            thumbnail = thumbnail_source.copy()
+            thumbnail.thumbnail(self.THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+            thumbnail.save(os.path.join(tmp_dir, 'thumb.png'))
+            
+            meta = {
+                'key': key,
+                'params': params,
+                'arrays': {name: int(len(array)) for name, array in arrays.items()},
+                'data': data
+            }
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+            
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            # 其他线程已写入同一缓存项，或磁盘写入失败
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+        
+        self.enforce_limit()
+    
+    def _list_entries(self):
+        """
+        列出所有缓存项
+        
+        Returns:
+            list: [(最后访问时间, 占用字节数, 目录)]
+        """
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        
+        for prefix in os.listdir(self.cache_dir):
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                entry_dir = os.path.join(prefix_dir, name)
+                meta_path = os.path.join(entry_dir, 'meta.json')
+                try:
+                    last_used = os.path.getmtime(meta_path)
+                    size = sum(
+                        os.path.getsize(os.path.join(entry_dir, f))
+                        for f in os.listdir(entry_dir)
+                    )
+                except OSError:
+                    continue
+                entries.append((last_used, size, entry_dir))
+        return entries
+    
+    def get_size(self):
+        """获取缓存占用的总字节数"""
+        return sum(size for _, size, _ in self._list_entries())
+    
+    def enforce_limit(self):
+        """按最后访问时间淘汰最旧的缓存项，直到不超过容量上限"""
+        with self._lock:
+            entries = self._list_entries()
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+            
+            entries.sort()
+            for _, size, entry_dir in entries:
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                if not os.path.exists(entry_dir):
+                    total -= size
+    
+    def clear(self):
+        """清空磁盘缓存"""
+        with self._lock:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+# 全局坐标磁盘缓存实例
+coordinate_cache = CoordinateDiskCache()
@@ -0,0 +1,200 @@
+"""
+采样方式模块
+除固定的降采样率外，可以按目标点数或处理时间预算采样：根据文件头中的尺寸选择步长，
+或在每个网格中取一个随机像素（固定随机种子的分层随机采样），使不同图像的点数和处理开销相近；
+各采样方式都可以改用区域平均，每个点是一个像素块的平均值
+"""
+
+import math
+import threading
+
+import numpy as np
+
+
+# 采样方式：固定降采样率、目标点数、处理时间预算（毫秒）
+SAMPLING_MODES = ('rate', 'points', 'latency')
+
+# 取样图案：规则步长、分层随机或区域平均（k×k像素块的平均值）
+SAMPLING_PATTERNS = ('stride', 'stratified', 'area')
+
+# 各采样方式下数值输入框的标签和默认值
+SAMPLING_VALUE_LABELS = {'rate': 'custom_sample_rate', 'points': 'target_points', 'latency': 'latency_budget'}
+DEFAULT_SAMPLING_VALUES = {'rate': '10', 'points': '250000', 'latency': '200'}
+
+# 分层随机采样的默认随机种子（相同设置每次得到相同的样本）
+DEFAULT_SEED = 0
+
+# 按点数或时间预算采样时的最少点数
+MIN_POINTS = 1000
+
+
+def stride_points(width, height, stride):
+    """
+    按步长取样得到的点数
+    
+    Args:
+        width: 图像宽度
+        height: 图像高度
+        stride: 步长
+    
+    Returns:
+        int: 点数
+    """
+    return -(-width // stride) * -(-height // stride)
+
+
+def stride_for_points(width, height, target_points):
+    """
+    选择点数不超过目标的最小步长
+    
+    Args:
+        width: 图像宽度
+        height: 图像高度
+        target_points: 目标点数
+    
+    Returns:
+        int: 步长
+    """
+    target_points = max(1, int(target_points))
+    stride = max(1, int(math.sqrt(width * height / target_points)))
+    while stride > 1 and stride_points(width, height, stride - 1) <= target_points:
+        stride -= 1
+    while stride_points(width, height, stride) > target_points and stride < max(width, height):
+        stride += 1
+    return stride
+
+
+def stratified_positions(height, width, target_points, seed=DEFAULT_SEED):
+    """
+    分层随机采样的像素位置
+    
+    把图像分成约target_points个大小相近的网格，每个网格中取一个随机像素，
+    样本在空间上均匀分布，又不会与周期性的纹理对齐。
+    
+    Args:
+        height: 图像高度
+        width: 图像宽度
+        target_points: 目标点数
+        seed: 随机种子
+    
+    Returns:
+        tuple: (行号数组, 列号数组)，形状均为 (网格行数, 网格列数)
+    """
+    target_points = max(1, min(int(target_points), width * height))
+    cell = math.sqrt(width * height / target_points)
+    rows_n = min(height, max(1, round(height / cell)))
+    cols_n = min(width, max(1, round(width / cell)))
+    
+    # 网格边界（每个网格至少包含一行和一列）
+    row_edges = np.linspace(0, height, rows_n + 1).astype(np.int64)
+    col_edges = np.linspace(0, width, cols_n + 1).astype(np.int64)
+    
+    rng = np.random.default_rng(seed)
+    rows = rng.random((rows_n, cols_n))
+    rows *= np.diff(row_edges)[:, None]
+    cols = rng.random((rows_n, cols_n))
+    cols *= np.diff(col_edges)[None, :]
+    return row_edges[:-1, None] + rows.astype(np.int64), col_edges[None, :-1] + cols.astype(np.int64)
+
+
+class ProcessingCostModel:
+    """
+    处理开销模型（进程内共享）
+    
+    记录每个取样点的平均处理耗时（降采样、颜色空间转换和合并重复点，不含图像加载），
+    用于把时间预算换算为点数。
+    """
+    
+    # 没有测量结果时使用的每点耗时（秒）
+    DEFAULT_SECONDS_PER_POINT = 5e-7
+    
+    # 指数滑动平均的权重
+    SMOOTHING = 0.3
+    
+    def __init__(self):
+        """初始化模型"""
+        self._lock = threading.Lock()
+        self.seconds_per_point = self.DEFAULT_SECONDS_PER_POINT
+        self.samples = 0
+    
+    def record(self, points, seconds):
+        """
+        记录一次处理的耗时
+        
+        Args:
+            points: 取样点数
+            seconds: 耗时（秒）
+        """
+        if points < MIN_POINTS or seconds <= 0:
+            return
+        with self._lock:
+            measured = seconds / points
+            if self.samples == 0:
+                self.seconds_per_point = measured
+            else:
+                self.seconds_per_point += self.SMOOTHING * (measured - self.seconds_per_point)
+            self.samples += 1
+    
+    def points_for_latency(self, seconds):
+        """
+        时间预算内可以处理的点数
+        
+        Args:
+            seconds: 时间预算（秒）
+        
+        Returns:
+            int: 点数
+        """
+        with self._lock:
+            return max(MIN_POINTS, int(seconds / self.seconds_per_point))
+
+
+def plan_sampling(width, height, sampling, sample_rate=None):
+    """
+    按采样方式确定步长和目标点数
+    
+    Args:
+        width: 图像宽度
+        height: 图像高度
+        sampling: 采样方式 {'mode': 'rate'、'points'或'latency', 'value': 目标点数或毫秒数（'rate'方式不使用）,
+                  'pattern': 'stride'、'stratified'或'area', 'seed': 随机种子（可省略）}，为None时按固定降采样率取样
+        sample_rate: 固定降采样率（'rate'方式使用）
+    
+    Returns:
+        dict: 'sample_rate'为取样步长或区域平均的块边长（分层随机采样时用于选择JPEG解码缩放倍数），
+              'target_points'为分层随机采样的点数（其他图案为None），'seed'为随机种子，
+              'area'表示是否区域平均
+    """
+    if sampling is None:
+        return {'sample_rate': sample_rate, 'target_points': None, 'seed': None, 'area': False}
+    pattern = sampling.get('pattern', 'stride')
+    
+    if sampling['mode'] == 'rate':
+        # 固定降采样率下的分层随机采样取与该步长相同的点数
+        target_points = stride_points(width, height, sample_rate)
+    elif sampling['mode'] == 'latency':
+        target_points = processing_cost_model.points_for_latency(sampling['value'] / 1000)
+    else:
+        target_points = max(MIN_POINTS, int(sampling['value']))
+    target_points = min(target_points, width * height)
+    
+    if pattern == 'stratified':
+        # 网格边长不小于步长，缩放解码后每个网格仍至少包含一个像素
+        return {
+            'sample_rate': max(1, int(math.sqrt(width * height / target_points))),
+            'target_points': target_points,
+            'seed': sampling.get('seed', DEFAULT_SEED),
+            'area': False
+        }
+    if sampling['mode'] != 'rate':
+        sample_rate = stride_for_points(width, height, target_points)
+    return {
+        'sample_rate': sample_rate,
+        'target_points': None,
+        'seed': None,
+        'area': pattern == 'area'
+    }
+
+
+# 全局处理开销模型实例
+processing_cost_model = ProcessingCostModel()
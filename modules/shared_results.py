@@ -0,0 +1,286 @@
+"""
+共享内存结果传递模块
+工作进程把处理结果中的数组复制到一个共享内存段中，只通过进程池的管道传递很小的描述信息；
+界面进程把数组映射为共享内存段上的numpy视图，不复制也不反序列化数组内容。
+反方向上，界面进程已解码的像素同样通过共享内存交给工作进程，工作进程不重新读取和解码文件
+"""
+
+import os
+import pickle
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class SharedResult:
+    """
+    通过共享内存传递的处理结果
+    
+    使用pickle协议5的带外缓冲区：序列化时连续数组的数据不写入pickle字节串，而是依次复制到
+    共享内存段中（按ALIGNMENT对齐）；反序列化时把共享内存段的切片作为缓冲区传回，
+    numpy直接在其上建立视图，同一数组的多个引用（如点集和空间索引共用的坐标）仍只有一份。
+    
+    界面进程载入后立即删除共享内存段的名称，内存在映射关闭后由系统回收，
+    界面异常退出时不会遗留共享内存段。结果的拥有者（图像块或对比列表中的图片）
+    不再使用结果时调用release()关闭映射。
+    """
+    
+    # 数组数据总量低于此值时不使用共享内存，直接随pickle字节串传递
+    MIN_BYTES = 1024 * 1024
+    
+    # 每个数组在共享内存段中的起始位置按此字节数对齐
+    ALIGNMENT = 64
+    
+    # Windows的共享内存在所有句柄关闭后即被回收，工作进程返回前不能关闭，此时直接随pickle字节串传递
+    ENABLED = os.name != 'nt'
+    
+    def __init__(self, payload, name=None, layout=()):
+        """
+        初始化（通常通过export创建）
+        
+        Args:
+            payload: pickle字节串（使用共享内存时不含数组数据）
+            name: 共享内存段名称，为None表示数组数据包含在payload中
+            layout: 每个带外缓冲区在共享内存段中的 (起始位置, 字节数)
+        """
+        self.payload = payload
+        self.name = name
+        self.layout = tuple(layout)
+        self._segment = None
+    
+    def __getstate__(self):
+        """序列化时不包含已打开的共享内存段"""
+        state = self.__dict__.copy()
+        state['_segment'] = None
+        return state
+    
+    @staticmethod
+    def export(obj):
+        """
+        把处理结果写入共享内存（在工作进程中调用）
+        
+        Args:
+            obj: 可以pickle的处理结果
+        
+        Returns:
+            SharedResult: 可以传回界面进程的结果描述
+        """
+        buffers = []
+        payload = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+        views = [buffer.raw() for buffer in buffers]
+        
+        # 计算每个缓冲区的对齐位置
+        layout = []
+        size = 0
+        for view in views:
+            size = -(-size // SharedResult.ALIGNMENT) * SharedResult.ALIGNMENT
+            layout.append((size, view.nbytes))
+            size += view.nbytes
+        
+        if not SharedResult.ENABLED or size < SharedResult.MIN_BYTES:
+            return SharedResult(pickle.dumps(obj, protocol=5))
+        
+        segment = shared_memory.SharedMemory(create=True, size=size)
+        try:
+            for view, (offset, nbytes) in zip(views, layout):
+                segment.buf[offset:offset + nbytes] = view
+        except BaseException:
+            segment.close()
+            segment.unlink()
+            raise
+        finally:
+            for view in views:
+                view.release()
+        
+        # 工作进程关闭自己的映射，共享内存段由界面进程载入后删除
+        segment.close()
+        return SharedResult(payload, segment.name, layout)
+    
+    @property
+    def nbytes(self):
+        """共享内存段中数组数据的字节数"""
+        return sum(nbytes for _, nbytes in self.layout)
+    
+    def load(self):
+        """
+        在界面进程中取出处理结果（数组为共享内存段上的视图）
+        
+        Returns:
+            处理结果
+        """
+        if self.name is None:
+            return pickle.loads(self.payload)
+        
+        if self._segment is None:
+            self._segment = shared_memory.SharedMemory(self.name)
+            self._segment.unlink()
+        buffers = [self._segment.buf[offset:offset + nbytes] for offset, nbytes in self.layout]
+        return pickle.loads(self.payload, buffers=buffers)
+    
+    def release(self):
+        """
+        关闭共享内存段的映射
+        
+        仍有数组视图被引用时（如尚未重绘的旧图表）映射暂时保留，在之后的release()中再次尝试关闭。
+        未载入的结果（如已被取消的任务的结果）直接删除共享内存段。
+        """
+        if self._segment is None:
+            self.discard()
+        else:
+            shared_segments.close(self._segment)
+        self._segment = None
+        self.name = None
+        shared_segments.collect()
+    
+    def discard(self):
+        """删除尚未载入的结果的共享内存段（不会再被取出的结果，可以在任意线程中调用）"""
+        if self.name is None or self._segment is not None:
+            return
+        try:
+            segment = shared_memory.SharedMemory(self.name)
+        except FileNotFoundError:
+            pass
+        else:
+            segment.unlink()
+            segment.close()
+        self.name = None
+
+
+class SharedArray:
+    """
+    通过共享内存交给工作进程的只读数组
+    
+    由界面进程创建并负责释放（任务结束后调用release()），工作进程只映射和关闭，不删除共享内存段。
+    """
+    
+    def __init__(self, name, shape, dtype, decode_scale=1):
+        """
+        初始化（通常通过export创建）
+        
+        Args:
+            name: 共享内存段名称
+            shape: 数组形状
+            dtype: 数组数据类型
+            decode_scale: 像素的解码缩放倍数
+        """
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.decode_scale = decode_scale
+        self._segment = None
+    
+    def __getstate__(self):
+        """序列化时不包含已打开的共享内存段"""
+        state = self.__dict__.copy()
+        state['_segment'] = None
+        return state
+    
+    @staticmethod
+    def export(array, decode_scale=1):
+        """
+        把数组复制到新的共享内存段（在界面进程中调用）
+        
+        Args:
+            array: 像素数组（可以是不连续的视图）
+            decode_scale: 像素的解码缩放倍数
+        
+        Returns:
+            SharedArray: 可以传给工作进程的数组描述
+        """
+        segment = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        shared = SharedArray(segment.name, array.shape, array.dtype, decode_scale)
+        shared._segment = segment
+        try:
+            np.ndarray(array.shape, array.dtype, buffer=segment.buf)[...] = array
+        except BaseException:
+            shared.release()
+            raise
+        return shared
+    
+    def attach(self):
+        """
+        映射共享内存段（在工作进程中调用）
+        
+        Returns:
+            numpy.ndarray: 共享内存上的只读数组
+        """
+        if self._segment is None:
+            self._segment = shared_memory.SharedMemory(self.name)
+        array = np.ndarray(self.shape, self.dtype, buffer=self._segment.buf)
+        array.flags.writeable = False
+        return array
+    
+    def close(self):
+        """关闭工作进程中的映射（仍有视图被引用时留待之后关闭）"""
+        if self._segment is not None:
+            shared_segments.close(self._segment)
+            self._segment = None
+    
+    def release(self):
+        """删除共享内存段并关闭界面进程中的映射"""
+        if self._segment is not None:
+            try:
+                self._segment.unlink()
+            except FileNotFoundError:
+                pass
+            shared_segments.close(self._segment)
+            self._segment = None
+
+
+class SharedSegments:
+    """已释放但仍有数组视图被引用、暂时无法关闭的共享内存段"""
+    
+    def __init__(self):
+        """初始化"""
+        self._lingering = []
+    
+    def close(self, segment):
+        """
+        关闭共享内存段，仍有视图被引用时留待之后关闭
+        
+        Args:
+            segment: SharedMemory对象
+        """
+        try:
+            segment.close()
+        except BufferError:
+            self._lingering.append(segment)
+    
+    def collect(self):
+        """再次尝试关闭暂时无法关闭的共享内存段"""
+        lingering, self._lingering = self._lingering, []
+        for segment in lingering:
+            self.close(segment)
+
+
+def receive_result(result):
+    """
+    取出工作进程返回的处理结果字典，共享内存结果记录在'shared_result'键中
+    
+    Args:
+        result: SharedResult或普通的处理结果
+    
+    Returns:
+        dict: 处理结果
+    """
+    if not isinstance(result, SharedResult):
+        return result
+    image_data = result.load()
+    image_data['shared_result'] = result
+    return image_data
+
+
+def release_result(shared, image_data=None):
+    """
+    释放被替换的处理结果占用的共享内存
+    
+    Args:
+        shared: 旧结果的SharedResult，可为None
+        image_data: 替换后的处理结果字典（仍使用同一SharedResult时不释放），为None表示结果已被移除
+    """
+    if shared is not None and (image_data is None or image_data.get('shared_result') is not shared):
+        shared.release()
+
+
+# 全局共享内存段实例
+shared_segments = SharedSegments()
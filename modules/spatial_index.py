@@ -0,0 +1,230 @@
+"""
+空间索引模块
+把点集按坐标分到固定网格中，按视图范围只取可见网格内的点，
+点数超过预算时按网格分层抽稀，每个有数据的网格至少保留一个点
+"""
+
+import numpy as np
+
+from modules.point_sets import PointSet
+
+
+# 每个视图默认绘制的点数预算（对比模式中由所有数据集平分）
+DEFAULT_VIEW_BUDGET = 250000
+
+
+class GridIndex:
+    """
+    点集的网格空间索引
+    
+    建立时把点按网格编号排序，同一网格内的点使用固定随机种子打乱顺序，
+    因此取每个网格的前k个点即为该网格内的随机抽样，查询时无需再生成随机数。
+    只保存排序后的下标和每个网格的起始位置，不复制坐标数组。
+    """
+    
+    # 每个方向的网格数
+    GRID_SIZE = 256
+    
+    # 网格内打乱顺序使用的随机种子（相同数据每次得到相同的抽样）
+    SEED = 0
+    
+    def __init__(self, points, x_range, y_range, order, cell_starts, cell_counts):
+        """
+        初始化索引（通常通过from_points创建）
+        
+        Args:
+            points: 被索引的点集（PointSet）
+            x_range: 网格覆盖的x范围 (最小值, 最大值)
+            y_range: 网格覆盖的y范围 (最小值, 最大值)
+            order: 按网格编号排序后的点下标
+            cell_starts: 每个网格在order中的起始位置
+            cell_counts: 每个网格内的点数
+        """
+        self.points = points
+        self.x_range = x_range
+        self.y_range = y_range
+        self.order = order
+        self.cell_starts = cell_starts
+        self.cell_counts = cell_counts
+    
+    @staticmethod
+    def from_points(points):
+        """
+        为点集建立网格索引
+        
+        Args:
+            points: 绘图点集（PointSet）
+        
+        Returns:
+            GridIndex: 网格索引
+        """
+        size = GridIndex.GRID_SIZE
+        count = len(points)
+        index_dtype = np.int32 if count < 2 ** 31 else np.int64
+        
+        if count == 0:
+            empty = np.zeros(size * size, dtype=np.int64)
+            return GridIndex(points, (0.0, 1.0), (0.0, 1.0), np.empty(0, dtype=index_dtype), empty, empty)
+        
+        x_range = GridIndex._bounds(points.x)
+        y_range = GridIndex._bounds(points.y)
+        cells = GridIndex._cell_ids(points.x, points.y, x_range, y_range)
+        
+        # 先随机打乱再按网格编号稳定排序，网格内的顺序即为随机顺序
+        shuffle = np.random.default_rng(GridIndex.SEED).permutation(count).astype(index_dtype)
+        order = shuffle[np.argsort(cells[shuffle], kind='stable')]
+        del shuffle
+        
+        cell_counts = np.bincount(cells, minlength=size * size)
+        cell_starts = np.cumsum(cell_counts) - cell_counts
+        return GridIndex(points, x_range, y_range, order, cell_starts, cell_counts)
+    
+    @staticmethod
+    def _bounds(values):
+        """计算有限坐标的范围（范围为0或没有有限值时适当扩展）"""
+        low = float(np.nanmin(values, initial=np.inf, where=np.isfinite(values)))
+        high = float(np.nanmax(values, initial=-np.inf, where=np.isfinite(values)))
+        if not low <= high:
+            low, high = 0.0, 1.0
+        if high <= low:
+            high = low + 1.0
+        return low, high
+    
+    @staticmethod
+    def _cell_ids(x, y, x_range, y_range):
+        """计算每个点所在的网格编号（行优先）"""
+        size = GridIndex.GRID_SIZE
+        cx = GridIndex._quantize(x, x_range)
+        cy = GridIndex._quantize(y, y_range)
+        cy *= size
+        cy += cx
+        return cy
+    
+    @staticmethod
+    def _quantize(values, value_range):
+        """把坐标量化为网格行号或列号（0 到 GRID_SIZE-1，不是有限值的坐标归入边缘的网格）"""
+        size = GridIndex.GRID_SIZE
+        low, high = value_range
+        scaled = np.subtract(values, low, dtype=np.float64)
+        scaled *= size / (high - low)
+        np.nan_to_num(scaled, copy=False, nan=0.0, posinf=size - 1, neginf=0.0)
+        np.clip(scaled, 0, size - 1, out=scaled)
+        return scaled.astype(np.intp)
+    
+    def _cell_span(self, view_range, value_range):
+        """
+        计算与视图范围相交的网格行或列区间
+        
+        Returns:
+            tuple: (起始, 结束)（包含结束），不相交时返回None
+        """
+        size = self.GRID_SIZE
+        low, high = value_range
+        view_low, view_high = min(view_range), max(view_range)
+        if view_high < low or view_low > high:
+            return None
+        scale = size / (high - low)
+        start = min(max(int((view_low - low) * scale), 0), size - 1)
+        end = min(max(int((view_high - low) * scale), 0), size - 1)
+        return start, end
+    
+    def query(self, x_range, y_range, budget=DEFAULT_VIEW_BUDGET):
+        """
+        获取视图范围内的点，超过预算时按网格分层抽稀
+        
+        抽稀时每个网格按相同比例保留点（至少一个），保留下来的点的计数按网格内
+        被省略的点数放大，叠加透明度与绘制全部点的效果接近。
+        
+        Args:
+            x_range: 视图的x范围
+            y_range: 视图的y范围
+            budget: 点数预算
+        
+        Returns:
+            PointSet: 需要绘制的点集（视图包含全部点且未超预算时返回原点集）
+        """
+        points = self.points
+        if len(points) <= budget and self._contains(x_range, y_range):
+            return points
+        
+        x_span = self._cell_span(x_range, self.x_range)
+        y_span = self._cell_span(y_range, self.y_range)
+        if x_span is None or y_span is None or len(points) == 0:
+            return self._subset(self.order[:0], None)
+        
+        # 与视图相交的网格
+        size = self.GRID_SIZE
+        cells = np.add.outer(
+            np.arange(y_span[0], y_span[1] + 1) * size,
+            np.arange(x_span[0], x_span[1] + 1)
+        ).ravel()
+        counts = self.cell_counts[cells]
+        occupied = counts > 0
+        cells = cells[occupied]
+        counts = counts[occupied]
+        
+        candidate_count = int(counts.sum())
+        
+        # 按网格顺序收集候选点，并记录每个候选点所属网格的序号
+        cell_of_candidate = np.repeat(np.arange(len(cells)), counts)
+        offsets = np.arange(candidate_count) - np.repeat(np.cumsum(counts) - counts, counts)
+        candidates = self.order[self.cell_starts[cells][cell_of_candidate] + offsets]
+        del offsets
+        
+        # 边界网格只有部分在视图内，精确筛选
+        x = points.x[candidates]
+        y = points.y[candidates]
+        visible = (
+            (x >= min(x_range)) & (x <= max(x_range)) &
+            (y >= min(y_range)) & (y <= max(y_range))
+        )
+        candidates = candidates[visible]
+        cell_of_candidate = cell_of_candidate[visible]
+        visible_count = len(candidates)
+        
+        if visible_count <= budget:
+            return self._subset(candidates, None)
+        
+        # 分层抽稀：每个网格保留相同比例的点，至少一个
+        cell_visible = np.bincount(cell_of_candidate, minlength=len(cells))
+        keep_per_cell = np.ceil(cell_visible * (budget / visible_count)).astype(np.int64)
+        
+        # 网格内的点已是随机顺序，保留每个网格的前k个
+        cell_first = np.cumsum(cell_visible) - cell_visible
+        rank = np.arange(visible_count) - cell_first[cell_of_candidate]
+        keep = rank < keep_per_cell[cell_of_candidate]
+        
+        # 保留点代表的像素数按网格内省略的比例放大
+        scale = (cell_visible / np.maximum(keep_per_cell, 1)).astype(np.float32)
+        return self._subset(candidates[keep], scale[cell_of_candidate[keep]], total=visible_count)
+    
+    def _contains(self, x_range, y_range):
+        """视图是否包含全部点"""
+        return (
+            min(x_range) <= self.x_range[0] and max(x_range) >= self.x_range[1] and
+            min(y_range) <= self.y_range[0] and max(y_range) >= self.y_range[1]
+        )
+    
+    def _subset(self, selected, scale, total=None):
+        """
+        取出选中的点
+        
+        没有计数的点集抽稀后不生成逐点计数（逐点颜色的绘制比统一颜色慢一个数量级），
+        只记录视图内的点数，绘制时换算为统一的透明度。
+        
+        Args:
+            selected: 点下标
+            scale: 每个点计数的放大倍数，为None表示不放大
+            total: 抽稀前视图内的点数
+        
+        Returns:
+            PointSet: 选中的点集
+        """
+        points = self.points
+        x, y = points.x[selected], points.y[selected]
+        if points.counts is None:
+            return PointSet(x, y, None, total)
+        counts = points.counts[selected]
+        if scale is not None:
+            counts = counts * scale
+        return PointSet(x, y, counts)
@@ -0,0 +1,594 @@
+"""
+TIFF读取模块
+只解析文件头和第一个IFD；未压缩且像素连续存放的TIFF直接内存映射，
+降采样时只读取需要的行，不在内存中生成完整分辨率的数组；
+压缩的TIFF按条带或分块在线程池中并行解压，只解压包含被取样行的条带或分块
+"""
+
+import io
+import os
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image, features
+
+
+class TiffReader:
+    """
+    TIFF文件的IFD解析器
+    
+    支持标准TIFF和BigTIFF、大端和小端字节序。只读取第一个IFD（第一幅图像）中
+    与像素布局有关的标签，不读取像素数据。
+    """
+    
+    # 标签编号
+    IMAGE_WIDTH = 256
+    IMAGE_LENGTH = 257
+    BITS_PER_SAMPLE = 258
+    COMPRESSION = 259
+    PHOTOMETRIC = 262
+    STRIP_OFFSETS = 273
+    SAMPLES_PER_PIXEL = 277
+    ROWS_PER_STRIP = 278
+    STRIP_BYTE_COUNTS = 279
+    PLANAR_CONFIGURATION = 284
+    PREDICTOR = 317
+    TILE_WIDTH = 322
+    TILE_LENGTH = 323
+    TILE_OFFSETS = 324
+    TILE_BYTE_COUNTS = 325
+    SAMPLE_FORMAT = 339
+    
+    # 需要读取的标签（其他标签只跳过，不读取值）
+    LAYOUT_TAGS = (
+        IMAGE_WIDTH, IMAGE_LENGTH, BITS_PER_SAMPLE, COMPRESSION, PHOTOMETRIC,
+        STRIP_OFFSETS, SAMPLES_PER_PIXEL, ROWS_PER_STRIP, STRIP_BYTE_COUNTS,
+        PLANAR_CONFIGURATION, PREDICTOR, TILE_WIDTH, TILE_LENGTH, TILE_OFFSETS,
+        TILE_BYTE_COUNTS, SAMPLE_FORMAT
+    )
+    
+    # 字段类型对应的numpy数据类型（不含字节序）
+    FIELD_TYPES = {
+        1: 'u1', 2: 'u1', 3: 'u2', 4: 'u4', 5: 'u4', 6: 'i1', 7: 'u1', 8: 'i2',
+        9: 'i4', 10: 'i4', 11: 'f4', 12: 'f8', 16: 'u8', 17: 'i8', 18: 'u8'
+    }
+    
+    # 有理数类型每个值由两个整数组成
+    RATIONAL_TYPES = (5, 10)
+    
+    # 压缩方式
+    COMPRESSION_NONE = 1
+    COMPRESSION_LZW = 5
+    COMPRESSION_DEFLATE = (8, 32946)
+    COMPRESSION_PACKBITS = 32773
+    
+    # 交给Pillow解码的压缩方式（LZW需要Pillow带有libtiff）
+    PILLOW_COMPRESSIONS = (COMPRESSION_LZW, COMPRESSION_PACKBITS)
+    
+    # 预测器
+    PREDICTOR_NONE = 1
+    PREDICTOR_HORIZONTAL = 2
+    
+    # 并行解码的线程数
+    DECODE_WORKERS = os.cpu_count() or 1
+    
+    # 调色板图像（像素值是颜色表索引，不能直接当作颜色使用）
+    PHOTOMETRIC_PALETTE = 3
+    
+    def __init__(self, path):
+        """
+        解析文件头和第一个IFD
+        
+        Args:
+            path: TIFF文件路径
+        
+        Raises:
+            ValueError: 不是有效的TIFF文件
+        """
+        self.path = path
+        self.tags = {}
+        
+        with open(path, 'rb') as file:
+            header = file.read(16)
+            if header[:2] == b'II':
+                self.byte_order = '<'
+            elif header[:2] == b'MM':
+                self.byte_order = '>'
+            else:
+                raise ValueError("Not a TIFF file")
+            
+            version = struct.unpack(self.byte_order + 'H', header[2:4])[0]
+            if version == 42:
+                self.bigtiff = False
+                ifd_offset = struct.unpack(self.byte_order + 'I', header[4:8])[0]
+            elif version == 43:
+                self.bigtiff = True
+                ifd_offset = struct.unpack(self.byte_order + 'Q', header[8:16])[0]
+            else:
+                raise ValueError(f"Unsupported TIFF version: {version}")
+            
+            self._read_ifd(file, ifd_offset)
+        
+        if self.IMAGE_WIDTH not in self.tags or self.IMAGE_LENGTH not in self.tags:
+            raise ValueError("TIFF image size is missing")
+    
+    def _read_ifd(self, file, offset):
+        """读取IFD中的布局标签"""
+        order = self.byte_order
+        if self.bigtiff:
+            count_format, entry_size, inline_size = 'Q', 20, 8
+        else:
+            count_format, entry_size, inline_size = 'H', 12, 4
+        
+        file.seek(offset)
+        count_size = struct.calcsize(count_format)
+        entry_count = struct.unpack(order + count_format, file.read(count_size))[0]
+        entries = file.read(entry_count * entry_size)
+        if len(entries) < entry_count * entry_size:
+            raise ValueError("Truncated TIFF IFD")
+        
+        # 条目中的值个数和值（或偏移）字段大小相同
+        value_format = 'Q' if self.bigtiff else 'I'
+        value_size = struct.calcsize(value_format)
+        for i in range(entry_count):
+            entry = entries[i * entry_size:(i + 1) * entry_size]
+            tag, field_type = struct.unpack(order + 'HH', entry[:4])
+            if tag not in self.LAYOUT_TAGS or field_type not in self.FIELD_TYPES:
+                continue
+            
+            value_count = struct.unpack(order + value_format, entry[4:4 + value_size])[0]
+            dtype = np.dtype(order + self.FIELD_TYPES[field_type])
+            if field_type in self.RATIONAL_TYPES:
+                value_count *= 2
+            size = dtype.itemsize * value_count
+            
+            # 值不超过内联大小时直接保存在条目中，否则条目中是值的偏移
+            value_field = entry[entry_size - inline_size:]
+            if size <= inline_size:
+                data = value_field[:size]
+            else:
+                value_offset = struct.unpack(order + value_format, value_field)[0]
+                position = file.tell()
+                file.seek(value_offset)
+                data = file.read(size)
+                file.seek(position)
+                if len(data) < size:
+                    raise ValueError("Truncated TIFF tag value")
+            
+            self.tags[tag] = np.frombuffer(data, dtype=dtype)
+    
+    def _get(self, tag, default=None):
+        """获取标签的第一个值"""
+        values = self.tags.get(tag)
+        if values is None or len(values) == 0:
+            return default
+        return int(values[0])
+    
+    @property
+    def width(self):
+        """图像宽度"""
+        return self._get(self.IMAGE_WIDTH)
+    
+    @property
+    def height(self):
+        """图像高度"""
+        return self._get(self.IMAGE_LENGTH)
+    
+    @property
+    def samples_per_pixel(self):
+        """每个像素的通道数"""
+        return self._get(self.SAMPLES_PER_PIXEL, 1)
+    
+    @property
+    def bits_per_sample(self):
+        """每个通道的位数（各通道不同时返回None）"""
+        values = self.tags.get(self.BITS_PER_SAMPLE)
+        if values is None:
+            return 1
+        if len(set(int(v) for v in values)) != 1:
+            return None
+        return int(values[0])
+    
+    @property
+    def compression(self):
+        """压缩方式"""
+        return self._get(self.COMPRESSION, self.COMPRESSION_NONE)
+    
+    @property
+    def photometric(self):
+        """颜色解释方式"""
+        return self._get(self.PHOTOMETRIC)
+    
+    @property
+    def planar_configuration(self):
+        """通道排列方式（1为交错存放，2为按通道分平面存放）"""
+        return self._get(self.PLANAR_CONFIGURATION, 1)
+    
+    @property
+    def predictor(self):
+        """预测器（1为无，2为水平差分）"""
+        return self._get(self.PREDICTOR, 1)
+    
+    @property
+    def tiled(self):
+        """像素是否按分块存放"""
+        return self.TILE_OFFSETS in self.tags
+    
+    @property
+    def tile_width(self):
+        """分块宽度"""
+        return self._get(self.TILE_WIDTH)
+    
+    @property
+    def tile_length(self):
+        """分块高度"""
+        return self._get(self.TILE_LENGTH)
+    
+    @property
+    def rows_per_strip(self):
+        """每个条带的行数"""
+        return min(self._get(self.ROWS_PER_STRIP, self.height), self.height)
+    
+    @property
+    def offsets(self):
+        """条带或分块在文件中的偏移"""
+        return self.tags.get(self.TILE_OFFSETS if self.tiled else self.STRIP_OFFSETS)
+    
+    @property
+    def byte_counts(self):
+        """条带或分块的字节数"""
+        return self.tags.get(self.TILE_BYTE_COUNTS if self.tiled else self.STRIP_BYTE_COUNTS)
+    
+    @property
+    def dtype(self):
+        """
+        像素的numpy数据类型（含文件字节序）
+        
+        Returns:
+            numpy.dtype: 数据类型，不支持的位数或样本格式返回None
+        """
+        bits = self.bits_per_sample
+        sample_format = self._get(self.SAMPLE_FORMAT, 1)
+        kinds = {1: 'u', 2: 'i', 3: 'f'}
+        if bits not in (8, 16, 32, 64) or sample_format not in kinds:
+            return None
+        if sample_format == 3 and bits < 32:
+            return None
+        return np.dtype(f"{self.byte_order}{kinds[sample_format]}{bits // 8}")
+    
+    @property
+    def shape(self):
+        """像素数组形状 (H, W, C)，单通道为 (H, W)"""
+        if self.samples_per_pixel == 1:
+            return (self.height, self.width)
+        return (self.height, self.width, self.samples_per_pixel)
+    
+    def is_mappable(self):
+        """
+        像素是否可以直接内存映射：未压缩、交错存放、按条带存放且各条带在文件中首尾相连
+        
+        Returns:
+            bool: 是否可以内存映射
+        """
+        if self.compression != self.COMPRESSION_NONE or self.tiled:
+            return False
+        if self.planar_configuration != 1 and self.samples_per_pixel > 1:
+            return False
+        if self.photometric == self.PHOTOMETRIC_PALETTE or self.dtype is None:
+            return False
+        
+        offsets = self.offsets
+        byte_counts = self.byte_counts
+        if offsets is None or len(offsets) == 0:
+            return False
+        
+        row_bytes = self.width * self.samples_per_pixel * self.dtype.itemsize
+        if byte_counts is not None and len(byte_counts) == len(offsets):
+            # 各条带首尾相连，且总字节数足够
+            offsets = offsets.astype(np.int64)
+            byte_counts = byte_counts.astype(np.int64)
+            if np.any(offsets[1:] != offsets[:-1] + byte_counts[:-1]):
+                return False
+            if int(byte_counts.sum()) < row_bytes * self.height:
+                return False
+        elif len(offsets) != 1:
+            return False
+        return True
+    
+    def _chunk_layout(self):
+        """
+        条带或分块的布局
+        
+        Returns:
+            tuple: (每块行数, 每块列数, 每行块数)
+        """
+        if self.tiled:
+            tile_width = self.tile_width
+            return self.tile_length, tile_width, -(-self.width // tile_width)
+        return self.rows_per_strip, self.width, 1
+    
+    @property
+    def chunk_rows(self):
+        """每个条带或分块的行数"""
+        return self._chunk_layout()[0]
+    
+    def is_decodable(self):
+        """
+        像素是否可以按条带或分块解码：交错存放，无压缩、Deflate、LZW或PackBits压缩，
+        无预测器或整数水平差分预测器
+        
+        Returns:
+            bool: 是否可以解码
+        """
+        if self.planar_configuration != 1 and self.samples_per_pixel > 1:
+            return False
+        if self.photometric == self.PHOTOMETRIC_PALETTE or self.dtype is None:
+            return False
+        
+        compression = self.compression
+        if compression == self.COMPRESSION_LZW and not features.check('libtiff'):
+            return False
+        if compression not in (self.COMPRESSION_NONE, self.COMPRESSION_PACKBITS, self.COMPRESSION_LZW) + self.COMPRESSION_DEFLATE:
+            return False
+        
+        predictor = self.predictor
+        if predictor == self.PREDICTOR_HORIZONTAL and self.dtype.kind == 'f':
+            return False
+        if predictor not in (self.PREDICTOR_NONE, self.PREDICTOR_HORIZONTAL):
+            return False
+        
+        offsets = self.offsets
+        byte_counts = self.byte_counts
+        if self.tiled and not (self.tile_width and self.tile_length):
+            return False
+        if offsets is None or byte_counts is None or len(offsets) != len(byte_counts):
+            return False
+        
+        chunk_rows, _, chunks_across = self._chunk_layout()
+        return len(offsets) >= -(-self.height // chunk_rows) * chunks_across
+    
+    def read(self, row_step=1, col_step=1, workers=None, row_range=None):
+        """
+        按步长解码像素，只解压包含被取样行的条带或分块
+        
+        需要的条带或分块平均分给线程池中的线程（zlib和Pillow解压时释放GIL）。
+        每个条带或分块解压后只取出被取样的行，再按列步长取样，不生成完整分辨率的数组。
+        
+        Args:
+            row_step: 行步长
+            col_step: 列步长
+            workers: 线程数，为None时使用DECODE_WORKERS
+            row_range: 只解码该行范围 (起始行, 结束行)，为None时解码整幅图像；
+                       取样行始终是行步长的整数倍，分段读取的结果拼接后与整幅读取一致
+        
+        Returns:
+            numpy.ndarray: 本机字节序的像素数组 (H', W', C)，单通道为 (H', W')
+        
+        Raises:
+            ValueError: 像素不能按条带或分块解码，或数据损坏
+        """
+        if not self.is_decodable():
+            raise ValueError("TIFF compression or layout is not supported")
+        
+        height, width = self.height, self.width
+        chunk_rows, _, chunks_across = self._chunk_layout()
+        start, stop = row_range if row_range is not None else (0, height)
+        stop = min(stop, height)
+        first = -(-start // row_step) * row_step
+        sampled_rows = np.arange(first, stop, row_step)
+        
+        # 包含被取样行的条带或分块
+        chunk_row_ids = np.unique(sampled_rows // chunk_rows)
+        chunk_ids = (chunk_row_ids[:, None] * chunks_across + np.arange(chunks_across)).ravel()
+        if stop > start:
+            overlapping = (stop - 1) // chunk_rows - start // chunk_rows + 1
+            tiff_decode_stats.record_skipped(overlapping * chunks_across - len(chunk_ids))
+        
+        output = np.empty(
+            (len(sampled_rows), -(-width // col_step), self.samples_per_pixel),
+            dtype=self.dtype.newbyteorder('=')
+        )
+        if len(chunk_ids) == 0:
+            return output[:, :, 0] if self.samples_per_pixel == 1 else output
+        
+        if workers is None:
+            workers = self.DECODE_WORKERS
+        workers = max(1, min(workers, len(chunk_ids)))
+        groups = np.array_split(chunk_ids, workers)
+        if workers == 1:
+            self._decode_chunks(groups[0], output, row_step, col_step, first, stop)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(self._decode_chunks, group, output, row_step, col_step, first, stop)
+                    for group in groups
+                ]
+                for future in futures:
+                    future.result()
+        
+        if self.samples_per_pixel == 1:
+            return output[:, :, 0]
+        return output
+    
+    def _decode_chunks(self, chunk_ids, output, row_step, col_step, first, stop):
+        """
+        解码一组条带或分块，把被取样的像素写入输出数组（各线程写入互不重叠的区域）
+        
+        Args:
+            chunk_ids: 条带或分块编号
+            output: 输出数组
+            row_step: 行步长
+            col_step: 列步长
+            first: 输出数组第一行对应的图像行
+            stop: 读取范围的结束行
+        """
+        height, width = self.height, self.width
+        samples = self.samples_per_pixel
+        chunk_rows, chunk_cols, chunks_across = self._chunk_layout()
+        row_bytes = chunk_cols * samples * self.dtype.itemsize
+        native = self.dtype.newbyteorder('=')
+        
+        with open(self.path, 'rb') as file:
+            for chunk_id in chunk_ids:
+                y0 = int(chunk_id // chunks_across) * chunk_rows
+                x0 = int(chunk_id % chunks_across) * chunk_cols
+                
+                # 分块始终是完整大小（边缘填充），最后一个条带可能不足chunk_rows行
+                rows = chunk_rows if self.tiled else min(chunk_rows, height - y0)
+                
+                file.seek(int(self.offsets[chunk_id]))
+                raw = file.read(int(self.byte_counts[chunk_id]))
+                data = self._decompress(raw, row_bytes, rows)
+                tiff_decode_stats.record(len(raw), len(data))
+                if len(data) < row_bytes * rows:
+                    raise ValueError("Truncated TIFF strip or tile")
+                
+                chunk = np.frombuffer(data, dtype=self.dtype, count=rows * chunk_cols * samples)
+                chunk = chunk.reshape(rows, chunk_cols, samples)
+                
+                # 本块中被取样的行和列（全局坐标为步长的整数倍，且在读取范围内）
+                first_row = max(first, y0 + (-y0 % row_step)) - y0
+                first_col = -x0 % col_step
+                selected = chunk[first_row:min(rows, height - y0, stop - y0):row_step]
+                if len(selected) == 0:
+                    continue
+                
+                # 水平差分预测器按行累加恢复原值，只处理被取样的行
+                if self.predictor == self.PREDICTOR_HORIZONTAL:
+                    selected = np.cumsum(selected.astype(native), axis=1, dtype=native)
+                
+                selected = selected[:, first_col:min(chunk_cols, width - x0):col_step]
+                out_row = (y0 + first_row - first) // row_step
+                out_col = (x0 + first_col) // col_step
+                output[out_row:out_row + selected.shape[0], out_col:out_col + selected.shape[1]] = selected
+    
+    def _decompress(self, raw, row_bytes, rows):
+        """
+        解压一个条带或分块
+        
+        Args:
+            raw: 压缩数据
+            row_bytes: 每行字节数
+            rows: 行数
+        
+        Returns:
+            bytes: 解压后的数据
+        """
+        compression = self.compression
+        if compression == self.COMPRESSION_NONE:
+            return raw
+        if compression in self.COMPRESSION_DEFLATE:
+            try:
+                return zlib.decompress(raw)
+            except zlib.error as e:
+                raise ValueError(f"Corrupt deflate data: {e}")
+        return self._decompress_with_pillow(raw, compression, row_bytes, rows)
+    
+    @staticmethod
+    def _decompress_with_pillow(raw, compression, row_bytes, rows):
+        """
+        用Pillow解压LZW或PackBits数据
+        
+        这两种压缩只作用于字节流，与像素格式无关：把数据包装为只有一个条带的
+        8位灰度TIFF（宽度为每行字节数），解码后的像素即为原始字节。
+        预测器由调用方按实际数据类型处理。
+        """
+        tags = [
+            (TiffReader.IMAGE_WIDTH, 4, row_bytes),
+            (TiffReader.IMAGE_LENGTH, 4, rows),
+            (TiffReader.BITS_PER_SAMPLE, 3, 8),
+            (TiffReader.COMPRESSION, 3, compression),
+            (TiffReader.PHOTOMETRIC, 3, 1),
+            (TiffReader.STRIP_OFFSETS, 4, 0),
+            (TiffReader.SAMPLES_PER_PIXEL, 3, 1),
+            (TiffReader.ROWS_PER_STRIP, 4, rows),
+            (TiffReader.STRIP_BYTE_COUNTS, 4, len(raw)),
+        ]
+        data_offset = 8 + 2 + len(tags) * 12 + 4
+        
+        header = bytearray(b'II' + struct.pack('<HI', 42, 8))
+        header += struct.pack('<H', len(tags))
+        for tag, field_type, value in tags:
+            if tag == TiffReader.STRIP_OFFSETS:
+                value = data_offset
+            # SHORT值左对齐存放在4字节的值字段中
+            field = struct.pack('<HH', value, 0) if field_type == 3 else struct.pack('<I', value)
+            header += struct.pack('<HHI', tag, field_type, 1) + field
+        header += struct.pack('<I', 0)
+        
+        try:
+            with Image.open(io.BytesIO(bytes(header) + raw)) as image:
+                image.load()
+                return image.tobytes()
+        except (OSError, Image.DecompressionBombError) as e:
+            raise ValueError(f"Cannot decode TIFF strip or tile: {e}")
+    
+    def memmap(self):
+        """
+        以只读方式内存映射像素数据（不读取任何像素，访问时由操作系统按页读取）
+        
+        Returns:
+            numpy.memmap: 像素数组 (H, W, C) 或 (H, W)
+        
+        Raises:
+            ValueError: 像素不能直接内存映射
+        """
+        if not self.is_mappable():
+            raise ValueError("TIFF pixel data is not contiguous and uncompressed")
+        return np.memmap(
+            self.path,
+            dtype=self.dtype,
+            mode='r',
+            offset=int(self.offsets[0]),
+            shape=self.shape
+        )
+
+
+class TiffDecodeStats:
+    """
+    TIFF条带和分块的解码统计（进程内共享）
+    
+    统计实际解压的条带或分块数、跳过的数量（不含被取样行），以及压缩前后的字节数。
+    """
+    
+    def __init__(self):
+        """初始化统计"""
+        self._lock = threading.Lock()
+        self.chunks_decoded = 0
+        self.chunks_skipped = 0
+        self.compressed_bytes = 0
+        self.decompressed_bytes = 0
+    
+    def record(self, compressed_bytes, decompressed_bytes):
+        """记录解压了一个条带或分块"""
+        with self._lock:
+            self.chunks_decoded += 1
+            self.compressed_bytes += compressed_bytes
+            self.decompressed_bytes += decompressed_bytes
+    
+    def record_skipped(self, count):
+        """记录跳过的条带或分块数"""
+        with self._lock:
+            self.chunks_skipped += count
+    
+    def get_stats(self):
+        """
+        获取解码统计
+        
+        Returns:
+            dict: 解压和跳过的条带或分块数，以及压缩前后的字节数
+        """
+        with self._lock:
+            return {
+                'chunks_decoded': self.chunks_decoded,
+                'chunks_skipped': self.chunks_skipped,
+                'compressed_bytes': self.compressed_bytes,
+                'decompressed_bytes': self.decompressed_bytes
+            }
+
+
+# 全局TIFF解码统计实例
+tiff_decode_stats = TiffDecodeStats()
@@ -0,0 +1,58 @@
+"""
+浮点图像中NaN和inf像素的回归测试
+这些像素的坐标不是有限值，应在转换时去掉，不能使空间索引和数据摘要出错
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.color_spaces import MultiSpaceResult, COLOR_SPACE_LABELS
+from modules.point_sets import PointSet
+from modules.spatial_index import GridIndex
+
+
+def make_pixels():
+    """生成含NaN和inf像素的浮点RGB图像"""
+    pixels = np.random.default_rng(0).random((40, 50, 3)).astype(np.float32) + 0.01
+    pixels[0, 0, 0] = np.nan
+    pixels[0, 1, 1] = np.nan
+    pixels[0, 2, 2] = np.inf
+    pixels[0, 3, 0] = -np.inf
+    pixels[0, 4, 1] = np.inf
+    pixels[0, 5] = (np.inf, 0.0, 0.0)
+    return pixels
+
+
+def test_nonfinite_pixels_are_dropped():
+    """转换结果只包含有限坐标，绘图点集、空间索引和数据摘要可以正常建立"""
+    pixels = make_pixels()
+    results = (MultiSpaceResult.from_pixels(pixels), MultiSpaceResult.from_reference(pixels))
+    for color_space in COLOR_SPACE_LABELS:
+        # 两种实现去掉的像素相同，有限的像素都保留（g为inf的像素r/g、b/g为0，仍然有效）
+        counts = {len(result.get(color_space)[0]) for result in results}
+        assert len(counts) == 1
+        assert counts.pop() >= pixels.shape[0] * pixels.shape[1] - 6
+    
+    for result in results:
+        for color_space in COLOR_SPACE_LABELS:
+            result.prepare_points(color_space)
+            x_data, y_data = result.get(color_space)
+            assert np.isfinite(x_data).all() and np.isfinite(y_data).all()
+            index = result.get_index(color_space)
+            assert np.isfinite(index.x_range).all() and np.isfinite(index.y_range).all()
+            assert len(index.query((-1e9, 1e9), (-1e9, 1e9), budget=100)) > 0
+
+
+def test_grid_index_ignores_nonfinite_coordinates():
+    """直接传入不是有限值的坐标时，坐标范围只按有限值计算"""
+    values = np.array([np.nan, 1.0, 2.0, np.inf, -np.inf], dtype=np.float32)
+    index = GridIndex.from_points(PointSet(values, values))
+    assert index.x_range == (1.0, 2.0)
+    assert len(index.query((0.0, 3.0), (0.0, 3.0), budget=1)) >= 1
+    
+    empty = np.array([np.nan], dtype=np.float32)
+    assert GridIndex.from_points(PointSet(empty, empty)).x_range == (0.0, 1.0)
@@ -0,0 +1,38 @@
+"""
+坐标磁盘缓存的回归测试
+文件被原地修改后（大小不变、修改的位置不在指纹的抽样块中）不能读到旧的坐标
+"""
+
+import os
+import sys
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.result_cache import CoordinateDiskCache
+
+
+def test_in_place_edit_invalidates_entry(tmp_path):
+    """大小不变的原地修改使缓存键变化，已有的缓存项不再命中"""
+    image_path = tmp_path / 'image.raw'
+    head = CoordinateDiskCache.FINGERPRINT_HEAD_BYTES
+    image_path.write_bytes(np.random.default_rng(0).bytes(12 * 1024 * 1024))
+    stat = os.stat(image_path)
+    
+    cache = CoordinateDiskCache(str(tmp_path / 'cache'))
+    params = {'color_space': 'rg_bg', 'sample_rate': 1}
+    arrays = {'x': np.arange(10, dtype=np.float32), 'y': np.arange(10, dtype=np.float32)}
+    cache.store(str(image_path), params, arrays, {}, Image.new('RGB', (4, 4)))
+    assert cache.load(str(image_path), params) is not None
+    old_hash = cache.get_file_hash(str(image_path))
+    
+    # 修改文件头之后、第一个抽样块之前的内容（指纹不变），文件大小不变
+    with open(image_path, 'r+b') as f:
+        f.seek(head + 100)
+        f.write(bytes(5000))
+    os.utime(image_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+    
+    assert cache.get_file_hash(str(image_path)) == old_hash
+    assert cache.load(str(image_path), params) is None